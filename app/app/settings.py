@@ -48,6 +48,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core',
     'rest_framework',
     'rest_framework.authtoken',
@@ -101,6 +102,35 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/ref/settings/#caches
+# Version stamps in the cache must be shared by every uWSGI worker, so the
+# default is a file based cache, point CACHE_BACKEND/CACHE_LOCATION at
+# memcached to share it between containers.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', '/vol/web/cache'),
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 300)),
+    }
+}
+if CACHES['default']['BACKEND'].endswith('.FileBasedCache'):
+    # Only a fallback, deployments share memcached between the workers.
+    # The file cache deletes random files once MAX_ENTRIES is reached, so
+    # it is sized for many users and culls a tenth at a time.
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 50000)),
+        'CULL_FREQUENCY': 10,
+    }
+
+# Tests get a local memory cache, see app.test_runner
+TEST_RUNNER = 'app.test_runner.TestRunner'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -146,6 +176,9 @@ MEDIA_URL = '/static/media/'
 STATIC_ROOT = '/vol/web/static'
 # File system path for storing user-uploaded files.
 MEDIA_ROOT = '/vol/web/media'
+# Chunked image uploads in progress, on the same volume so finished files
+# are moved into MEDIA_ROOT rather than copied.
+CHUNKED_UPLOAD_ROOT = '/vol/web/chunked'
 
 
 # Default primary key field type
@@ -158,7 +191,12 @@ AUTH_USER_MODEL = 'core.User'
 
 # Generate schema for apis
 REST_FRAMEWORK = {
- 'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema'
+ 'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+ # orjson based JSON renderer (falls back to the stdlib without orjson)
+ 'DEFAULT_RENDERER_CLASSES': [
+     'core.renderers.FastJSONRenderer',
+     'rest_framework.renderers.BrowsableAPIRenderer',
+ ],
 }
 
 # For image upload to work through browseable interface
@@ -0,0 +1,28 @@
+"""
+Test runner for the project.
+"""
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """Run the tests against a cache of their own.
+
+    The default file cache outlives the test database, whose user ids
+    start over every run, so stamps and responses cached by an earlier
+    run (or the dev server) could be served to the tests.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_settings = override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            }
+        })
+        self._cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,103 @@
+"""
+Token authentication with the resolved tokens cached.
+
+TokenAuthentication looks the token and its user up with a SELECT on
+every request. CachedTokenAuthentication keeps the result in the process
+and in the shared cache for a short time instead.
+
+Every token has a revocation stamp in the shared cache which cached
+entries are checked against. Deleting the token or saving its user
+replaces the stamp, so a revoked token or deactivated user is refused by
+every process on its next request.
+"""
+
+import time
+
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+
+from rest_framework.authentication import TokenAuthentication
+
+
+# Keys of the revocation stamps and the cached tokens
+STAMP_KEY = 'auth:stamp:{key}'
+TOKEN_KEY = 'auth:token:{key}'
+
+
+def get_stamp(key):
+    """Return the revocation stamp of a token key."""
+    stamp_key = STAMP_KEY.format(key=key)
+    stamp = cache.get(stamp_key)
+    if stamp is None:
+        cache.add(stamp_key, time.time_ns(), None)
+        stamp = cache.get(stamp_key)
+
+    return stamp
+
+
+def _set_stamp(key):
+    """Replace the revocation stamp of a token key."""
+    cache.set(STAMP_KEY.format(key=key), time.time_ns(), None)
+
+
+def revoke(key):
+    """Invalidate every cached copy of a token.
+
+    Like the recipe cache versions the stamp is replaced straight away
+    and again on commit, so a lookup reading the old rows while the
+    change is in flight cannot be cached under the new stamp.
+    """
+    _set_stamp(key)
+    transaction.on_commit(partial(_set_stamp, key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Drop-in TokenAuthentication caching resolved tokens and users."""
+
+    # Seconds a resolved token is cached for at most
+    cache_timeout = 60
+    # Tokens kept in each process before the local cache is emptied
+    max_local_entries = 1024
+
+    # Shared by the instances of a process: {key: (expires, stamp, entry)}
+    _local = {}
+
+    def authenticate_credentials(self, key):
+        """Return the user and token of key, from the caches if valid.
+
+        The stamp is read before the token is looked up, so an entry
+        read from the database is never stored under a newer stamp.
+        """
+        stamp_key = STAMP_KEY.format(key=key)
+        token_key = TOKEN_KEY.format(key=key)
+
+        local = self._local.get(key)
+        if local is not None and local[0] > time.monotonic():
+            stamp = get_stamp(key)
+            if local[1] == stamp:
+                return local[2]
+        else:
+            cached = cache.get_many([stamp_key, token_key])
+            stamp = cached.get(stamp_key) or get_stamp(key)
+            shared = cached.get(token_key)
+            if shared is not None and shared[0] == stamp:
+                self._store_local(key, stamp, shared[1])
+                return shared[1]
+
+        user, token = super().authenticate_credentials(key)
+        cache.set(token_key, (stamp, (user, token)), self.cache_timeout)
+        self._store_local(key, stamp, (user, token))
+
+        return user, token
+
+    def _store_local(self, key, stamp, entry):
+        """Keep entry in the process until the cache timeout."""
+        if len(self._local) >= self.max_local_entries:
+            self._local.clear()
+        self._local[key] = (
+            time.monotonic() + self.cache_timeout,
+            stamp,
+            entry
+        )
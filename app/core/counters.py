@@ -0,0 +1,97 @@
+"""
+Counts of the recipes linked to each tag and ingredient.
+
+recipe_count is adjusted in place with F() expressions wherever links are
+added or removed, so it stays exact without counting the through table.
+recount() rebuilds the counts from the links if they ever drift.
+"""
+
+from collections import defaultdict
+
+from core.models import Recipe
+
+from django.db.models import (
+    Count,
+    F,
+    OuterRef,
+    Subquery,
+    Value
+)
+from django.db.models.functions import Coalesce
+
+
+# Recipe fields whose tags/ingredients count their recipes
+COUNTED_RELATIONS = ['tags', 'ingredients']
+
+
+def adjust_recipe_counts(model, deltas):
+    """Add {id: delta} to the recipe_count of tags/ingredients.
+
+    Rows sharing a delta are updated by one statement, so linking a recipe
+    to ten tags is a single UPDATE. Ids are sorted so concurrent updates
+    lock the rows in the same order.
+    """
+    ids_by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta:
+            ids_by_delta[delta].append(pk)
+
+    for delta, ids in ids_by_delta.items():
+        model.objects.filter(pk__in=sorted(ids)).update(
+            recipe_count=F('recipe_count') + delta
+        )
+
+
+def _links(relation):
+    """Return the through model and its recipe and target columns."""
+    model_field = Recipe._meta.get_field(relation)
+
+    return (
+        model_field.remote_field.through,
+        f'{model_field.m2m_field_name()}_id',
+        f'{model_field.m2m_reverse_field_name()}_id'
+    )
+
+
+def release_links(recipe_ids):
+    """Decrement the counts of the tags/ingredients of recipes.
+
+    Call before the links of recipes are deleted without m2m_changed
+    being sent, as when recipes are deleted.
+    """
+    for relation in COUNTED_RELATIONS:
+        through, source, target = _links(relation)
+        counts = through.objects.filter(
+            **{f'{source}__in': recipe_ids}
+        ).order_by().values(target).annotate(
+            links=Count('pk')
+        ).values_list(target, 'links')
+        adjust_recipe_counts(
+            Recipe._meta.get_field(relation).related_model,
+            {pk: -links for pk, links in counts}
+        )
+
+
+def recount(relation, queryset=None):
+    """Recompute the recipe_count of tags/ingredients from their links.
+
+    Only rows whose count is wrong are updated. Returns the number fixed.
+    """
+    through, source, target = _links(relation)
+    model = Recipe._meta.get_field(relation).related_model
+    links = Coalesce(
+        Subquery(
+            through.objects.filter(
+                **{target: OuterRef('pk')}
+            ).order_by().values(target).annotate(
+                links=Count('pk')
+            ).values('links')
+        ),
+        Value(0)
+    )
+    queryset = model.objects.all() if queryset is None else queryset
+    drifted = queryset.annotate(links=links).exclude(
+        recipe_count=F('links')
+    ).values('pk')
+
+    return model.objects.filter(pk__in=drifted).update(recipe_count=links)
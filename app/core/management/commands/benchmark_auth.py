@@ -0,0 +1,82 @@
+"""
+Django command comparing TokenAuthentication and its cached variant.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import (
+    connection,
+    transaction
+)
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from core.authentication import (
+    CachedTokenAuthentication,
+    STAMP_KEY,
+    TOKEN_KEY
+)
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the token authentication classes"""
+
+    help = 'Compare the per request cost of the token authentications.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=10000)
+
+    def _measure(self, label, authentication, request, count,
+                 local=True):
+        """Authenticate request count times and report the cost."""
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for _ in range(count):
+                if not local:
+                    CachedTokenAuthentication._local.clear()
+                authentication.authenticate(request)
+            elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            '{label:<30} {us:>10.1f} us/request {queries:>8} queries'.format(
+                label=label,
+                us=elapsed / count * 10 ** 6,
+                queries=len(queries)
+            )
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        count = options['requests']
+
+        # Everything is rolled back so the benchmark leaves no data behind
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                email='benchmark-auth@example.com',
+                password=None
+            )
+            token = Token.objects.create(user=user)
+            request = APIRequestFactory().get(
+                '/', HTTP_AUTHORIZATION=f'Token {token.key}'
+            )
+
+            self._measure('TokenAuthentication', TokenAuthentication(),
+                          request, count)
+
+            cached = CachedTokenAuthentication()
+            self._measure('cached (process)', cached, request, count)
+            # Every request misses the process cache, as in a new worker
+            self._measure('cached (shared only)', cached, request, count,
+                          local=False)
+
+            transaction.set_rollback(True)
+            CachedTokenAuthentication._local.clear()
+            cache.delete_many([
+                STAMP_KEY.format(key=token.key),
+                TOKEN_KEY.format(key=token.key),
+            ])
@@ -0,0 +1,21 @@
+"""
+Django command recomputing the recipe counts of tags and ingredients.
+"""
+from django.core.management.base import BaseCommand
+
+from core.counters import (
+    COUNTED_RELATIONS,
+    recount
+)
+
+
+class Command(BaseCommand):
+    """Django command to repair drifted recipe_count columns"""
+
+    help = 'Recompute recipe_count of tags and ingredients from the links.'
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        for relation in COUNTED_RELATIONS:
+            fixed = recount(relation)
+            self.stdout.write(f'{relation}: {fixed} counts repaired')
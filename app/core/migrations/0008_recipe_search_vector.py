@@ -0,0 +1,49 @@
+# Generated by Django 3.2.25 on 2026-10-17 09:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Same weighting as core.search.search_vector()
+POPULATE_SEARCH_VECTOR = """
+UPDATE core_recipe SET search_vector =
+    setweight(to_tsvector('english', COALESCE(title, '')), 'A') ||
+    setweight(to_tsvector(
+        'english',
+        COALESCE((
+            SELECT string_agg(core_tag.name, ' ')
+            FROM core_recipe_tags
+            INNER JOIN core_tag ON core_tag.id = core_recipe_tags.tag_id
+            WHERE core_recipe_tags.recipe_id = core_recipe.id
+        ), '') || ' ' ||
+        COALESCE((
+            SELECT string_agg(core_ingredient.name, ' ')
+            FROM core_recipe_ingredients
+            INNER JOIN core_ingredient
+                ON core_ingredient.id = core_recipe_ingredients.ingredient_id
+            WHERE core_recipe_ingredients.recipe_id = core_recipe.id
+        ), '')
+    ), 'B') ||
+    setweight(to_tsvector('english', COALESCE(description, '')), 'C');
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_recipe_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='recipe_search_vector_idx'),
+        ),
+        migrations.RunSQL(POPULATE_SEARCH_VECTOR, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-17 10:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_recipe_search_vector'),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.BtreeGinExtension(),
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.AddIndex(
+            model_name='tag',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['user', 'name'], name='tag_user_name_trgm_idx', opclasses=['int8_ops', 'gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['user', 'name'], name='ingredient_user_name_trgm_idx', opclasses=['int8_ops', 'gin_trgm_ops']),
+        ),
+    ]
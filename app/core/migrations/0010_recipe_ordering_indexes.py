@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-17 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_name_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'id'], name='recipe_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'price', 'id'], name='recipe_user_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'time_minutes', 'id'], name='recipe_user_time_minutes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'title', 'id'], name='recipe_user_title_idx'),
+        ),
+    ]
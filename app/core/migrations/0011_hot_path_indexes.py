@@ -0,0 +1,33 @@
+# Generated by Django 3.2.25 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_recipe_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'name', 'id'], name='tag_user_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', 'name', 'id'], name='ingredient_user_name_id_idx'),
+        ),
+        # Reverse lookups (recipes of a tag/ingredient) as index only scans,
+        # the auto-created through tables cannot declare indexes themselves
+        migrations.RunSQL(
+            'CREATE INDEX core_recipe_tags_tag_recipe_idx '
+            'ON core_recipe_tags (tag_id, recipe_id);',
+            'DROP INDEX core_recipe_tags_tag_recipe_idx;',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX core_recipe_ingredients_ingredient_recipe_idx '
+            'ON core_recipe_ingredients (ingredient_id, recipe_id);',
+            'DROP INDEX core_recipe_ingredients_ingredient_recipe_idx;',
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 3.2.25 on 2026-10-17 13:00
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Merge tags/ingredients sharing a name into the oldest one."""
+    Recipe = apps.get_model('core', 'Recipe')
+    for relation in ['tags', 'ingredients']:
+        field = Recipe._meta.get_field(relation)
+        model = field.related_model
+        through = field.remote_field.through
+        target = f'{field.m2m_reverse_field_name()}_id'
+
+        duplicates = model.objects.values('user_id', 'name').annotate(
+            keep=Min('id'),
+            count=Count('id')
+        ).filter(count__gt=1)
+        for duplicate in duplicates:
+            others = model.objects.filter(
+                user_id=duplicate['user_id'],
+                name=duplicate['name']
+            ).exclude(id=duplicate['keep'])
+            recipe_ids = set(through.objects.filter(
+                **{f'{target}__in': others.values('id')}
+            ).values_list('recipe_id', flat=True))
+            through.objects.bulk_create(
+                [
+                    through(recipe_id=recipe_id, **{target: duplicate['keep']})
+                    for recipe_id in recipe_ids
+                ],
+                ignore_conflicts=True
+            )
+            others.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names, migrations.RunPython.noop),
+    ]
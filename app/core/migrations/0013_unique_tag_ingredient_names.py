@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-17 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_merge_duplicate_names'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_tag_user_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_ingredient_user_name'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.2.25 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_unique_tag_ingredient_names'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipe_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'recipe_count', 'id'], name='tag_user_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', 'recipe_count', 'id'], name='ingredient_user_count_idx'),
+        ),
+        # Count the links of the existing tags and ingredients
+        migrations.RunSQL(
+            'UPDATE core_tag SET recipe_count = ('
+            'SELECT COUNT(*) FROM core_recipe_tags '
+            'WHERE core_recipe_tags.tag_id = core_tag.id);',
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            'UPDATE core_ingredient SET recipe_count = ('
+            'SELECT COUNT(*) FROM core_recipe_ingredients '
+            'WHERE core_recipe_ingredients.ingredient_id = '
+            'core_ingredient.id);',
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_recipe_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_renditions',
+            field=models.JSONField(default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 3.2.25 on 2026-10-17 12:00
+
+from django.db import migrations, models, transaction
+import core.models
+import core.storage
+
+
+def rehash_images(apps, schema_editor):
+    """Store the existing images under the hash of their bytes.
+
+    The files are copied and the rows renamed, the old files are only
+    removed once the migration commits. Images already hashed, or whose
+    file is missing, are left as they are.
+    """
+    Recipe = apps.get_model('core', 'Recipe')
+    storage = core.storage.ContentAddressedStorage()
+
+    names = (
+        Recipe.objects.exclude(image='').exclude(image__isnull=True)
+        .order_by().values_list('image', flat=True).distinct()
+    )
+    replaced = []
+    for name in list(names):
+        if core.storage.HASHED_NAME.search(name) or not storage.exists(name):
+            continue
+
+        with storage.open(name) as file:
+            new_name = storage.save(name, file)
+        Recipe.objects.filter(image=name).update(image=new_name)
+        replaced.append(name)
+
+    def delete_replaced():
+        for name in replaced:
+            storage.delete(name)
+
+    transaction.on_commit(delete_replaced)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_imageupload'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(null=True, storage=core.storage.ContentAddressedStorage(), upload_to=core.models.recipe_image_file_path),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['image'], name='recipe_image_idx'),
+        ),
+        migrations.RunPython(rehash_images, migrations.RunPython.noop),
+    ]
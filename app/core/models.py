@@ -11,19 +11,25 @@ from django.contrib.auth.models import (
     BaseUserManager,
     PermissionsMixin
 )
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
+from core.storage import ContentAddressedStorage
+
 
 def recipe_image_file_path(instance, filename):
-    """Generate file path for new recipe image."""
+    """Generate file path for new recipe image.
+
+    Only the directory and the extension are kept, the storage names the
+    file by the hash of its bytes, see core.storage.
+    """
 
     # Getting extension of the original file name
-    ext = os.path.splitext(filename)[1]
-    # Generating unique filename
-    filename = f'{uuid.uuid4()}{ext}'
+    ext = os.path.splitext(filename)[1].lower()
 
     # Returning path where we want to store the image files
-    return os.path.join('uploads', 'recipe', filename)
+    return os.path.join('uploads', 'recipe', f'image{ext}')
 
 
 class UserManager(BaseUserManager):
@@ -89,6 +95,35 @@ class Tag(models.Model):
         on_delete=models.CASCADE
     )
     name = models.CharField(max_length=255)
+    # Recipes linked to this tag, maintained by core.counters
+    recipe_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # Per user prefix and fuzzy name lookups for autocomplete
+            GinIndex(
+                fields=['user', 'name'],
+                name='tag_user_name_trgm_idx',
+                opclasses=['int8_ops', 'gin_trgm_ops']
+            ),
+            # Lists are ordered by name, id breaks ties
+            models.Index(
+                fields=['user', 'name', 'id'],
+                name='tag_user_name_id_idx'
+            ),
+            # Lists ordered by popularity
+            models.Index(
+                fields=['user', 'recipe_count', 'id'],
+                name='tag_user_count_idx'
+            ),
+        ]
+        constraints = [
+            # Names are looked up by value when recipes are written
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_tag_user_name'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -101,6 +136,35 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE
     )
     name = models.CharField(max_length=255)
+    # Recipes linked to this ingredient, maintained by core.counters
+    recipe_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # Per user prefix and fuzzy name lookups for autocomplete
+            GinIndex(
+                fields=['user', 'name'],
+                name='ingredient_user_name_trgm_idx',
+                opclasses=['int8_ops', 'gin_trgm_ops']
+            ),
+            # Lists are ordered by name, id breaks ties
+            models.Index(
+                fields=['user', 'name', 'id'],
+                name='ingredient_user_name_id_idx'
+            ),
+            # Lists ordered by popularity
+            models.Index(
+                fields=['user', 'recipe_count', 'id'],
+                name='ingredient_user_count_idx'
+            ),
+        ]
+        constraints = [
+            # Names are looked up by value when recipes are written
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_ingredient_user_name'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -121,7 +185,65 @@ class Recipe(models.Model):
     tags = models.ManyToManyField(Tag)
     # Many Different recipes may have many different ingredients
     ingredients = models.ManyToManyField(Ingredient)
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    # Shared by every recipe with the same bytes, see recipe.bulk
+    image = models.ImageField(
+        null=True,
+        upload_to=recipe_image_file_path,
+        storage=ContentAddressedStorage()
+    )
+    # Resized copies of image, {size: {extension: name}}, see recipe.renditions
+    image_renditions = models.JSONField(default=dict, editable=False)
+    # Weighted title/tags/ingredients/description, kept up to date by signals
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=['search_vector'],
+                name='recipe_search_vector_idx'
+            ),
+            # One index per ?ordering= key, id breaks ties
+            models.Index(
+                fields=['user', 'id'],
+                name='recipe_user_id_idx'
+            ),
+            models.Index(
+                fields=['user', 'price', 'id'],
+                name='recipe_user_price_idx'
+            ),
+            models.Index(
+                fields=['user', 'time_minutes', 'id'],
+                name='recipe_user_time_minutes_idx'
+            ),
+            models.Index(
+                fields=['user', 'title', 'id'],
+                name='recipe_user_title_idx'
+            ),
+            # References to a stored image, before the file is released
+            models.Index(
+                fields=['image'],
+                name='recipe_image_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class ImageUpload(models.Model):
+    """Chunked upload of a recipe image, see recipe.uploads."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    # Total bytes of the image and bytes received so far
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.filename
@@ -0,0 +1,131 @@
+"""
+Renderers for the APIs.
+"""
+
+import re
+import uuid
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional, the stdlib based renderer is used without it
+    orjson = None
+
+
+class Fragment(dict):
+    """A dict whose JSON encoding is computed once per response.
+
+    Fragments compare equal to plain dicts. When the same fragment object
+    appears many times in a response (a tag shared by many recipes) the
+    renderer encodes it once and splices the bytes in everywhere else.
+    """
+
+    __slots__ = ('encoded',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.encoded = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON renderer using orjson when it is installed.
+
+    The output is the same as DRF's JSONRenderer. Indented output (the
+    browsable API), non-default JSON settings or a missing orjson fall
+    back to the stdlib based renderer.
+    """
+
+    def _use_stdlib(self, accepted_media_type, renderer_context):
+        """Whether this response has to go through the stdlib encoder."""
+        return (
+            orjson is None or
+            self.ensure_ascii or
+            not self.compact or
+            self.get_indent(accepted_media_type, renderer_context)
+        )
+
+    def _default(self, obj):
+        """Encode the types orjson does not handle like DRF does."""
+        return encoders.JSONEncoder().default(obj)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render data into JSON, returning a bytestring."""
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if self._use_stdlib(accepted_media_type, renderer_context):
+            return super().render(
+                data,
+                accepted_media_type,
+                renderer_context
+            )
+
+        response = renderer_context.get('response')
+        if getattr(response, 'has_fragments', False):
+            ret = self._render_fragments(data)
+        else:
+            ret = orjson.dumps(
+                data,
+                default=self._default,
+                option=orjson.OPT_NON_STR_KEYS |
+                orjson.OPT_PASSTHROUGH_DATETIME
+            )
+
+        """ Same as the stdlib renderer, escape the unicode line separators
+        which are valid JSON but not valid JavaScript. """
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028'
+        ).replace(
+            b'\xe2\x80\xa9', b'\\u2029'
+        )
+
+    def _render_fragments(self, data):
+        """Encode data with each Fragment object encoded only once."""
+        marker = uuid.uuid4().hex
+        fragments = []
+        indexes = {}
+
+        def default(obj):
+            if isinstance(obj, Fragment):
+                index = indexes.get(id(obj))
+                if index is None:
+                    if obj.encoded is None:
+                        obj.encoded = orjson.dumps(
+                            dict(obj),
+                            default=self._default,
+                            option=orjson.OPT_NON_STR_KEYS |
+                            orjson.OPT_PASSTHROUGH_DATETIME
+                        )
+                    index = indexes[id(obj)] = len(fragments)
+                    fragments.append(obj.encoded)
+                # Encoded as "\u0000<marker>:<index>\u0000" and swapped below
+                return f'\x00{marker}:{index}\x00'
+            # Subclasses are passed through to find fragments, copy them
+            if isinstance(obj, dict):
+                return dict(obj)
+            if isinstance(obj, list):
+                return list(obj)
+            if isinstance(obj, str):
+                return str(obj)
+            if isinstance(obj, int):
+                return int(obj)
+            return self._default(obj)
+
+        ret = orjson.dumps(
+            data,
+            default=default,
+            option=orjson.OPT_NON_STR_KEYS |
+            orjson.OPT_PASSTHROUGH_DATETIME |
+            orjson.OPT_PASSTHROUGH_SUBCLASS
+        )
+        if not fragments:
+            return ret
+
+        pattern = re.compile(
+            rb'"\\u0000' + marker.encode('ascii') + rb':(\d+)\\u0000"'
+        )
+        return pattern.sub(lambda match: fragments[int(match[1])], ret)
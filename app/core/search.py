@@ -0,0 +1,92 @@
+"""
+Full text search over recipes.
+"""
+
+from contextlib import contextmanager
+
+from core.models import Recipe
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchVector
+)
+from django.db.models import (
+    OuterRef,
+    Subquery,
+    Value
+)
+
+
+# Text search configuration used for both the vectors and the queries
+SEARCH_CONFIG = 'english'
+
+# Recipe columns included in the search vector
+SEARCH_FIELDS = {'title', 'description'}
+
+
+def _related_names(relation):
+    """Subquery joining the names linked to the outer recipe."""
+    model_field = Recipe._meta.get_field(relation)
+    through = model_field.remote_field.through
+    source = f'{model_field.m2m_field_name()}_id'
+    target = model_field.m2m_reverse_field_name()
+
+    return Subquery(
+        through.objects.filter(
+            **{source: OuterRef('pk')}
+        ).order_by().values(source).annotate(
+            names=StringAgg(f'{target}__name', ' ')
+        ).values('names')
+    )
+
+
+def search_vector(**values):
+    """Return the expression computing a recipe's search vector.
+
+    Titles weigh the most, then tag and ingredient names, then the
+    description. values replaces the columns by the given text, an UPDATE
+    setting the columns and the vector together would otherwise see the
+    old column values.
+    """
+    title, description = (
+        Value(values[field]) if field in values else field
+        for field in ['title', 'description']
+    )
+
+    return (
+        SearchVector(title, weight='A', config=SEARCH_CONFIG) +
+        SearchVector(
+            _related_names('tags'),
+            _related_names('ingredients'),
+            weight='B',
+            config=SEARCH_CONFIG
+        ) +
+        SearchVector(description, weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(recipe_ids):
+    """Recompute the search vector of the recipes in a single UPDATE."""
+    Recipe.objects.filter(pk__in=recipe_ids).update(
+        search_vector=search_vector()
+    )
+
+
+@contextmanager
+def search_vector_deferred(recipe):
+    """Skip the signal refreshes of recipe's vector, the caller writes it.
+
+    Lets a caller changing columns and links write the vector with the
+    rest of the row once instead of after every save and m2m change.
+    """
+    recipe._search_vector_deferred = True
+    try:
+        yield
+    finally:
+        del recipe._search_vector_deferred
+
+
+def search_query(text):
+    """Parse user input the way web search engines do."""
+    return SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
@@ -0,0 +1,162 @@
+"""
+Signal handlers keeping denormalized recipe data and cached tokens up to
+date.
+"""
+
+from core.authentication import revoke
+from core.counters import (
+    COUNTED_RELATIONS,
+    adjust_recipe_counts
+)
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+    User
+)
+from core.search import (
+    SEARCH_FIELDS,
+    update_search_vectors
+)
+
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete
+)
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, update_fields=None, **kwargs):
+    """Refresh the search vector when the searched columns may change."""
+    if getattr(instance, '_search_vector_deferred', False):
+        return
+    if update_fields is not None and not SEARCH_FIELDS & set(update_fields):
+        return
+
+    update_search_vectors([instance.pk])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_links_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    """Refresh the search vectors of recipes gaining or losing links."""
+    if not reverse:
+        if getattr(instance, '_search_vector_deferred', False):
+            return
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            update_search_vectors([instance.pk])
+        return
+
+    """ Reverse changes (tag.recipe_set.add()) affect the recipes in
+    pk_set, a clear has none so its recipes are looked up before. """
+    if action == 'pre_clear':
+        instance._cleared_recipe_ids = list(
+            instance.recipe_set.values_list('id', flat=True)
+        )
+    elif action == 'post_clear':
+        update_search_vectors(
+            instance.__dict__.pop('_cleared_recipe_ids', [])
+        )
+    elif action in ('post_add', 'post_remove'):
+        update_search_vectors(pk_set)
+
+
+# Recipe relation of each through model
+RELATIONS_BY_THROUGH = {
+    getattr(Recipe, relation).through: relation
+    for relation in COUNTED_RELATIONS
+}
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_link_counts_changed(sender, instance, action, reverse, model,
+                               pk_set, **kwargs):
+    """Keep recipe_count of tags/ingredients gaining or losing recipes.
+
+    add only reports the links it inserted, but remove reports every id
+    it was given, so the links that really exist are read before.
+    """
+    if reverse:
+        # instance is a tag/ingredient, pk_set holds recipes
+        manager = instance.recipe_set
+        counted = type(instance)
+    else:
+        manager = getattr(instance, RELATIONS_BY_THROUGH[sender])
+        counted = model
+
+    if action == 'pre_remove':
+        instance._removed_link_ids = list(
+            manager.filter(pk__in=pk_set).values_list('pk', flat=True)
+        )
+        return
+    if action == 'pre_clear':
+        instance._removed_link_ids = list(
+            manager.values_list('pk', flat=True)
+        )
+        return
+
+    if action == 'post_add':
+        changed, delta = pk_set, 1
+    elif action in ('post_remove', 'post_clear'):
+        changed, delta = instance.__dict__.pop('_removed_link_ids', []), -1
+    else:
+        return
+
+    if reverse:
+        adjust_recipe_counts(counted, {instance.pk: delta * len(changed)})
+    else:
+        adjust_recipe_counts(counted, {pk: delta for pk in changed})
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def recipe_attr_saved(sender, instance, created, update_fields=None,
+                      **kwargs):
+    """Refresh the recipes using a renamed tag or ingredient."""
+    if created or (update_fields is not None and 'name' not in update_fields):
+        return
+
+    update_search_vectors(instance.recipe_set.values('id'))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def recipe_attr_deleting(sender, instance, **kwargs):
+    """Remember the recipes of a tag or ingredient about to be deleted."""
+    instance._deleted_recipe_ids = list(
+        instance.recipe_set.values_list('id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def recipe_attr_deleted(sender, instance, **kwargs):
+    """Drop a deleted tag or ingredient from its recipes' vectors."""
+    recipe_ids = instance.__dict__.pop('_deleted_recipe_ids', None)
+    if recipe_ids:
+        update_search_vectors(recipe_ids)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """Refuse a deleted token in every process at once."""
+    revoke(instance.key)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    """Drop cached copies of a user whose details or status changed."""
+    if created:
+        return
+
+    for key in Token.objects.filter(user=instance).values_list(
+        'key', flat=True
+    ):
+        revoke(key)
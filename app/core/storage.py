@@ -0,0 +1,58 @@
+"""
+Content-addressed storage of recipe images.
+"""
+
+import hashlib
+import os
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+
+# Names written by ContentAddressedStorage, <dir>/<aa>/<sha256><ext>
+HASHED_NAME = re.compile(r'(^|/)([0-9a-f]{2})/\2[0-9a-f]{62}(\.\w+)?$')
+
+
+def file_digest(content):
+    """Return the SHA-256 hex digest of the file content."""
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+
+    return digest.hexdigest()
+
+
+def hashed_name(name, digest):
+    """Return the content-addressed name of the file name with digest."""
+    directory, filename = posixpath.split(name)
+    ext = posixpath.splitext(filename)[1].lower()
+
+    return posixpath.join(directory, digest[:2], f'{digest}{ext}')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Stores each distinct file once, named by the hash of its bytes.
+
+    The directory and extension of the name given are kept and the base
+    name is replaced with the SHA-256 of the content, under a directory of
+    its first two characters. Saving bytes that are already stored writes
+    nothing and returns the existing name, so the same photo used by many
+    recipes is one file, and a name never changes content.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        name = hashed_name(name, file_digest(content))
+        if self.exists(name):
+            # Refreshed so the file is not released while being reused
+            os.utime(self.path(name))
+            return name
+
+        return super().save(name, content, max_length=max_length)
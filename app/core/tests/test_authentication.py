@@ -0,0 +1,78 @@
+"""
+Tests for the cached token authentication.
+"""
+
+from core.authentication import CachedTokenAuthentication
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+
+ME_URL = reverse('user:me')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test tokens are cached and revoked at once."""
+
+    def setUp(self):
+        cache.clear()
+        CachedTokenAuthentication._local.clear()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com',
+            password='testpass123',
+            name='Test User'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_is_cached(self):
+        """Test only the first request looks the token up."""
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        # Another process only has the shared cache
+        CachedTokenAuthentication._local.clear()
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_deleted_token_is_refused(self):
+        """Test a deleted token is refused on the next request."""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_refused(self):
+        """Test a deactivated user is refused on the next request."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_changes_are_seen(self):
+        """Test the cached user is replaced when the user is saved."""
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {'name': 'Updated Name'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.data['name'], 'Updated Name')
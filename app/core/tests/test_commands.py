@@ -5,7 +5,12 @@ Test custom Django management commands
 from django.db.utils import OperationalError
 
 from django.core.management import call_command
-from django.test import SimpleTestCase
+from django.test import (
+    SimpleTestCase,
+    TestCase
+)
+
+from io import StringIO
 
 from psycopg2 import OperationalError as pyscopg2OpError
 from unittest.mock import patch
@@ -40,3 +45,17 @@ class CommandTests(SimpleTestCase):
         self.assertEqual(patched_check.call_count, 6)
         # Checking if check method is called with correct database
         patched_check.assert_called_with(databases=['default'])
+
+
+class BenchmarkAuthCommandTests(TestCase):
+    """Test the authentication benchmark command."""
+
+    def test_benchmark_auth(self):
+        """Test the benchmark reports every authentication class"""
+        out = StringIO()
+
+        call_command('benchmark_auth', requests=10, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('TokenAuthentication', output)
+        self.assertIn('cached (shared only)', output)
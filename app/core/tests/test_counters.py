@@ -0,0 +1,156 @@
+"""
+Tests for the maintained recipe counts of tags and ingredients.
+"""
+
+from core.counters import recount
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient
+)
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from io import StringIO
+
+from recipe.bulk import (
+    bulk_create_recipes,
+    bulk_delete_recipes
+)
+
+from rest_framework.test import APIClient
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 22,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeCountTests(TestCase):
+    """Test recipe_count follows every way links change."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com',
+            password='testpass123'
+        )
+        self.tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ['Indian', 'Dinner']
+        ]
+        self.recipes = [
+            create_recipe(self.user, title=title)
+            for title in ['Dal', 'Rice']
+        ]
+
+    def assertCounts(self, *counts):
+        """Assert the recipe counts of the tags."""
+        self.assertEqual(
+            [
+                Tag.objects.get(pk=tag.pk).recipe_count
+                for tag in self.tags
+            ],
+            list(counts)
+        )
+
+    def test_forward_changes(self):
+        """Test adding, removing, setting and clearing a recipe's tags."""
+        dal, rice = self.recipes
+        indian, dinner = self.tags
+
+        dal.tags.add(indian, dinner)
+        rice.tags.add(indian)
+        rice.tags.add(indian)
+        self.assertCounts(2, 1)
+
+        # Removing a tag the recipe does not have changes nothing
+        rice.tags.remove(indian, dinner)
+        self.assertCounts(1, 1)
+
+        dal.tags.set([dinner])
+        self.assertCounts(0, 1)
+
+        dal.tags.clear()
+        self.assertCounts(0, 0)
+
+    def test_reverse_changes(self):
+        """Test adding, removing and clearing a tag's recipes."""
+        dal, rice = self.recipes
+        indian = self.tags[0]
+
+        indian.recipe_set.add(dal, rice)
+        self.assertCounts(2, 0)
+
+        indian.recipe_set.remove(dal)
+        indian.recipe_set.remove(dal)
+        self.assertCounts(1, 0)
+
+        indian.recipe_set.clear()
+        self.assertCounts(0, 0)
+
+    def test_recipe_deletes(self):
+        """Test deleting recipes through the API and in bulk."""
+        dal, rice = self.recipes
+        for recipe in self.recipes:
+            recipe.tags.add(*self.tags)
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        client.delete(reverse('recipe:recipe-detail', args=[dal.id]))
+        self.assertCounts(1, 1)
+
+        bulk_delete_recipes(Recipe.objects.filter(pk=rice.pk))
+        self.assertCounts(0, 0)
+
+    def test_bulk_create(self):
+        """Test bulk created recipes count towards their tags."""
+        bulk_create_recipes(self.user, [
+            {
+                'title': 'Soup',
+                'time_minutes': 5,
+                'price': Decimal('1.00'),
+                'tags': [{'name': 'Indian'}, {'name': 'Indian'}],
+                'ingredients': [{'name': 'Lentils'}],
+            },
+            {
+                'title': 'Curry',
+                'time_minutes': 5,
+                'price': Decimal('1.00'),
+                'tags': [{'name': 'Indian'}, {'name': 'Spicy'}],
+            },
+        ])
+
+        self.assertCounts(2, 0)
+        self.assertEqual(Tag.objects.get(name='Spicy').recipe_count, 1)
+        self.assertEqual(
+            Ingredient.objects.get(name='Lentils').recipe_count,
+            1
+        )
+
+    def test_recount(self):
+        """Test recount and the repair command fix drifted counts."""
+        self.recipes[0].tags.add(self.tags[0])
+        Tag.objects.update(recipe_count=7)
+
+        self.assertEqual(recount('tags'), 2)
+        self.assertCounts(1, 0)
+        self.assertEqual(recount('tags'), 0)
+
+        Tag.objects.update(recipe_count=7)
+        out = StringIO()
+        call_command('repair_recipe_counts', stdout=out)
+
+        self.assertIn('tags: 2 counts repaired', out.getvalue())
+        self.assertCounts(1, 0)
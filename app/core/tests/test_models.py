@@ -6,11 +6,13 @@ from core import models
 
 from decimal import Decimal
 
+from django.db import (
+    IntegrityError,
+    transaction
+)
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
-from unittest.mock import patch
-
 import os
 
 
@@ -103,20 +105,26 @@ class ModelTest(TestCase):
         # Checking if correct ingredient is created in our DB.
         self.assertEqual(str(ingredient), ingredient.name)
 
-    # Mocking the behavior of UUID
-    @patch('core.models.uuid.uuid4')
-    def test_recipe_file_name_uuid(self, mock_uuid):
-        """Test generating image path."""
+    def test_tag_and_ingredient_names_unique_per_user(self):
+        """Tests a user cannot have two tags/ingredients with one name."""
+        other = create_user(email='other@example.com', password='pass@123')
+
+        for model in [models.Tag, models.Ingredient]:
+            model.objects.create(user=self.user, name='Vegan')
+            # Other users can still use the name
+            model.objects.create(user=other, name='Vegan')
+
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                model.objects.create(user=self.user, name='Vegan')
+
+    def test_recipe_file_name_keeps_extension(self):
+        """Test generating image path, the storage names it by content."""
 
-        """Mocking the behaviour of UUID, instead of returning random characters
-        everytime, we are returning test-uuid"""
-        uuid = 'test-uuid'
-        mock_uuid.return_value = uuid
         # Getting file path which is created for the uploaded image
-        file_path = models.recipe_image_file_path(None, 'example.jpg')
+        file_path = models.recipe_image_file_path(None, 'example.JPG')
 
         # Checking if correct file path is generated
         self.assertEqual(
                         file_path,
-                        os.path.join('uploads', 'recipe', f'{uuid}.jpg')
+                        os.path.join('uploads', 'recipe', 'image.jpg')
                     )
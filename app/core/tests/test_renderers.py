@@ -0,0 +1,94 @@
+"""
+Tests for the JSON renderer.
+"""
+
+from core import renderers
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import skipIf
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+
+def sample_data():
+    """Return a payload with the types our APIs render."""
+    return OrderedDict([
+        ('id', 1),
+        ('title', 'Paneer Tikka\u2028Masala – spicy'),
+        ('price', Decimal('5.25')),
+        ('created', datetime(2024, 9, 1, 10, 30, 15, 123456, timezone.utc)),
+        ('detail', _('Not found.')),
+        ('tags', [OrderedDict([('id', 2), ('name', 'Indian')])]),
+        ('counts', {1: 2}),
+        ('link', None),
+        ('active', True),
+    ])
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Tests the renderer output matches DRF's JSONRenderer."""
+
+    def test_output_matches_stdlib_renderer(self):
+        """Test rendering produces the same bytes as JSONRenderer."""
+        data = [sample_data(), sample_data()]
+
+        self.assertEqual(
+            renderers.FastJSONRenderer().render(data),
+            JSONRenderer().render(data)
+        )
+
+    def test_render_none_is_empty(self):
+        """Test rendering None returns an empty body."""
+        self.assertEqual(renderers.FastJSONRenderer().render(None), b'')
+
+    def test_indented_output_falls_back_to_stdlib(self):
+        """Test indented output (browsable API) uses the stdlib encoder."""
+        context = {'indent': 4}
+
+        self.assertEqual(
+            renderers.FastJSONRenderer().render(
+                sample_data(),
+                renderer_context=context
+            ),
+            JSONRenderer().render(sample_data(), renderer_context=context)
+        )
+
+    @patch('core.renderers.orjson', None)
+    def test_falls_back_without_orjson(self):
+        """Test the renderer still works when orjson is not installed."""
+        self.assertEqual(
+            renderers.FastJSONRenderer().render(sample_data()),
+            JSONRenderer().render(sample_data())
+        )
+
+    @skipIf(renderers.orjson is None, 'orjson is not installed')
+    def test_fragments_are_encoded_once(self):
+        """Test shared fragments are encoded once and spliced in."""
+        tag = renderers.Fragment(id=2, name='Indian – spicy')
+        data = OrderedDict([
+            ('next', None),
+            ('results', [
+                {'id': 1, 'tags': [tag]},
+                {'id': 2, 'tags': [tag, renderers.Fragment(id=3, name='V')]},
+            ]),
+        ])
+        response = Response(data)
+        response.has_fragments = True
+
+        content = renderers.FastJSONRenderer().render(
+            data,
+            renderer_context={'response': response}
+        )
+
+        self.assertEqual(content, JSONRenderer().render(data))
+        self.assertEqual(
+            tag.encoded,
+            '{"id":2,"name":"Indian – spicy"}'.encode('utf-8')
+        )
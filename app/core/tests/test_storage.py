@@ -0,0 +1,113 @@
+"""
+Tests for the content-addressed image storage.
+"""
+
+from core.models import Recipe
+from core.storage import (
+    HASHED_NAME,
+    ContentAddressedStorage
+)
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import (
+    TestCase,
+    override_settings
+)
+
+from recipe.bulk import (
+    REUSE_GRACE,
+    bulk_delete_recipes
+)
+
+import hashlib
+import os
+import tempfile
+import time
+
+
+class ContentAddressedStorageTests(TestCase):
+    """Test images are stored once and released with their last recipe."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        settings = override_settings(MEDIA_ROOT=self.temp_dir.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.storage = ContentAddressedStorage()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com',
+            password='testpass123'
+        )
+
+    def _create_recipe(self, data):
+        """Create and return a recipe with an image of data."""
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Dal',
+            time_minutes=30,
+            price=Decimal('4.50')
+        )
+        recipe.image.save('dal.JPG', ContentFile(data))
+
+        return recipe
+
+    def _age(self, name):
+        """Make the stored file name older than the reuse grace."""
+        path = self.storage.path(name)
+        past = time.time() - REUSE_GRACE - 1
+        os.utime(path, (past, past))
+
+    def test_name_is_content_hash(self):
+        """Test files are named by the SHA-256 of their bytes."""
+        digest = hashlib.sha256(b'image bytes').hexdigest()
+
+        name = self.storage.save('uploads/recipe/x.PNG', ContentFile(
+            b'image bytes'
+        ))
+
+        self.assertEqual(
+            name,
+            f'uploads/recipe/{digest[:2]}/{digest}.png'
+        )
+        self.assertTrue(HASHED_NAME.search(name))
+
+    def test_same_bytes_stored_once(self):
+        """Test recipes with the same image share one file."""
+        first = self._create_recipe(b'same photo')
+        second = self._create_recipe(b'same photo')
+        other = self._create_recipe(b'other photo')
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        directory = os.path.dirname(self.storage.path(first.image.name))
+        self.assertEqual(len(os.listdir(directory)), 1)
+
+    def test_file_released_with_last_reference(self):
+        """Test the shared file is only deleted with its last recipe."""
+        first = self._create_recipe(b'same photo')
+        second = self._create_recipe(b'same photo')
+        name = first.image.name
+        self._age(name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_delete_recipes(Recipe.objects.filter(pk=first.pk))
+        self.assertTrue(self.storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_delete_recipes(Recipe.objects.filter(pk=second.pk))
+        self.assertFalse(self.storage.exists(name))
+
+    def test_recently_reused_file_is_kept(self):
+        """Test a file saved again within the grace is not released."""
+        recipe = self._create_recipe(b'same photo')
+        name = recipe.image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_delete_recipes(Recipe.objects.filter(pk=recipe.pk))
+
+        self.assertTrue(self.storage.exists(name))
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RecipeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipe'
+
+    def ready(self):
+        # Connect the signal handlers
+        import recipe.signals  # noqa: F401
@@ -0,0 +1,239 @@
+"""
+Set based writes of recipes and their tags/ingredients.
+"""
+
+import os
+import time
+
+from collections import Counter
+
+from core.counters import (
+    adjust_recipe_counts,
+    release_links
+)
+from core.models import Recipe
+from core.search import (
+    SEARCH_FIELDS,
+    update_search_vectors
+)
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from recipe.cache import bump_version
+
+
+# Recipe fields holding nested tags/ingredients
+RELATIONS = ['tags', 'ingredients']
+
+# Seconds a stored image saved again is kept after losing its references
+REUSE_GRACE = 60 * 60
+
+
+def resolve_names(model, user_id, names):
+    """Return a {name: id} map of a user's tags/ingredients, adding missing.
+
+    Existing names are read with one SELECT and the missing ones created
+    with one insert that skips names another request created meanwhile,
+    so the second SELECT sees every name exactly once.
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+
+    ids = dict(
+        model.objects.filter(
+            user_id=user_id,
+            name__in=names
+        ).values_list('name', 'id')
+    )
+    missing = [name for name in names if name not in ids]
+    if missing:
+        model.objects.bulk_create(
+            [model(user_id=user_id, name=name) for name in missing],
+            ignore_conflicts=True
+        )
+        ids.update(
+            model.objects.filter(
+                user_id=user_id,
+                name__in=missing
+            ).values_list('name', 'id')
+        )
+
+    return ids
+
+
+def link_names(recipe, relation, items):
+    """Link recipe to the tags/ingredients named in items.
+
+    The related manager adds every id with one through-table insert and
+    still sends m2m_changed for the signal handlers.
+    """
+    manager = getattr(recipe, relation)
+    ids = resolve_names(
+        manager.model,
+        recipe.user_id,
+        [item['name'] for item in items]
+    )
+    if ids:
+        manager.add(*ids.values())
+
+
+def sync_names(recipe, relation, items):
+    """Make the tags/ingredients named in items the only ones of recipe.
+
+    Only the links that differ are deleted or inserted, the rows of the
+    links the recipe keeps are not touched. Returns whether any link was
+    added or removed.
+    """
+    manager = getattr(recipe, relation)
+    ids = set(resolve_names(
+        manager.model,
+        recipe.user_id,
+        [item['name'] for item in items]
+    ).values())
+    current = set(manager.values_list('pk', flat=True))
+
+    if current - ids:
+        manager.remove(*(current - ids))
+    if ids - current:
+        manager.add(*(ids - current))
+
+    return ids != current
+
+
+def bulk_create_recipes(user, items):
+    """Create recipes from validated data with set based statements.
+
+    The recipes are inserted with one statement, then per relation the
+    names are resolved with resolve_names and all links inserted at once.
+    bulk_create sends no signals, so the search vectors are filled in
+    with a single UPDATE and the recipe counts adjusted here. Returns the
+    recipes in the order of items.
+    """
+    items = [dict(data) for data in items]
+    nested = {
+        relation: [data.pop(relation, []) for data in items]
+        for relation in RELATIONS
+    }
+
+    with transaction.atomic():
+        recipes = Recipe.objects.bulk_create(
+            [Recipe(user=user, **data) for data in items]
+        )
+
+        for relation, links in nested.items():
+            model_field = Recipe._meta.get_field(relation)
+            through = model_field.remote_field.through
+            source = f'{model_field.m2m_field_name()}_id'
+            target = f'{model_field.m2m_reverse_field_name()}_id'
+            ids = resolve_names(
+                model_field.related_model,
+                user.pk,
+                [item['name'] for recipe_links in links
+                 for item in recipe_links]
+            )
+            rows = [
+                through(**{source: recipe.pk, target: ids[name]})
+                for recipe, recipe_links in zip(recipes, links)
+                for name in dict.fromkeys(
+                    item['name'] for item in recipe_links
+                )
+            ]
+            through.objects.bulk_create(rows)
+            adjust_recipe_counts(
+                model_field.related_model,
+                Counter(getattr(row, target) for row in rows)
+            )
+
+        update_search_vectors([recipe.pk for recipe in recipes])
+        bump_version(user.pk)
+
+    return recipes
+
+
+def bulk_update_recipes(queryset, data):
+    """Apply data to the recipes in queryset with one UPDATE.
+
+    The recipes are locked while their ids are read, so the ids returned
+    are exactly the recipes updated.
+    """
+    with transaction.atomic():
+        rows = list(
+            queryset.order_by().select_for_update().values_list(
+                'id',
+                'user_id'
+            )
+        )
+        ids = [pk for pk, user_id in rows]
+        Recipe.objects.filter(pk__in=ids).update(**data)
+        # UPDATE sends no signals, search vectors and caches are updated here
+        if SEARCH_FIELDS & set(data):
+            update_search_vectors(ids)
+        for user_id in {user_id for pk, user_id in rows}:
+            bump_version(user_id)
+
+    return ids
+
+
+def release_images(names):
+    """Delete the stored images of names no recipe refers to any more.
+
+    Images are stored once per content and shared by every recipe with the
+    same bytes, so a file is only deleted after the last reference to it.
+    Files saved again within REUSE_GRACE are kept: the recipe reusing one
+    may not be committed yet, they are left to the media sweep.
+    """
+    names = set(names)
+    referenced = set(
+        Recipe.objects.filter(image__in=names).values_list('image', flat=True)
+    )
+
+    for name in names - referenced:
+        try:
+            age = time.time() - os.path.getmtime(default_storage.path(name))
+        except OSError:
+            age = None
+        if age is None or age >= REUSE_GRACE:
+            default_storage.delete(name)
+
+
+def schedule_release(names):
+    """Release the stored images of names once the transaction commits."""
+    names = [name for name in names if name]
+    if names:
+        transaction.on_commit(lambda: release_images(names))
+
+
+def bulk_delete_recipes(queryset):
+    """Delete the recipes in queryset and their links and images.
+
+    The through rows are deleted with one statement per relation before
+    the recipes, so the recipes themselves are deleted with one more
+    instead of being collected and cascaded one by one. The recipe counts
+    of their tags/ingredients are released first. Image files are
+    released once the transaction commits. Returns the deleted ids.
+    """
+    with transaction.atomic():
+        rows = list(
+            queryset.order_by().select_for_update().values_list(
+                'id',
+                'user_id',
+                'image'
+            )
+        )
+        ids = [pk for pk, user_id, image in rows]
+
+        release_links(ids)
+        for relation in RELATIONS:
+            model_field = Recipe._meta.get_field(relation)
+            model_field.remote_field.through.objects.filter(
+                **{f'{model_field.m2m_field_name()}_id__in': ids}
+            ).delete()
+        Recipe.objects.filter(pk__in=ids).delete()
+        for user_id in {user_id for pk, user_id, image in rows}:
+            bump_version(user_id)
+
+        schedule_release([image for pk, user_id, image in rows])
+
+    return ids
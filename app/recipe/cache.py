@@ -0,0 +1,311 @@
+"""
+Versioned cache of recipe, tag and ingredient API responses.
+
+Every user has a version stamp which is part of the key of all their
+cached responses. Any write to their recipes, tags or ingredients replaces
+the stamp, so invalidating everything cached for a user is one cache set
+and stale entries are simply never read again until they expire.
+
+The same stamp is the ETag and Last-Modified validator of the responses,
+so conditional requests are answered without touching the database.
+"""
+
+import hashlib
+import logging
+import time
+
+from collections import Counter
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+from django.core.exceptions import ValidationError
+from django.http import (
+    Http404,
+    HttpResponse
+)
+from django.utils.cache import get_conditional_response
+from django.utils.http import (
+    http_date,
+    quote_etag,
+    urlencode
+)
+
+from rest_framework import (
+    exceptions,
+    status
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Keys of the per-user version stamps and the hit/miss counters
+VERSION_KEY = 'recipe:version:{user_id}'
+STATS_KEY = 'recipe:cache:{name}'
+
+# Largest response body cached, memcached refuses items over 1 MB
+MAX_CACHED_SIZE = 512 * 1024
+
+
+def _new_version():
+    """Return a version stamp unlike any handed out before.
+
+    A nanosecond timestamp stays unique even if the cache evicted the
+    previous stamp, where a counter would restart and repeat old keys.
+    """
+    return time.time_ns()
+
+
+def get_version(user_id):
+    """Return the current version stamp of a user's data.
+
+    If the cache fails a new stamp is returned, which matches no cached
+    response or validator, so the request is served as a miss.
+    """
+    key = VERSION_KEY.format(user_id=user_id)
+    try:
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, _new_version(), None)
+            version = cache.get(key)
+    except Exception:
+        logger.warning('Reading the cache version failed', exc_info=True)
+        version = None
+
+    return version or _new_version()
+
+
+def _set_version(user_id):
+    """Replace the version stamp of a user."""
+    cache.set(VERSION_KEY.format(user_id=user_id), _new_version(), None)
+
+
+def bump_version(user_id):
+    """Invalidate every cached response of a user.
+
+    The stamp is replaced straight away and again once the transaction
+    commits, so a response built from the old rows while the write was
+    in flight cannot be cached under the new stamp.
+    """
+    _set_version(user_id)
+    transaction.on_commit(partial(_set_version, user_id))
+
+
+# Hit/miss counts of this process not yet added to the shared counters.
+# They are added at most every STATS_FLUSH_INTERVAL seconds, so serving a
+# response costs no cache round trips for the statistics.
+STATS_FLUSH_INTERVAL = 10
+_pending = Counter()
+_flushed_at = 0.0
+
+
+def _count(name):
+    """Count a hit/miss, adding the counts up to the cache now and then."""
+    _pending[name] += 1
+    if time.monotonic() - _flushed_at >= STATS_FLUSH_INTERVAL:
+        flush_stats()
+
+
+def flush_stats():
+    """Add the hit/miss counts of this process to the shared counters."""
+    global _pending, _flushed_at
+
+    pending, _pending = _pending, Counter()
+    _flushed_at = time.monotonic()
+    for name, count in pending.items():
+        try:
+            _incr(STATS_KEY.format(name=name), count)
+        except Exception:
+            logger.warning('Adding the cache %s failed', name, exc_info=True)
+
+
+def _incr(key, count):
+    """Add count to the counter key, creating it if missing."""
+    try:
+        cache.incr(key, count)
+    except ValueError:
+        # The counter is missing (first use or evicted)
+        if not cache.add(key, count, None):
+            cache.incr(key, count)
+
+
+def get_stats():
+    """Return the hit and miss counts of the response cache."""
+    flush_stats()
+    return {
+        name: cache.get(STATS_KEY.format(name=name), 0)
+        for name in ['hits', 'misses']
+    }
+
+
+class PreconditionFailed(exceptions.APIException):
+    """The If-Match or If-Unmodified-Since precondition of a write failed."""
+
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The data was changed since it was last read.'
+    default_code = 'precondition_failed'
+
+
+def _store(key, timeout, response):
+    """Post render callback caching the rendered response.
+
+    Large bodies are not cached and a failing cache only loses the entry,
+    the response is sent either way.
+    """
+    if len(response.content) > MAX_CACHED_SIZE:
+        return
+
+    try:
+        cache.set(key, (response.content, response['Content-Type']), timeout)
+    except Exception:
+        logger.warning('Caching the response failed', exc_info=True)
+
+
+class CachedResponseMixin:
+    """Cache rendered JSON responses of read actions per user version.
+
+    Read actions also answer If-None-Match/If-Modified-Since and writes
+    check If-Match/If-Unmodified-Since against the same version.
+    """
+
+    # Seconds a cached response is kept for at most
+    cache_timeout = 300
+    # Methods whose preconditions are checked before the handler runs
+    precondition_methods = ['PUT', 'PATCH', 'DELETE']
+
+    def get_cache_key(self, request, version):
+        """Return the key of the response to request.
+
+        Query parameters are sorted so the same query sent in another
+        order shares the entry.
+        """
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        digest = hashlib.sha1('|'.join([
+            request.path,
+            query,
+            request.accepted_media_type,
+        ]).encode('utf-8')).hexdigest()
+
+        return 'recipe:response:{user_id}:{version}:{digest}'.format(
+            user_id=request.user.pk,
+            version=version,
+            digest=digest
+        )
+
+    def get_validators(self, request, version):
+        """Return the ETag and Last-Modified time of a version.
+
+        The ETag names the renderer too, as the JSON and browsable API
+        representations of a URL differ. A stamp less than a second old
+        has no Last-Modified, as a write later in that second would have
+        the same one.
+        """
+        etag = quote_etag(
+            '{version:x}-{format}'.format(
+                version=version,
+                format=request.accepted_renderer.format
+            )
+        )
+        modified = version // 10 ** 9
+        if modified >= int(time.time()):
+            return etag, None
+
+        return etag, modified
+
+    def initial(self, request, *args, **kwargs):
+        """Reject writes whose preconditions fail before they run."""
+        super().initial(request, *args, **kwargs)
+        if request.method in self.precondition_methods:
+            etag, last_modified = self.get_validators(
+                request, get_version(request.user.pk)
+            )
+            if get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            ) is not None:
+                raise PreconditionFailed()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Send the ETag of the new version with successful writes."""
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if (request.method in self.precondition_methods and
+                status.is_success(response.status_code) and
+                response.status_code != status.HTTP_204_NO_CONTENT):
+            response['ETag'], _ = self.get_validators(
+                request, get_version(request.user.pk)
+            )
+
+        return response
+
+    def cached(self, handler, request, *args, **kwargs):
+        """Return the response to request, cached or conditional.
+
+        A request whose validators match is answered with 304 Not Modified
+        before handler runs or the cache is looked up. The version covers
+        all of the user's data, so on detail routes the object is first
+        checked to exist for the user.
+        """
+        version = get_version(request.user.pk)
+        etag, last_modified = self.get_validators(request, version)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None and getattr(self, 'detail', False):
+            self.check_object_exists()
+        if response is None:
+            response = self._cached(version, handler, request, *args,
+                                    **kwargs)
+
+        if response.status_code in [200, 304]:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+
+        return response
+
+    def check_object_exists(self):
+        """Raise 404 unless the object of a detail route is the user's.
+
+        Like get_object, without loading the object and its relations.
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            exists = queryset.filter(**{
+                self.lookup_field: self.kwargs[lookup_url_kwarg]
+            }).exists()
+        except (TypeError, ValueError, ValidationError):
+            exists = False
+
+        if not exists:
+            raise Http404
+
+    def _cached(self, version, handler, request, *args, **kwargs):
+        """Return the cached response to request or cache handler's."""
+        # The browsable API renders per request forms, only JSON is cached
+        if request.accepted_renderer.format != 'json':
+            return handler(request, *args, **kwargs)
+
+        key = self.get_cache_key(request, version)
+        try:
+            hit = cache.get(key)
+        except Exception:
+            logger.warning('Reading the cached response failed', exc_info=True)
+            hit = None
+        if hit is not None:
+            _count('hits')
+            content, content_type = hit
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _count('misses')
+        response = handler(request, *args, **kwargs)
+        response['X-Cache'] = 'MISS'
+        if response.status_code == 200 and not response.streaming:
+            response.add_post_render_callback(
+                partial(_store, key, self.cache_timeout)
+            )
+
+        return response
@@ -0,0 +1,178 @@
+"""
+Streaming exports of recipes.
+"""
+
+import csv
+import zipfile
+
+from functools import partial
+
+from core.renderers import FastJSONRenderer
+
+from django.core.files.storage import default_storage
+
+from recipe.compiled import compile_serializer
+
+
+class ExportRenderer(FastJSONRenderer):
+    """Base renderer used to negotiate the export format.
+
+    Exports are streamed by the view itself, these renderers only let
+    clients pick a format with ?format= or the Accept header. Error
+    payloads are still rendered as JSON.
+    """
+
+    extension = None
+
+
+class NDJSONExportRenderer(ExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    extension = 'ndjson'
+
+
+class CSVExportRenderer(ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    extension = 'csv'
+
+
+class ZipExportRenderer(ExportRenderer):
+    media_type = 'application/zip'
+    format = 'zip'
+    extension = 'zip'
+
+
+class _StreamBuffer:
+    """Write-only file object holding writes until they are drained."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        """Return and forget everything written so far."""
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class RecipeExporter:
+    """Stream a recipe queryset chunk by chunk.
+
+    Rows are read through a server-side cursor and the tags/ingredients
+    of each chunk are loaded with one query per relation, so memory use
+    depends on the chunk size rather than the number of recipes.
+    """
+
+    # Size of the blocks image files are copied into the archive with
+    block_size = 64 * 1024
+
+    def __init__(self, queryset, serializer, chunk_size=500):
+        self.queryset = queryset
+        self.serializer = serializer
+        self.compiled = compile_serializer(serializer)
+        self.chunk_size = chunk_size
+        self.renderer = FastJSONRenderer()
+
+    def chunks(self):
+        """Yield lists of rendered recipes, chunk_size at a time."""
+        rows = self.compiled.values(self.queryset).iterator(
+            chunk_size=self.chunk_size
+        )
+
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                yield self.compiled.to_representation(self.serializer, chunk)
+                chunk = []
+
+        if chunk:
+            yield self.compiled.to_representation(self.serializer, chunk)
+
+    def ndjson(self):
+        """Yield the recipes as newline delimited JSON."""
+        for chunk in self.chunks():
+            yield b''.join(
+                self.renderer.render(item) + b'\n' for item in chunk
+            )
+
+    def _csv_value(self, value):
+        """Flatten a rendered value into a CSV cell."""
+        if value is None:
+            return ''
+        if isinstance(value, list):
+            # Nested tags/ingredients are exported as a list of names
+            return '|'.join(item['name'] for item in value)
+        if isinstance(value, dict):
+            # Image rendition URLs are kept as JSON
+            return self.renderer.render(value).decode()
+
+        return value
+
+    def csv(self):
+        """Yield the recipes as CSV with one row per recipe."""
+        buffer = _StreamBuffer()
+        writer = csv.writer(buffer)
+        names = [step[0] for step in self.compiled.steps]
+
+        writer.writerow(names)
+        for chunk in self.chunks():
+            for item in chunk:
+                writer.writerow(
+                    [self._csv_value(item[name]) for name in names]
+                )
+            yield buffer.drain()
+
+    def _image_names(self):
+        """Yield each image file referenced by the exported recipes."""
+        return self.queryset.prefetch_related(None).exclude(
+            image=''
+        ).exclude(
+            image__isnull=True
+        ).order_by().values_list(
+            'image',
+            flat=True
+        ).distinct().iterator(chunk_size=self.chunk_size)
+
+    def zip(self):
+        """Yield a zip archive of the NDJSON export and the images."""
+        buffer = _StreamBuffer()
+        # zipfile writes data descriptors as the buffer cannot seek
+        archive = zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED)
+        with archive:
+            with archive.open('recipes.ndjson', 'w', force_zip64=True) as f:
+                for lines in self.ndjson():
+                    f.write(lines)
+                    yield buffer.drain()
+
+            for name in self._image_names():
+                try:
+                    source = default_storage.open(name, 'rb')
+                except OSError:
+                    # Files missing from storage are left out of the archive
+                    continue
+
+                # Images are already compressed, so store them as they are
+                info = zipfile.ZipInfo(f'images/{name}')
+                info.compress_type = zipfile.ZIP_STORED
+                with source, archive.open(info, 'w', force_zip64=True) as f:
+                    for block in iter(partial(source.read, self.block_size),
+                                      b''):
+                        f.write(block)
+                        yield buffer.drain()
+
+        yield buffer.drain()
+
+    def stream(self, export_format):
+        """Return the generator producing export_format."""
+        return getattr(self, export_format)()
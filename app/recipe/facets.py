@@ -0,0 +1,123 @@
+"""
+Facet counts of filtered recipes.
+"""
+
+from decimal import Decimal
+
+from core.counters import COUNTED_RELATIONS
+from core.models import Recipe
+
+from django.db.models import (
+    Count,
+    Q
+)
+
+
+# Inclusive (min, max) buckets, usable as the _min/_max range filters
+BUCKETS = {
+    'time_minutes': [(0, 15), (16, 30), (31, 60), (61, None)],
+    'price': [
+        (Decimal('0.00'), Decimal('4.99')),
+        (Decimal('5.00'), Decimal('9.99')),
+        (Decimal('10.00'), Decimal('19.99')),
+        (Decimal('20.00'), None),
+    ],
+}
+
+
+def _bucket_filter(field, low, high):
+    """Return the condition of recipes falling in a bucket."""
+    condition = Q(**{f'{field}__gte': low})
+    if high is not None:
+        condition &= Q(**{f'{field}__lte': high})
+
+    return condition
+
+
+def _bound(value):
+    """Render a bucket bound the way the serializers render the field."""
+    return str(value) if isinstance(value, Decimal) else value
+
+
+def _related_counts(relation, recipe_ids, limit):
+    """Return the most used tags/ingredients of the recipes in recipe_ids.
+
+    One grouped query over the through table, ties are broken by id like
+    the unfiltered counts read from the counters.
+    """
+    model_field = Recipe._meta.get_field(relation)
+    through = model_field.remote_field.through
+    source = f'{model_field.m2m_field_name()}_id'
+    target = model_field.m2m_reverse_field_name()
+
+    rows = through.objects.filter(
+        **{f'{source}__in': recipe_ids}
+    ).values_list(
+        f'{target}_id', f'{target}__name'
+    ).annotate(
+        count=Count(source)
+    ).order_by('-count', f'-{target}_id')[:limit]
+
+    return [
+        {'id': pk, 'name': name, 'count': count}
+        for pk, name, count in rows
+    ]
+
+
+def _maintained_counts(relation, user, limit):
+    """Return the most used tags/ingredients of all of user's recipes.
+
+    Without a filter the maintained recipe_count columns already hold
+    the counts, read from the (user, recipe_count, id) index.
+    """
+    model = Recipe._meta.get_field(relation).related_model
+    rows = model.objects.filter(
+        user=user,
+        recipe_count__gt=0
+    ).order_by(
+        '-recipe_count', '-id'
+    ).values_list('id', 'name', 'recipe_count')[:limit]
+
+    return [
+        {'id': pk, 'name': name, 'count': count}
+        for pk, name, count in rows
+    ]
+
+
+def facet_counts(user, recipes, limit, filtered=True):
+    """Count recipes per tag, ingredient and time/price bucket.
+
+    The total and every bucket come from one aggregate with a filtered
+    Count per bucket, the tags and ingredients from one grouped query
+    each, so the number of queries does not depend on the data. When
+    recipes is not filtered the tag/ingredient counts are read from the
+    maintained counters instead.
+    """
+    recipe_ids = recipes.order_by().values('pk')
+
+    aggregates = {'count': Count('pk')}
+    for field, buckets in BUCKETS.items():
+        for index, (low, high) in enumerate(buckets):
+            aggregates[f'{field}_{index}'] = Count(
+                'pk',
+                filter=_bucket_filter(field, low, high)
+            )
+    totals = Recipe.objects.filter(pk__in=recipe_ids).aggregate(**aggregates)
+
+    facets = {'count': totals['count']}
+    for relation in COUNTED_RELATIONS:
+        if filtered:
+            facets[relation] = _related_counts(relation, recipe_ids, limit)
+        else:
+            facets[relation] = _maintained_counts(relation, user, limit)
+    for field, buckets in BUCKETS.items():
+        facets[field] = [
+            {
+                'min': _bound(low),
+                'max': _bound(high),
+                'count': totals[f'{field}_{index}'],
+            }
+            for index, (low, high) in enumerate(buckets)
+        ]
+
+    return facets
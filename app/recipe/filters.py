@@ -0,0 +1,182 @@
+"""
+Filters for the recipe APIs.
+"""
+
+from core.models import Recipe
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import (
+    BooleanField,
+    CharField,
+    Count,
+    Exists,
+    ExpressionWrapper,
+    Lookup,
+    OuterRef,
+    Q
+)
+
+from recipe.serializers import _split_param
+
+from rest_framework import serializers
+
+
+# Matching modes for tag/ingredient filters
+ANY = 'any'
+ALL = 'all'
+NONE = 'none'
+MODES = [ANY, ALL, NONE]
+
+
+def params_to_ints(value, param):
+    """Convert a comma separated query parameter to a list of ints."""
+    try:
+        return [int(str_id) for str_id in value.split(',')]
+    except ValueError:
+        raise serializers.ValidationError(
+            {param: 'Expected a comma separated list of IDs.'}
+        )
+
+
+def filter_related(queryset, relation, ids, mode=ANY):
+    """Filter recipes by the ids linked through a many to many relation.
+
+    any and none compile to a correlated (NOT) EXISTS on the through table
+    and all to a grouped subquery, so the recipe rows are never joined to
+    their links and no DISTINCT is needed.
+    """
+    model_field = Recipe._meta.get_field(relation)
+    through = model_field.remote_field.through
+    source = f'{model_field.m2m_field_name()}_id'
+    target = f'{model_field.m2m_reverse_field_name()}_id'
+    links = through.objects.filter(**{f'{target}__in': ids})
+
+    if mode == ALL:
+        # Recipes with one link per requested id (links are unique)
+        matching = links.values(source).annotate(
+            matched=Count(target)
+        ).filter(
+            matched=len(set(ids))
+        ).values(source)
+        return queryset.filter(pk__in=matching)
+
+    linked = Exists(links.filter(**{source: OuterRef('pk')}))
+    if mode == NONE:
+        return queryset.filter(~linked)
+
+    return queryset.filter(linked)
+
+
+class RecipeRangeFilterSerializer(serializers.Serializer):
+    """Validates the time and price range filters of recipes."""
+
+    time_minutes_min = serializers.IntegerField(min_value=0, required=False)
+    time_minutes_max = serializers.IntegerField(min_value=0, required=False)
+    price_min = serializers.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        min_value=0,
+        required=False
+    )
+    price_max = serializers.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        min_value=0,
+        required=False
+    )
+
+    def validate(self, attrs):
+        for field in ['time_minutes', 'price']:
+            low = attrs.get(f'{field}_min')
+            high = attrs.get(f'{field}_max')
+            if low is not None and high is not None and low > high:
+                raise serializers.ValidationError(
+                    {f'{field}_min': f'Must not exceed {field}_max.'}
+                )
+
+        return attrs
+
+
+def parse_ordering(value, allowed):
+    """Convert ?ordering= into order_by() keys ending in an id tiebreaker.
+
+    The tiebreaker follows the direction of the first key so the ordering
+    matches a (user, key, id) index scanned forwards or backwards.
+    """
+    keys = _split_param(value)
+    names = [key[1:] if key.startswith('-') else key for key in keys]
+    unknown = sorted(set(names) - set(allowed))
+    if unknown or not keys or len(set(names)) != len(names):
+        raise serializers.ValidationError({
+            'ordering': f'Expected distinct keys from: {", ".join(allowed)}.'
+        })
+
+    if 'id' not in names:
+        keys.append('-id' if keys[0].startswith('-') else 'id')
+
+    return tuple(keys)
+
+
+def filter_recipes(queryset, query_params):
+    """Apply the filters in query_params to recipes.
+
+    tags/ingredients match recipes with any of the ids, the _all and
+    _none variants match recipes with all or none of them. The _min and
+    _max filters bound time_minutes and price (inclusive).
+    """
+    ranges = RecipeRangeFilterSerializer(data=query_params)
+    ranges.is_valid(raise_exception=True)
+    for param, value in ranges.validated_data.items():
+        field, bound = param.rsplit('_', 1)
+        lookup = 'gte' if bound == 'min' else 'lte'
+        queryset = queryset.filter(**{f'{field}__{lookup}': value})
+
+    for relation in ['tags', 'ingredients']:
+        for mode in MODES:
+            param = relation if mode == ANY else f'{relation}_{mode}'
+            value = query_params.get(param)
+            if value:
+                queryset = filter_related(
+                    queryset,
+                    relation,
+                    params_to_ints(value, param),
+                    mode
+                )
+
+    return queryset
+
+
+@CharField.register_lookup
+class IPrefix(Lookup):
+    """Case insensitive prefix match the trigram index can serve.
+
+    istartswith compares UPPER(name), which an index on name cannot be
+    used for, this compiles to name ILIKE 'prefix%' instead.
+    """
+
+    lookup_name = 'iprefix'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        rhs_params = [
+            f'{connection.ops.prep_for_like_query(param)}%'
+            for param in rhs_params
+        ]
+        return f'{lhs} ILIKE {rhs}', lhs_params + rhs_params
+
+
+def autocomplete(queryset, text, limit):
+    """Return the top limit names starting with or similar to text.
+
+    Prefix matches come first, then the closest by trigram similarity.
+    Both conditions are served by the (user, name) trigram index.
+    """
+    prefix = Q(name__iprefix=text)
+
+    return queryset.filter(
+        prefix | Q(name__trigram_similar=text)
+    ).annotate(
+        is_prefix=ExpressionWrapper(prefix, output_field=BooleanField()),
+        similarity=TrigramSimilarity('name', text)
+    ).order_by('-is_prefix', '-similarity', 'name', 'id')[:limit]
@@ -0,0 +1,202 @@
+"""
+Streaming imports of recipes from CSV or NDJSON files.
+"""
+
+import csv
+import io
+import json
+import logging
+
+from recipe.bulk import bulk_create_recipes
+
+
+logger = logging.getLogger(__name__)
+
+# File formats imports can be read from
+FORMATS = ['csv', 'ndjson']
+
+# File extensions mapped to the format they hold
+EXTENSIONS = {
+    'csv': 'csv',
+    'ndjson': 'ndjson',
+    'jsonl': 'ndjson',
+}
+
+# CSV columns holding names of nested tags/ingredients, as exported
+CSV_NESTED_COLUMNS = ['tags', 'ingredients']
+
+# CSV columns that are exported but not imported
+CSV_IGNORED_COLUMNS = ['id', 'image', 'image_renditions']
+
+
+def guess_format(name):
+    """Return the format of a file name from its extension or None."""
+    extension = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+    return EXTENSIONS.get(extension)
+
+
+def read_ndjson(file):
+    """Yield (line number, data, error) for each line of a binary file."""
+    for number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield number, None, 'Invalid JSON.'
+            continue
+
+        if isinstance(data, dict):
+            yield number, data, None
+        else:
+            yield number, None, 'Expected a JSON object.'
+
+
+def read_csv(file):
+    """Yield (line number, data, error) for each row of a binary CSV file.
+
+    The columns are those of the CSV export, nested tags/ingredients are
+    a | separated list of names. Rows that are not UTF-8 are errors.
+    """
+    # Bytes that are not UTF-8 are decoded to lone surrogates, which are
+    # found per row rather than failing the whole file
+    text = io.TextIOWrapper(
+        file,
+        encoding='utf-8-sig',
+        errors='surrogateescape',
+        newline=''
+    )
+    reader = csv.DictReader(text)
+    for row in reader:
+        if not _is_utf8(row):
+            yield reader.line_num, None, 'Invalid UTF-8.'
+            continue
+
+        data = {}
+        for column, value in row.items():
+            # Short rows leave missing columns as None
+            if column is None or column in CSV_IGNORED_COLUMNS or \
+                    value is None:
+                continue
+            if column in CSV_NESTED_COLUMNS:
+                value = [
+                    {'name': name}
+                    for name in (value or '').split('|') if name
+                ]
+            data[column] = value
+
+        yield reader.line_num, data, None
+
+
+def _is_utf8(row):
+    """Return whether the columns and values of a CSV row were UTF-8."""
+    for column, value in row.items():
+        for text in [column, value]:
+            if isinstance(text, list):
+                text = ''.join(text)
+            try:
+                (text or '').encode('utf-8')
+            except UnicodeEncodeError:
+                return False
+
+    return True
+
+
+READERS = {
+    'csv': read_csv,
+    'ndjson': read_ndjson,
+}
+
+
+class RecipeImporter:
+    """Validate and import recipes chunk by chunk.
+
+    Valid recipes are buffered until chunk_size of them can be committed
+    with the set based bulk create, so memory use depends on the chunk
+    size rather than on the size of the file. Every row that cannot be
+    imported is counted, the first max_errors are kept with their line
+    number. If reading the file or committing a chunk fails the import
+    stops, the chunks committed before are kept.
+    """
+
+    def __init__(self, user, serializer_class, context=None,
+                 chunk_size=500, max_errors=100):
+        self.user = user
+        self.serializer_class = serializer_class
+        self.context = context or {}
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.rows = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def _validate(self, data):
+        """Return the validated data of one recipe and its errors."""
+        serializer = self.serializer_class(data=data, context=self.context)
+        if serializer.is_valid():
+            return serializer.validated_data, None
+
+        return None, serializer.errors
+
+    def _commit(self, chunk):
+        """Create the recipes of a chunk in one transaction."""
+        bulk_create_recipes(self.user, chunk)
+        self.created += len(chunk)
+
+    def progress(self, done=False, error=None):
+        """Return the counts so far, with the errors once done or stopped."""
+        progress = {
+            'event': 'error' if error else 'done' if done else 'progress',
+            'rows': self.rows,
+            'created': self.created,
+            'failed': self.failed,
+        }
+        if error:
+            progress['detail'] = error
+        if done or error:
+            progress['errors'] = self.errors
+
+        return progress
+
+    def run(self, rows):
+        """Import (line number, data, error) rows.
+
+        Yields the progress after each committed chunk and a final
+        summary, or an error event if the import stopped. Nothing is read
+        ahead of the chunk being built.
+        """
+        try:
+            yield from self._run(rows)
+        except Exception:
+            # The response has started, the failure can only be reported
+            logger.exception('Importing recipes failed')
+            yield self.progress(
+                error='The import stopped, only the recipes created so far '
+                      'were saved.'
+            )
+
+    def _run(self, rows):
+        """Import rows, see run."""
+        chunk = []
+        for number, data, error in rows:
+            self.rows += 1
+            if error is None:
+                data, error = self._validate(data)
+
+            if error is not None:
+                self.failed += 1
+                if len(self.errors) < self.max_errors:
+                    self.errors.append({'line': number, 'errors': error})
+                continue
+
+            chunk.append(data)
+            if len(chunk) >= self.chunk_size:
+                self._commit(chunk)
+                chunk = []
+                yield self.progress()
+
+        if chunk:
+            self._commit(chunk)
+        yield self.progress(done=True)
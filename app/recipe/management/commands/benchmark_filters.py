@@ -0,0 +1,101 @@
+"""
+Django command comparing JOIN + DISTINCT and EXISTS recipe filters.
+"""
+import re
+
+from django.core.management.base import BaseCommand
+from django.db import (
+    connection,
+    transaction
+)
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient
+)
+
+from recipe.filters import (
+    filter_related,
+    ALL,
+    ANY,
+    NONE
+)
+from recipe.seed import seed_recipes
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the tag/ingredient filters"""
+
+    help = 'Compare query plans of the recipe filters on seeded data.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000)
+        parser.add_argument(
+            '--plans',
+            action='store_true',
+            help='Print the full EXPLAIN ANALYZE output.'
+        )
+
+    def _explain(self, label, queryset, show_plan):
+        """Run EXPLAIN ANALYZE for queryset and report its run time."""
+        plan = queryset.explain(analyze=True)
+        match = re.search(r'Execution Time: ([\d.]+) ms', plan)
+        self.stdout.write(
+            '{label:<40} {ms:>10} ms'.format(
+                label=label,
+                ms=match[1] if match else '?'
+            )
+        )
+        if show_plan:
+            self.stdout.write(plan + '\n')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        show_plan = options['plans']
+
+        # Everything is rolled back so the benchmark leaves no data behind
+        with transaction.atomic():
+            user = seed_recipes(options['rows'], tags=30, ingredients=200)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'ANALYZE core_recipe, core_recipe_tags, '
+                    'core_recipe_ingredients'
+                )
+
+            recipes = Recipe.objects.filter(user=user).order_by('-id')
+            tags = list(
+                Tag.objects.filter(user=user).values_list('id', flat=True)
+            )[:3]
+            ingredients = list(
+                Ingredient.objects.filter(
+                    user=user
+                ).values_list('id', flat=True)
+            )[:5]
+
+            self._explain(
+                'any (JOIN + DISTINCT)',
+                recipes.filter(
+                    tags__id__in=tags
+                ).filter(
+                    ingredients__id__in=ingredients
+                ).distinct()[:50],
+                show_plan
+            )
+            self._explain(
+                'any (EXISTS)',
+                filter_related(
+                    filter_related(recipes, 'tags', tags, ANY),
+                    'ingredients', ingredients, ANY
+                )[:50],
+                show_plan
+            )
+            self._explain(
+                'all tags + no ingredients',
+                filter_related(
+                    filter_related(recipes, 'tags', tags[:2], ALL),
+                    'ingredients', ingredients, NONE
+                )[:50],
+                show_plan
+            )
+            transaction.set_rollback(True)
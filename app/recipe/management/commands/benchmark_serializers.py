@@ -0,0 +1,86 @@
+"""
+Django command comparing the serializer and compiled list read paths.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient
+)
+
+from recipe.compiled import compile_serializer
+from recipe.seed import seed_recipes
+from recipe.serializers import RecipeSerializer
+
+
+class Command(BaseCommand):
+    """Django command to benchmark recipe list serialization"""
+
+    help = 'Time RecipeSerializer against the compiled read path.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def _time(self, repeat, func):
+        """Return the best wall time of repeat calls to func."""
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        return best, result
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        rows = options['rows']
+        repeat = options['repeat']
+
+        # Everything is rolled back so the benchmark leaves no data behind
+        with transaction.atomic():
+            user = seed_recipes(rows)
+            queryset = Recipe.objects.filter(user=user).order_by('-id')
+
+            def serializer_path():
+                return RecipeSerializer(
+                    queryset.prefetch_related(
+                        Prefetch('tags', Tag.objects.order_by('id')),
+                        Prefetch(
+                            'ingredients',
+                            Ingredient.objects.order_by('id')
+                        )
+                    ),
+                    many=True
+                ).data
+
+            def compiled_path():
+                serializer = RecipeSerializer()
+                compiled = compile_serializer(serializer)
+                return compiled.to_representation(
+                    serializer,
+                    compiled.values(queryset)
+                )
+
+            slow, expected = self._time(repeat, serializer_path)
+            fast, data = self._time(repeat, compiled_path)
+            transaction.set_rollback(True)
+
+        if data != expected:
+            self.stdout.write(self.style.ERROR('Outputs differ...'))
+            return
+
+        self.stdout.write(
+            'serializer: {slow:.1f}us/row, compiled: {fast:.1f}us/row, '
+            'speedup: {speedup:.1f}x'.format(
+                slow=slow / rows * 1e6,
+                fast=fast / rows * 1e6,
+                speedup=slow / fast,
+            )
+        )
@@ -0,0 +1,29 @@
+"""
+Django command reporting the hit ratio of the response cache.
+"""
+from django.core.management.base import BaseCommand
+
+from recipe.cache import (
+    STATS_FLUSH_INTERVAL,
+    get_stats
+)
+
+
+class Command(BaseCommand):
+    """Django command to show the response cache hits and misses"""
+
+    help = (
+        'Show the hits and misses of the response cache. App processes '
+        f'add their counts every {STATS_FLUSH_INTERVAL} seconds.'
+    )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        stats = get_stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total if total else 0
+
+        self.stdout.write(
+            f'{stats["hits"]} hits, {stats["misses"]} misses, '
+            f'{ratio:.0%} hit ratio'
+        )
@@ -0,0 +1,121 @@
+"""
+Django command finding and deleting recipe files no recipe refers to.
+"""
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipe.media import (
+    SCAN_COUNTS,
+    collect_references,
+    find_orphans,
+    get_executor,
+    verify_images
+)
+
+
+def _megabytes(size):
+    """Format a number of bytes as megabytes."""
+    return f'{size / 1024 / 1024:.1f} MB'
+
+
+class Command(BaseCommand):
+    """Django command to clean up and verify the media files"""
+
+    help = (
+        'Report, or delete with --delete, the recipe images and renditions '
+        'no recipe refers to, and optionally verify the referenced images.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--delete',
+            action='store_true',
+            help='Delete the orphans instead of only listing them.'
+        )
+        parser.add_argument(
+            '--grace-hours',
+            type=int,
+            default=24,
+            help='Keep orphans modified less than this long ago.'
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Check every referenced image exists and can be decoded.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Worker processes scanning and verifying files.'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        media_root = str(settings.MEDIA_ROOT)
+        # Files modified after this may be referenced by uncommitted rows
+        cutoff = time.time() - options['grace_hours'] * 60 * 60
+
+        start = time.perf_counter()
+        references = collect_references()
+        self.stdout.write(
+            f'{len(references)} references read in '
+            f'{time.perf_counter() - start:.2f}s'
+        )
+
+        with get_executor(options['workers'], references) as executor:
+            self._clean(executor, media_root, cutoff, options)
+            if options['verify']:
+                self._verify(executor, media_root)
+
+    def _clean(self, executor, media_root, cutoff, options):
+        """Scan the media directories and report the orphans."""
+        totals = dict.fromkeys(SCAN_COUNTS, 0)
+        list_orphans = not options['delete'] or options['verbosity'] > 1
+
+        start = time.perf_counter()
+        for counts, orphans in find_orphans(
+            executor,
+            media_root,
+            cutoff,
+            delete=options['delete']
+        ):
+            for key, value in counts.items():
+                totals[key] += value
+            if list_orphans:
+                for name in orphans:
+                    self.stdout.write(f'{name}: orphan')
+        elapsed = time.perf_counter() - start or 1e-9
+
+        self.stdout.write(
+            f'{totals["files"]} files ({_megabytes(totals["bytes"])}) '
+            f'scanned in {elapsed:.2f}s, '
+            f'{totals["files"] / elapsed:.0f} files/s, '
+            f'{_megabytes(totals["bytes"] / elapsed)}/s'
+        )
+        action = 'deleted' if options['delete'] else 'found'
+        self.stdout.write(
+            f'{totals["orphans"]} orphans '
+            f'({_megabytes(totals["orphan_bytes"])}) {action}, '
+            f'{totals["recent"]} within the grace period kept'
+        )
+
+    def _verify(self, executor, media_root):
+        """Decode the referenced images and report the failures."""
+        checked = failed = 0
+
+        start = time.perf_counter()
+        for name, error in verify_images(executor, media_root):
+            checked += 1
+            if error:
+                failed += 1
+                self.stderr.write(f'{name}: {error}')
+        elapsed = time.perf_counter() - start or 1e-9
+
+        self.stdout.write(
+            f'{checked} images verified in {elapsed:.2f}s, '
+            f'{checked / elapsed:.0f} images/s, {failed} failed'
+        )
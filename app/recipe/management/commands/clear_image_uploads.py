@@ -0,0 +1,80 @@
+"""
+Django command deleting abandoned chunked image uploads.
+"""
+import os
+import uuid
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import ImageUpload
+
+from recipe.uploads import discard_upload
+
+
+class Command(BaseCommand):
+    """Django command to delete stale image uploads and their files"""
+
+    help = 'Delete chunked image uploads not resumed for a while.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=24,
+            help='Delete uploads last written to more than this long ago.'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        stale = ImageUpload.objects.filter(
+            updated__lt=timezone.now() - timedelta(hours=options['hours'])
+        )
+
+        deleted = 0
+        for upload in stale.iterator():
+            discard_upload(upload)
+            deleted += 1
+
+        self.stdout.write(f'{deleted} uploads deleted')
+        self.stdout.write(f'{self.delete_orphaned_parts()} part files deleted')
+
+    def delete_orphaned_parts(self):
+        """Delete the files of uploads whose row is gone.
+
+        Deleting a recipe cascades to its uploads without removing their
+        files, which are found here by their name.
+        """
+        try:
+            names = os.listdir(settings.CHUNKED_UPLOAD_ROOT)
+        except FileNotFoundError:
+            return 0
+
+        parts = {}
+        for name in names:
+            stem, extension = os.path.splitext(name)
+            if extension != '.part':
+                continue
+            try:
+                parts[uuid.UUID(stem)] = name
+            except ValueError:
+                continue
+
+        existing = set(ImageUpload.objects.filter(
+            pk__in=list(parts)
+        ).values_list('pk', flat=True))
+
+        deleted = 0
+        for pk, name in parts.items():
+            if pk in existing:
+                continue
+            try:
+                os.remove(os.path.join(settings.CHUNKED_UPLOAD_ROOT, name))
+            except FileNotFoundError:
+                continue
+            deleted += 1
+
+        return deleted
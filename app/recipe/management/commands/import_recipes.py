@@ -0,0 +1,66 @@
+"""
+Django command importing recipes from a CSV or NDJSON file.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import (
+    BaseCommand,
+    CommandError
+)
+
+from recipe.importers import (
+    FORMATS,
+    READERS,
+    RecipeImporter,
+    guess_format
+)
+from recipe.serializers import RecipeDetailSerializer
+
+
+class Command(BaseCommand):
+    """Django command to import recipes for a user"""
+
+    help = 'Import recipes from a CSV or NDJSON file in chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--email',
+            required=True,
+            help='Email of the user the recipes are imported for.'
+        )
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--max-errors', type=int, default=100)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}.')
+
+        file_format = options['format'] or guess_format(options['path'])
+        if file_format is None:
+            raise CommandError('Cannot tell the format, pass --format.')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+
+        importer = RecipeImporter(
+            user,
+            RecipeDetailSerializer,
+            chunk_size=options['chunk_size'],
+            max_errors=options['max_errors']
+        )
+        with open(options['path'], 'rb') as file:
+            for progress in importer.run(READERS[file_format](file)):
+                self.stdout.write(
+                    '{rows} rows, {created} created, {failed} failed'.format(
+                        **progress
+                    )
+                )
+
+        for error in importer.errors:
+            self.stdout.write(self.style.ERROR(
+                f'line {error["line"]}: {error["errors"]}'
+            ))
+        self.stdout.write(self.style.SUCCESS('Import finished.'))
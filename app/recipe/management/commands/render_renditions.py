@@ -0,0 +1,38 @@
+"""
+Django command rendering the renditions of stored recipe images.
+"""
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe
+
+from recipe.renditions import render_all
+
+
+class Command(BaseCommand):
+    """Django command to backfill image renditions"""
+
+    help = 'Render the renditions of recipe images that have none.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Render every image again, not only those without any.'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        recipes = Recipe.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            recipes = recipes.filter(image_renditions={})
+
+        rows = recipes.values_list('id', 'user_id', 'image').iterator()
+        saved = failed = 0
+        for name, ok in render_all(rows):
+            if ok:
+                saved += 1
+            else:
+                failed += 1
+                self.stderr.write(f'{name}: not rendered')
+
+        self.stdout.write(f'{saved} images rendered, {failed} failed')
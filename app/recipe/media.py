@@ -0,0 +1,202 @@
+"""
+Maintenance of the recipe files under MEDIA_ROOT.
+
+The names recipes refer to are streamed from the database into a set of
+64-bit hashes, then the media directories are scanned by a pool of worker
+processes which report, or delete, the files no recipe refers to.
+"""
+
+import hashlib
+import multiprocessing
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from core.models import Recipe
+
+from PIL import Image
+
+
+# Directories under MEDIA_ROOT holding recipe images and their renditions
+MEDIA_DIRS = ['uploads/recipe', 'renditions/recipe']
+
+# Counts returned for each scanned directory
+SCAN_COUNTS = ['files', 'bytes', 'recent', 'orphans', 'orphan_bytes']
+
+# Rows read per query while streaming the references
+CHUNK_SIZE = 2000
+
+# Names sent to the workers at once while verifying images
+VERIFY_BATCH_SIZE = 500
+
+# Hashes of the referenced names, set in each worker by _init_worker
+_references = frozenset()
+
+
+def name_key(name):
+    """Return the 64-bit hash of a stored file name.
+
+    A collision only keeps an orphan, it never deletes a referenced file.
+    """
+    digest = hashlib.blake2b(name.encode(), digest_size=8).digest()
+
+    return int.from_bytes(digest, 'big')
+
+
+def referenced_names():
+    """Yield every image and rendition name recipes refer to."""
+    rows = Recipe.objects.order_by().values_list(
+        'image',
+        'image_renditions'
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+    for image, renditions in rows:
+        if image:
+            yield image
+        for names in renditions.values():
+            yield from names.values()
+
+
+def collect_references():
+    """Return the set of hashes of the referenced names."""
+    return frozenset(name_key(name) for name in referenced_names())
+
+
+def _init_worker(references):
+    """Keep the referenced hashes in the worker process."""
+    global _references
+    _references = references
+
+
+def get_executor(workers, references=frozenset()):
+    """Return a process pool sharing the referenced hashes.
+
+    Workers are forked, so the set is shared with them rather than copied
+    to each. They only touch files, never the database.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('fork'),
+        initializer=_init_worker,
+        initargs=(references,)
+    )
+
+
+def scan_tasks(media_root):
+    """Yield the (path, recursive) directories to scan under media_root.
+
+    Each subdirectory of a media directory is a task of its own, the loose
+    files of the media directory one more.
+    """
+    for directory in MEDIA_DIRS:
+        root = os.path.join(media_root, directory)
+        if not os.path.isdir(root):
+            continue
+
+        yield root, False
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield entry.path, True
+
+
+def scan_directory(task):
+    """Find the orphans of one directory (runs in a worker process).
+
+    task is (media_root, path, recursive, cutoff, delete). Files no recipe
+    refers to which were last modified before cutoff are orphans, and are
+    deleted if delete is set. Returns the counts and the orphan names.
+    """
+    media_root, path, recursive, cutoff, delete = task
+    counts = dict.fromkeys(SCAN_COUNTS, 0)
+    orphans = []
+
+    directories = [path]
+    while directories:
+        with os.scandir(directories.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        directories.append(entry.path)
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+
+                stat = entry.stat(follow_symlinks=False)
+                counts['files'] += 1
+                counts['bytes'] += stat.st_size
+                name = os.path.relpath(entry.path, media_root).replace(
+                    os.sep,
+                    '/'
+                )
+                if name_key(name) in _references:
+                    continue
+                # Saved or reused after the references were read
+                if stat.st_mtime >= cutoff:
+                    counts['recent'] += 1
+                    continue
+
+                counts['orphans'] += 1
+                counts['orphan_bytes'] += stat.st_size
+                orphans.append(name)
+                if delete:
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass
+
+    return counts, orphans
+
+
+def find_orphans(executor, media_root, cutoff, delete=False):
+    """Scan the media directories in executor's workers.
+
+    Yields the (counts, orphans) of each directory as it is scanned.
+    """
+    tasks = [
+        (media_root, path, recursive, cutoff, delete)
+        for path, recursive in scan_tasks(media_root)
+    ]
+
+    yield from executor.map(scan_directory, tasks, chunksize=16)
+
+
+def verify_image(task):
+    """Decode one stored image (runs in a worker process).
+
+    Returns the name and why it failed, or None if it decoded.
+    """
+    media_root, name = task
+    try:
+        with Image.open(os.path.join(media_root, name)) as image:
+            image.load()
+    except FileNotFoundError:
+        return name, 'missing'
+    except Exception as error:
+        return name, f'cannot be decoded ({error})'
+
+    return name, None
+
+
+def verify_images(executor, media_root):
+    """Decode every referenced image in executor's workers.
+
+    The names are streamed from the database and sent in batches, yields
+    (name, error) for each image, error being None if it decoded.
+    """
+    names = Recipe.objects.exclude(image='').exclude(
+        image__isnull=True
+    ).order_by().values_list(
+        'image',
+        flat=True
+    ).distinct().iterator(chunk_size=CHUNK_SIZE)
+
+    while True:
+        batch = [
+            (media_root, name)
+            for name in islice(names, VERIFY_BATCH_SIZE)
+        ]
+        if not batch:
+            break
+        yield from executor.map(verify_image, batch, chunksize=16)
@@ -0,0 +1,220 @@
+"""
+Pagination for the recipe APIs.
+"""
+
+import base64
+import binascii
+import json
+
+from collections import OrderedDict
+
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _invert(key):
+    """Flip the direction of an order_by key."""
+    return key[1:] if key.startswith('-') else f'-{key}'
+
+
+class KeysetPagination(BasePagination):
+    """Opt-in cursor pagination seeking on every ordering column.
+
+    Pages are fetched with a WHERE clause on the last seen ordering values
+    instead of an OFFSET, so deep pages cost the same as the first one.
+    """
+
+    cursor_query_param = 'cursor'
+    cursor_query_description = 'The pagination cursor value.'
+    page_size_query_param = 'page_size'
+    page_size_query_description = 'Number of results to return per page.'
+    # Responses are only paginated when the client asks for a page size
+    page_size = None
+    max_page_size = 100
+    # Used when the view does not define its own ordering
+    ordering = ('-id',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = tuple(self.get_ordering(view))
+        self.cursor = self.decode_cursor(request)
+
+        reverse = self.cursor is not None and self.cursor['reverse']
+        ordering = self.ordering
+        if reverse:
+            # Walking backwards, fetch the rows before the cursor in reverse
+            ordering = tuple(_invert(key) for key in ordering)
+
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                self._seek(ordering, self.cursor['position'])
+            )
+
+        # Fetching one extra row tells us whether there is a further page
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        return self.page
+
+    def get_page_size(self, request):
+        """Return the requested page size capped at max_page_size."""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, view):
+        """Return the ordering for the view (must end in a unique key)."""
+        get_ordering = getattr(view, 'get_ordering', None)
+        if get_ordering is not None:
+            return get_ordering()
+
+        return getattr(view, 'ordering', None) or self.ordering
+
+    def _seek(self, ordering, position):
+        """Build the filter for rows strictly after position in ordering."""
+        condition = Q()
+        equal = {}
+        for key, value in zip(ordering, position):
+            field = key.lstrip('-')
+            lookup = 'lt' if key.startswith('-') else 'gt'
+            # (a, b) > (x, y) expands to a > x OR (a = x AND b > y)
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+
+        """ PostgreSQL only filters rows with the OR, it cannot start the
+        index scan from it. The redundant a >= x bound on the leading key
+        is an index condition, so the scan starts at the cursor. """
+        key, value = ordering[0], position[0]
+        lookup = 'lte' if key.startswith('-') else 'gte'
+
+        return Q(**{f'{key.lstrip("-")}__{lookup}': value}) & condition
+
+    def _get_position(self, item):
+        """Return the ordering values of a model instance or values() row."""
+        position = []
+        for key in self.ordering:
+            field = key.lstrip('-')
+            if isinstance(item, dict):
+                position.append(item[field])
+            else:
+                position.append(getattr(item, field))
+
+        return position
+
+    def decode_cursor(self, request):
+        """Return the cursor sent by the client or None."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            cursor = json.loads(
+                base64.urlsafe_b64decode(encoded.encode('ascii'))
+            )
+            position = cursor['p']
+            reverse = bool(cursor['r'])
+            ordering = tuple(cursor['o'])
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        """ A cursor is only meaningful for the ordering it was created
+        with, so reject it if the client changed the ordering. """
+        if ordering != self.ordering or not isinstance(position, list) \
+                or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        return {'position': position, 'reverse': reverse}
+
+    def encode_cursor(self, position, reverse):
+        """Return the link to the page starting after position."""
+        data = json.dumps(
+            {'p': position, 'r': int(reverse), 'o': self.ordering},
+            # Decimal and datetime values are round tripped as strings
+            default=str,
+            separators=(',', ':'),
+        )
+        encoded = base64.urlsafe_b64encode(data.encode('utf-8'))
+
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            encoded.decode('ascii'),
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+
+        return self.encode_cursor(
+            self._get_position(self.page[-1]),
+            reverse=False
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+
+        return self.encode_cursor(
+            self._get_position(self.page[0]),
+            reverse=True
+        )
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': self.cursor_query_description,
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': self.page_size_query_description,
+                'schema': {'type': 'integer'},
+            },
+        ]
@@ -0,0 +1,269 @@
+"""
+Resized renditions of uploaded recipe images.
+
+Uploads only store the original. Once the upload is committed the
+renditions are rendered by a pool of worker processes, so the request
+never waits for Pillow, and the names of the files written are saved on
+the recipe when the job completes.
+"""
+
+import io
+import logging
+import math
+import multiprocessing
+import os
+import posixpath
+import sys
+
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    as_completed
+)
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+import django
+
+from core.models import Recipe
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import (
+    connection,
+    transaction
+)
+
+from PIL import (
+    Image,
+    ImageOps
+)
+
+from recipe.cache import bump_version
+
+
+logger = logging.getLogger(__name__)
+
+# Longest side in pixels of each rendition, smaller images are not enlarged
+SIZES = {
+    'thumb': 160,
+    'card': 640,
+    'full': 1600,
+}
+
+# Pillow format and save options of each rendition file type
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Worker processes rendering images for each app process
+MAX_WORKERS = 2
+
+# Interpreter the workers are spawned with. Under uWSGI sys.executable is
+# the uwsgi binary, which cannot run the spawned workers' bootstrap.
+PYTHON = os.environ.get(
+    'RENDITION_PYTHON',
+    os.path.join(sys.exec_prefix, 'bin', 'python')
+)
+
+_executor = None
+
+
+def rendition_name(name, size, extension):
+    """Return the storage name of one rendition of the image name."""
+    stem = posixpath.splitext(posixpath.basename(name))[0]
+
+    return posixpath.join('renditions', 'recipe', stem, f'{size}.{extension}')
+
+
+def _open(name):
+    """Load the stored image name, decoding no more than is needed."""
+    with default_storage.open(name) as file:
+        image = Image.open(file)
+        """ JPEGs are decoded at 1/2, 1/4 or 1/8 of their size when that
+        is still at least as large as the biggest rendition. """
+        ratio = max(SIZES.values()) / max(image.size)
+        if ratio < 1:
+            image.draft('RGB', (
+                math.ceil(image.size[0] * ratio),
+                math.ceil(image.size[1] * ratio)
+            ))
+        image.load()
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert(
+            'RGBA' if 'transparency' in image.info or 'A' in image.mode
+            else 'RGB'
+        )
+
+    return image
+
+
+def render_renditions(name):
+    """Write every rendition of the stored image name.
+
+    Runs in a worker process and only touches the storage. Returns the
+    names written as {size: {extension: name}}.
+    """
+    image = _open(name)
+
+    renditions = {}
+    for size, longest in SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((longest, longest), Image.LANCZOS)
+        renditions[size] = {}
+        for extension, (image_format, options) in FORMATS.items():
+            output = resized
+            if image_format == 'JPEG' and output.mode != 'RGB':
+                output = output.convert('RGB')
+            buffer = io.BytesIO()
+            output.save(buffer, image_format, **options)
+
+            target = rendition_name(name, size, extension)
+            default_storage.delete(target)
+            renditions[size][extension] = default_storage.save(
+                target,
+                ContentFile(buffer.getvalue())
+            )
+
+    return renditions
+
+
+def _rendition_files(renditions):
+    """Return the file names of renditions."""
+    return [
+        name
+        for names in renditions.values()
+        for name in names.values()
+    ]
+
+
+def save_renditions(recipe_id, user_id, name, renditions):
+    """Store renditions on the recipe if its image is still name.
+
+    The UPDATE is conditional on the image, so renditions of an image
+    replaced (or a recipe deleted) while rendering are discarded, and their
+    files removed unless another recipe has the same image. Returns whether
+    the recipe was updated.
+    """
+    updated = Recipe.objects.filter(
+        pk=recipe_id,
+        image=name
+    ).update(image_renditions=renditions)
+
+    if updated:
+        # UPDATE sends no signals, the cached responses are dropped here
+        bump_version(user_id)
+    elif not Recipe.objects.filter(image=name).exists():
+        # Images are shared by content, other recipes may use the files
+        for file_name in _rendition_files(renditions):
+            default_storage.delete(file_name)
+
+    return bool(updated)
+
+
+def _get_executor():
+    """Return the process pool, started on first use.
+
+    Workers are spawned rather than forked, so they inherit no database
+    connections or threads from the app process.
+    """
+    global _executor
+    if _executor is None:
+        context = multiprocessing.get_context('spawn')
+        context.set_executable(PYTHON)
+        _executor = ProcessPoolExecutor(
+            max_workers=MAX_WORKERS,
+            mp_context=context,
+            initializer=django.setup
+        )
+
+    return _executor
+
+
+def _reset_executor():
+    """Drop the process pool, a new one is started on next use."""
+    global _executor
+    executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+def _done(recipe_id, user_id, name, future):
+    """Save the result of a rendering job (runs in the pool's thread)."""
+    try:
+        renditions = future.result()
+    except Exception:
+        logger.exception('Rendering the renditions of %s failed', name)
+        return
+
+    try:
+        save_renditions(recipe_id, user_id, name, renditions)
+    finally:
+        # The pool's thread is not a request, its connection is not reused
+        connection.close()
+
+
+def _submit(recipe_id, user_id, name):
+    """Queue the rendering of the image name.
+
+    Runs once the upload is committed, so failures are logged and never
+    raised into the response. A pool broken by a dead worker is replaced
+    and the job queued again, otherwise the recipe keeps serving its
+    original image until the render_renditions command is run.
+    """
+    for _ in range(2):
+        try:
+            future = _get_executor().submit(render_renditions, name)
+        except BrokenProcessPool:
+            logger.warning('The rendition pool is broken, restarting it')
+            _reset_executor()
+            continue
+        except Exception:
+            logger.exception('Queueing the renditions of %s failed', name)
+            _reset_executor()
+            return
+
+        future.add_done_callback(partial(_done, recipe_id, user_id, name))
+        return
+
+    logger.error('The renditions of %s were not queued', name)
+
+
+def schedule_renditions(recipe):
+    """Render the renditions of recipe's image in the background.
+
+    The job is queued once the transaction commits, so the workers read
+    the image the database refers to.
+    """
+    transaction.on_commit(partial(
+        _submit,
+        recipe.pk,
+        recipe.user_id,
+        recipe.image.name
+    ))
+
+
+def render_all(rows):
+    """Render and save renditions of (recipe id, user id, image) rows.
+
+    The rows are rendered in the pool, yields each image name and whether
+    its renditions were saved as the jobs complete.
+    """
+    executor = _get_executor()
+    jobs = {
+        executor.submit(render_renditions, name): (recipe_id, user_id, name)
+        for recipe_id, user_id, name in rows
+    }
+
+    for future in as_completed(jobs):
+        recipe_id, user_id, name = jobs[future]
+        try:
+            renditions = future.result()
+        except Exception:
+            logger.exception('Rendering the renditions of %s failed', name)
+            yield name, False
+            continue
+
+        yield name, save_renditions(recipe_id, user_id, name, renditions)
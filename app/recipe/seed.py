@@ -0,0 +1,61 @@
+"""
+Seed data for benchmarks and query plan tests.
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+
+from core.counters import recount
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient
+)
+
+
+def seed_recipes(rows, tags=20, ingredients=50, tags_per_recipe=3,
+                 ingredients_per_recipe=8, email='benchmark@example.com'):
+    """Create a user owning rows recipes linked to tags and ingredients."""
+    user = get_user_model().objects.create_user(email=email, password=None)
+    tag_objs = Tag.objects.bulk_create(
+        [Tag(user=user, name=f'Tag {i}') for i in range(tags)]
+    )
+    ingredient_objs = Ingredient.objects.bulk_create(
+        [Ingredient(user=user, name=f'Item {i}') for i in range(ingredients)]
+    )
+    recipes = Recipe.objects.bulk_create([
+        Recipe(
+            user=user,
+            title=f'Recipe {i}',
+            time_minutes=i % 120,
+            price=Decimal(i % 10000) / 100,
+            link='http://example.com/recipe.pdf',
+        )
+        for i in range(rows)
+    ])
+
+    """ Each recipe gets a sliding window of tags/ingredients so every
+    tag and ingredient is used by a different subset of recipes. """
+    Recipe.tags.through.objects.bulk_create([
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+        for i, recipe in enumerate(recipes)
+        for tag in tag_objs[i % (tags - tags_per_recipe + 1):][
+            :tags_per_recipe
+        ]
+    ], batch_size=5000)
+    Recipe.ingredients.through.objects.bulk_create([
+        Recipe.ingredients.through(
+            recipe_id=recipe.id,
+            ingredient_id=ingredient.id
+        )
+        for i, recipe in enumerate(recipes)
+        for ingredient in ingredient_objs[
+            i % (ingredients - ingredients_per_recipe + 1):
+        ][:ingredients_per_recipe]
+    ], batch_size=5000)
+    # The links were inserted without signals, count them in one go
+    recount('tags', Tag.objects.filter(user=user))
+    recount('ingredients', Ingredient.objects.filter(user=user))
+
+    return user
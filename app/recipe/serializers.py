@@ -3,15 +3,102 @@ Serializers for recipe APIs
 """
 
 from core.models import (
+    ImageUpload,
     Recipe,
     Tag,
     Ingredient
 )
+from core.search import (
+    SEARCH_FIELDS,
+    search_vector,
+    search_vector_deferred
+)
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from recipe.bulk import (
+    link_names,
+    schedule_release,
+    sync_names
+)
+from recipe.renditions import schedule_renditions
+from recipe.uploads import MAX_UPLOAD_SIZE
 
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _split_param(value):
+    """Split a comma separated query parameter into names."""
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def get_sparse_fields(query_params, available):
+    """Return the names in available selected by ?fields= and ?omit=."""
+    selected = list(available)
+
+    for param in ['fields', 'omit']:
+        value = query_params.get(param)
+        if not value:
+            continue
+
+        names = _split_param(value)
+        unknown = sorted(set(names) - set(available))
+        if unknown:
+            raise serializers.ValidationError(
+                {param: f'Unknown fields: {", ".join(unknown)}'}
+            )
+
+        if param == 'fields':
+            selected = [name for name in selected if name in names]
+        else:
+            selected = [name for name in selected if name not in names]
+
+    return selected
+
+
+class SparseFieldsMixin:
+    """Trim the output of read requests with ?fields= and ?omit=."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get('request')
+        # Write requests always return the full representation
+        if request is None or request.method not in SAFE_METHODS:
+            return
+
+        selected = get_sparse_fields(request.query_params, self.fields)
+        for name in list(self.fields):
+            if name not in selected:
+                self.fields.pop(name)
+
+
+class UniqueNameMixin:
+    """Reject renaming a tag/ingredient to a name the user already uses.
+
+    Nested tags/ingredients of recipes are resolved by name instead, so
+    only updates of an existing instance are checked.
+    """
+
+    def validate_name(self, value):
+        if self.instance is None:
+            return value
+
+        taken = type(self.instance).objects.filter(
+            user_id=self.instance.user_id,
+            name=value
+        ).exclude(pk=self.instance.pk)
+        if taken.exists():
+            raise serializers.ValidationError(
+                f'You already have one named {value!r}.'
+            )
 
+        return value
 
-class TagSerializer(serializers.ModelSerializer):
+
+class TagSerializer(UniqueNameMixin, serializers.ModelSerializer):
     """Serializer for tags."""
 
     class Meta:
@@ -20,7 +107,7 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(UniqueNameMixin, serializers.ModelSerializer):
     """Serializer for Ingredients."""
 
     class Meta:
@@ -29,17 +116,40 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RenditionsField(serializers.JSONField):
+    """URLs of the resized copies of a recipe image, {} until rendered."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        urls = {}
+        for size, names in value.items():
+            urls[size] = {}
+            for extension, name in names.items():
+                url = default_storage.url(name)
+                # Absolute like the URLs of ImageField
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                urls[size][extension] = url
+
+        return urls
+
+
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for recipes."""
 
     # many = true means it will contain list of items/tags
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
+    image_renditions = RenditionsField()
 
     class Meta:
         model = Recipe
         fields = ['id', 'title', 'time_minutes', 'price', 'link',
-                  'tags', 'ingredients']
+                  'tags', 'ingredients', 'image_renditions']
         read_only_fields = ['id']
 
     """ Using _ at the beginning of function name just to differentiate between
@@ -48,33 +158,16 @@ class RecipeSerializer(serializers.ModelSerializer):
     def _get_or_create_tags(self, tags, recipe):
         """Handle getting or creating tags as needed."""
 
-        # Context of the request is passed by the serializer to the view
-        auth_user = self.context['request'].user
-        for tag in tags:
-            """ Get or create gets the value/Retrieves tags if it already exists
-            or it creates new value """
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag
-            )
-            recipe.tags.add(tag_obj)
+        """ All the names are resolved with one SELECT, the missing ones
+        created with one insert and linked with one more. """
+        link_names(recipe, 'tags', tags)
 
     """ Using _ at the beginning of function name just to differentiate between
     inbuild funtion and our created funtion / This is a internal method which
     should not be called with the help of serializer. """
     def _get_or_create_ingredients(self, ingredients, recipe):
         """Handle getting or creating ingredients as needed."""
-
-        # Context of the request is passed by the serializer to the view
-        auth_user = self.context['request'].user
-        for ingredient in ingredients:
-            """ Get or create gets the value/Retrieves tags if it already exists
-            or it creates new value """
-            ingredient_obj, created = Ingredient.objects.get_or_create(
-                user=auth_user,
-                **ingredient
-            )
-            recipe.ingredients.add(ingredient_obj)
+        link_names(recipe, 'ingredients', ingredients)
 
     """Overiding the default create model as we need to save tags as well but
     by default when we use nested seriailizer/objects they are read only."""
@@ -87,15 +180,14 @@ class RecipeSerializer(serializers.ModelSerializer):
         tags = validated_data.pop('tags', [])
         ingredients = validated_data.pop('ingredients', [])
 
-        # Creating a recipe
-        # Mehtod - 1
-        """ recipe = Recipe.objects.create(**validated_data)
-                                #need to pass unpacked dict """
-        # Method 2
-        # passing dictionary as a argument/not as individual arguments.
-        recipe = super().create(validated_data)
-        self._get_or_create_tags(tags, recipe)
-        self._get_or_create_ingredients(ingredients, recipe)
+        # The recipe and its links are written together or not at all
+        with transaction.atomic():
+            # passing dictionary as a argument/not as individual arguments.
+            recipe = super().create(validated_data)
+            self._get_or_create_tags(tags, recipe)
+            self._get_or_create_ingredients(ingredients, recipe)
+            if recipe.image:
+                schedule_renditions(recipe)
 
         return recipe
 
@@ -104,21 +196,47 @@ class RecipeSerializer(serializers.ModelSerializer):
 
         tags = validated_data.pop('tags', None)
         ingredients = validated_data.pop('ingredients', None)
-        super().update(instance, validated_data)
 
-        if tags is not None:
-            """ Clearing all previous tags when we update tags and create
-            new ones """
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+        """ Only the columns whose value changed are written, with a single
+        UPDATE, and the row is not written at all if nothing changed. """
+        changed = [
+            attr for attr, value in validated_data.items()
+            if getattr(instance, attr) != value
+        ]
+        if 'image' in changed:
+            # The old image's renditions are dropped until the new ones exist
+            validated_data['image_renditions'] = {}
+            changed.append('image_renditions')
+
+        with transaction.atomic(), search_vector_deferred(instance):
+            if 'image' in changed:
+                schedule_release([instance.image.name])
+
+            # Only the added and removed links are written, before the row
+            # so the search vector below sees them
+            links_changed = False
+            if tags is not None:
+                links_changed |= sync_names(instance, 'tags', tags)
+            if ingredients is not None:
+                links_changed |= sync_names(instance, 'ingredients',
+                                            ingredients)
+
+            for attr in changed:
+                setattr(instance, attr, validated_data[attr])
+            if links_changed or SEARCH_FIELDS & set(changed):
+                # Written with the changed columns, not by the signals
+                instance.search_vector = search_vector(**{
+                    field: getattr(instance, field) for field in SEARCH_FIELDS
+                })
+                changed.append('search_vector')
+            if changed:
+                instance.save(update_fields=changed)
+                # The expression was written, the value loads on access
+                instance.__dict__.pop('search_vector', None)
 
-        if ingredients is not None:
-            """ Clearing all previous ingredients when we update ingredients
-            and create new ones """
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
+            if 'image' in changed and instance.image:
+                schedule_renditions(instance)
 
-        instance.save()
         return instance
 
 
@@ -132,8 +250,41 @@ class RecipeDetailSerializer(RecipeSerializer):
 class RecipeImageSerializer(serializers.ModelSerializer):
     """Serializer for uploading images to recipes."""
 
+    image_renditions = RenditionsField()
+
     class Meta:
         model = Recipe
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'image_renditions']
         read_only_fields = ['id']
         extra_kwargs = {'image': {'required': 'True'}}
+
+    def update(self, instance, validated_data):
+        """Store the image and render its renditions in the background."""
+        with transaction.atomic():
+            validated_data['image_renditions'] = {}
+            schedule_release([instance.image.name])
+            instance = super().update(instance, validated_data)
+            schedule_renditions(instance)
+
+        return instance
+
+
+class ImageUploadSerializer(serializers.ModelSerializer):
+    """Serializer for chunked uploads of recipe images."""
+
+    class Meta:
+        model = ImageUpload
+        fields = ['id', 'recipe', 'filename', 'size', 'offset']
+        read_only_fields = ['id', 'offset']
+        extra_kwargs = {
+            'size': {'min_value': 1, 'max_value': MAX_UPLOAD_SIZE},
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Images can only be uploaded to the user's own recipes
+        request = self.context.get('request')
+        if request is not None:
+            self.fields['recipe'].queryset = Recipe.objects.filter(
+                user=request.user
+            )
@@ -0,0 +1,39 @@
+"""
+Signal handlers invalidating cached recipe API responses.
+"""
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient
+)
+
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save
+)
+from django.dispatch import receiver
+
+from recipe.cache import bump_version
+
+
+# Recipes get no delete handler, it would make Django load and delete
+# them one by one instead of with a single statement. Recipe deletes bump
+# the version in the view and the bulk delete instead.
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def owner_data_changed(sender, instance, **kwargs):
+    """Invalidate the cached responses of the owner of instance."""
+    bump_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_links_changed(sender, instance, action, **kwargs):
+    """Invalidate cached responses when recipes gain or lose links."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_version(instance.user_id)
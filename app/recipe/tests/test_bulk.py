@@ -0,0 +1,325 @@
+"""
+Tests for the bulk recipe APIs.
+"""
+
+
+from core.models import (
+    Recipe,
+    Tag
+)
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipe.views import RecipeViewSet
+
+from unittest.mock import patch
+
+
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def create_user(**params):
+    """Create and return user"""
+    return get_user_model().objects.create(**params)
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 22,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def recipe_payload(i, **params):
+    """Return the payload of a sample recipe."""
+    payload = {
+        'title': f'Recipe {i}',
+        'time_minutes': 10 + i,
+        'price': '5.25',
+        'tags': [{'name': 'Dinner'}, {'name': f'Tag {i}'}],
+        'ingredients': [{'name': 'Salt'}],
+    }
+    payload.update(params)
+
+    return payload
+
+
+class BulkCreateTests(TestCase):
+    """Tests for creating recipes in bulk."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='testuser@gmail.com',
+            password='testpass123',
+            name='sample_test_user'
+        )
+        # Force Authenticating the user
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create(self):
+        """Test creating recipes with shared and new tags/ingredients."""
+        Tag.objects.create(user=self.user, name='Dinner')
+        payload = [recipe_payload(i) for i in range(3)]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        ids = [result['id'] for result in res.data['results']]
+        recipes = Recipe.objects.filter(user=self.user).order_by('id')
+        self.assertEqual(list(recipes.values_list('id', flat=True)), ids)
+        self.assertEqual(recipes[2].title, 'Recipe 2')
+        self.assertEqual(recipes[2].price, Decimal('5.25'))
+        self.assertCountEqual(
+            recipes[2].tags.values_list('name', flat=True),
+            ['Dinner', 'Tag 2']
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(
+            Recipe.ingredients.through.objects.filter(
+                recipe__user=self.user
+            ).count(),
+            3
+        )
+
+    def test_bulk_created_recipes_are_searchable(self):
+        """Test the search vectors of bulk created recipes are filled."""
+        res = self.client.post(
+            BULK_URL,
+            [recipe_payload(0, title='Paneer Tikka')],
+            format='json'
+        )
+
+        search = self.client.get(
+            reverse('recipe:recipe-list'),
+            {'search': 'paneer salt'}
+        )
+        self.assertEqual(search.data[0]['id'], res.data['results'][0]['id'])
+
+    def test_bulk_create_partial_failure(self):
+        """Test invalid items are reported while the rest are created."""
+        payload = [
+            recipe_payload(0),
+            recipe_payload(1, price='not a price'),
+            recipe_payload(2),
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        results = res.data['results']
+        self.assertEqual(
+            [result['status'] for result in results],
+            [201, 400, 201]
+        )
+        self.assertIn('price', results[1]['errors'])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_create_all_invalid(self):
+        """Test nothing is created when every item is invalid."""
+        res = self.client.post(
+            BULK_URL,
+            [recipe_payload(0, title='')],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    @patch.object(RecipeViewSet, 'bulk_max_items', 2)
+    def test_bulk_create_limits_items(self):
+        """Test empty, non list and oversized payloads are rejected."""
+        for payload in [[], recipe_payload(0),
+                        [recipe_payload(i) for i in range(3)]]:
+            res = self.client.post(BULK_URL, payload, format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_queries_do_not_grow_with_items(self):
+        """Test the number of queries is independent of the item count."""
+        def create(count, offset):
+            payload = [
+                recipe_payload(
+                    offset + i,
+                    ingredients=[{'name': f'Salt {offset}'}]
+                )
+                for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(BULK_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            return len(queries)
+
+        self.assertEqual(create(2, 0), create(50, 100))
+
+
+class BulkUpdateDeleteTests(TestCase):
+    """Tests for updating and deleting recipes in bulk."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='testuser@gmail.com',
+            password='testpass123',
+            name='sample_test_user'
+        )
+        # Force Authenticating the user
+        self.client.force_authenticate(self.user)
+        self.other = create_recipe(
+            create_user(email='other@example.com', password='test123')
+        )
+
+    def test_bulk_update_ids(self):
+        """Test updating ids reports other users' recipes as not found."""
+        r1 = create_recipe(self.user)
+        r2 = create_recipe(self.user)
+        r3 = create_recipe(self.user)
+        payload = {
+            'ids': [r1.id, r2.id, self.other.id],
+            'data': {'price': '4.50', 'title': 'Repriced'},
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(res.data['results'], [
+            {'id': r1.id, 'status': 200},
+            {'id': r2.id, 'status': 200},
+            {'id': self.other.id, 'status': 404},
+        ])
+        self.assertEqual(len([
+            query for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "core_recipe" SET "title"')
+        ]), 1)
+        for recipe in [r1, r2]:
+            recipe.refresh_from_db()
+            self.assertEqual(recipe.price, Decimal('4.50'))
+        r3.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(r3.price, Decimal('5.25'))
+        self.assertEqual(self.other.title, 'Sample recipe title')
+        search = self.client.get(
+            reverse('recipe:recipe-list'),
+            {'search': 'repriced'}
+        )
+        self.assertEqual(len(search.data), 2)
+
+    def test_bulk_update_filter(self):
+        """Test updating the recipes matching a filter expression."""
+        quick = create_recipe(self.user, time_minutes=10)
+        create_recipe(self.user, time_minutes=60)
+
+        res = self.client.patch(
+            BULK_URL,
+            {'filter': {'time_minutes_max': 30}, 'data': {'link': 'x'}},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'],
+            [{'id': quick.id, 'status': 200}]
+        )
+        self.assertEqual(
+            list(Recipe.objects.filter(link='x').values_list('id', flat=True)),
+            [quick.id]
+        )
+
+    def test_bulk_update_invalid_payload(self):
+        """Test invalid targets and data are rejected."""
+        recipe = create_recipe(self.user)
+        for payload in [
+            {'data': {'price': '1.00'}},
+            {'ids': [recipe.id], 'filter': {}, 'data': {'price': '1.00'}},
+            {'ids': [recipe.id], 'data': {'price': 'free'}},
+            {'ids': [True, False], 'data': {'price': '1.00'}},
+            {'ids': [recipe.id], 'data': {'tags': []}},
+            {'filter': {'tag': '1'}, 'data': {'price': '1.00'}},
+        ]:
+            res = self.client.patch(BULK_URL, payload, format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.price, Decimal('5.25'))
+
+    @patch('recipe.bulk.default_storage.delete')
+    def test_bulk_delete(self, mock_delete):
+        """Test deleting recipes removes their links and images."""
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        r1 = create_recipe(self.user, image='uploads/recipe/r1.jpg')
+        r2 = create_recipe(self.user)
+        kept = create_recipe(self.user)
+        for recipe in [r1, r2, kept]:
+            recipe.tags.add(tag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.delete(
+                BULK_URL,
+                {'ids': [r1.id, r2.id, self.other.id]},
+                format='json'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            [result['status'] for result in res.data['results']],
+            [204, 204, 404]
+        )
+        self.assertEqual(
+            list(Recipe.objects.filter(user=self.user)),
+            [kept]
+        )
+        self.assertEqual(
+            list(Recipe.tags.through.objects.values_list(
+                'recipe_id',
+                flat=True
+            )),
+            [kept.id]
+        )
+        self.assertTrue(Recipe.objects.filter(id=self.other.id).exists())
+        mock_delete.assert_called_once_with('uploads/recipe/r1.jpg')
+
+    def test_bulk_delete_filter(self):
+        """Test deleting the recipes matching a filter expression."""
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        tagged = create_recipe(self.user)
+        tagged.tags.add(tag)
+        create_recipe(self.user)
+
+        res = self.client.delete(
+            BULK_URL,
+            {'filter': {'tags': tag.id}},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'],
+            [{'id': tagged.id, 'status': 204}]
+        )
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_delete_not_found(self):
+        """Test deleting only unknown ids returns not found."""
+        res = self.client.delete(
+            BULK_URL,
+            {'ids': [self.other.id]},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(Recipe.objects.filter(id=self.other.id).exists())
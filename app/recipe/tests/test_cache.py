@@ -0,0 +1,294 @@
+"""
+Tests for the versioned response cache of the recipe APIs.
+"""
+
+
+from core.models import (
+    Recipe,
+    Tag
+)
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipe.cache import (
+    VERSION_KEY,
+    get_stats
+)
+
+from unittest.mock import patch
+
+import json
+import time
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAG_URL = reverse('recipe:tag-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_user(**params):
+    """Create and return user"""
+    return get_user_model().objects.create(**params)
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 22,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ResponseCacheTests(TestCase):
+    """Tests cached responses are reused and never stale."""
+
+    def setUp(self):
+        # Counts of earlier tests still pending in this process go first
+        get_stats()
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user(
+            email='testuser@gmail.com',
+            password='testpass123',
+            name='sample_test_user'
+        )
+        # Force Authenticating the user
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(self.user, title='Dal')
+
+    def _get(self, url, params=None, expected=None):
+        """GET url and return its JSON, checking the X-Cache header."""
+        res = self.client.get(url, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        if expected:
+            self.assertEqual(res['X-Cache'], expected)
+        return json.loads(res.content)
+
+    def test_repeated_get_is_served_from_cache(self):
+        """Test identical requests hit the cache with the same body."""
+        first = self._get(RECIPE_URL, {'price_max': 10, 'ordering': 'id'},
+                          'MISS')
+        second = self._get(RECIPE_URL, {'ordering': 'id', 'price_max': 10},
+                           'HIT')
+
+        self.assertEqual(first, second)
+        self.assertEqual(get_stats(), {'hits': 1, 'misses': 1})
+        self._get(detail_url(self.recipe.id), expected='MISS')
+        self._get(detail_url(self.recipe.id), expected='HIT')
+
+    def test_cache_is_per_user(self):
+        """Test users never see each other's cached responses."""
+        self._get(RECIPE_URL, expected='MISS')
+        other = create_user(email='other@example.com', password='test123')
+        self.client.force_authenticate(other)
+
+        self.assertEqual(self._get(RECIPE_URL, expected='MISS'), [])
+
+    def test_writes_invalidate_cache(self):
+        """Test API writes, M2M changes and renames are seen at once."""
+        self._get(RECIPE_URL)
+
+        self.client.patch(detail_url(self.recipe.id), {'title': 'Tadka'})
+        data = self._get(RECIPE_URL, expected='MISS')
+        self.assertEqual(data[0]['title'], 'Tadka')
+
+        tag = Tag.objects.create(user=self.user, name='Indian')
+        self.recipe.tags.add(tag)
+        data = self._get(RECIPE_URL, expected='MISS')
+        self.assertEqual(data[0]['tags'], [{'id': tag.id, 'name': 'Indian'}])
+
+        self.client.patch(
+            reverse('recipe:tag-detail', args=[tag.id]),
+            {'name': 'Punjabi'}
+        )
+        data = self._get(RECIPE_URL, expected='MISS')
+        self.assertEqual(data[0]['tags'][0]['name'], 'Punjabi')
+        self.assertEqual(self._get(TAG_URL)[0]['name'], 'Punjabi')
+
+        self.client.delete(detail_url(self.recipe.id))
+        self.assertEqual(self._get(RECIPE_URL, expected='MISS'), [])
+
+    def test_bulk_writes_invalidate_cache(self):
+        """Test bulk create, update and delete invalidate the cache."""
+        self._get(RECIPE_URL)
+
+        self.client.post(
+            BULK_URL,
+            [{'title': 'Soup', 'time_minutes': 5, 'price': '1.00'}],
+            format='json'
+        )
+        self.assertEqual(len(self._get(RECIPE_URL, expected='MISS')), 2)
+
+        self.client.patch(
+            BULK_URL,
+            {'ids': [self.recipe.id], 'data': {'price': '9.99'}},
+            format='json'
+        )
+        data = self._get(RECIPE_URL, {'ordering': 'id'}, expected='MISS')
+        self.assertEqual(data[0]['price'], '9.99')
+
+        self.client.delete(
+            BULK_URL,
+            {'ids': [self.recipe.id]},
+            format='json'
+        )
+        data = self._get(RECIPE_URL, {'ordering': 'id'}, expected='MISS')
+        self.assertEqual([item['title'] for item in data], ['Soup'])
+
+    def test_evicted_version_does_not_revive_old_entries(self):
+        """Test a lost version stamp starts a new one, not an old one."""
+        self._get(RECIPE_URL)
+        cache.delete(VERSION_KEY.format(user_id=self.user.id))
+
+        self._get(RECIPE_URL, expected='MISS')
+
+    def test_browsable_api_is_not_cached(self):
+        """Test only JSON responses are cached."""
+        for _ in range(2):
+            res = self.client.get(RECIPE_URL, HTTP_ACCEPT='text/html')
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotIn('X-Cache', res)
+
+    @patch('recipe.cache.MAX_CACHED_SIZE', 10)
+    def test_large_responses_are_not_cached(self):
+        """Test bodies over the size limit are served but not cached."""
+        self._get(RECIPE_URL, expected='MISS')
+        self._get(RECIPE_URL, expected='MISS')
+
+    def test_failing_cache_is_a_miss(self):
+        """Test errors of the cache backend do not fail the request."""
+        with patch.object(cache, 'get', side_effect=OSError), \
+                patch.object(cache, 'set', side_effect=OSError), \
+                self.assertLogs('recipe.cache', 'WARNING'):
+            first = self._get(RECIPE_URL, expected='MISS')
+            second = self._get(RECIPE_URL, expected='MISS')
+
+        self.assertEqual(first, second)
+        self.assertEqual(get_stats(), {'hits': 0, 'misses': 2})
+
+
+class ConditionalRequestTests(TestCase):
+    """Tests ETag and Last-Modified validators of the recipe APIs."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user(
+            email='testuser@gmail.com',
+            password='testpass123',
+            name='sample_test_user'
+        )
+        # Force Authenticating the user
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(self.user, title='Dal')
+
+    def test_if_none_match_returns_not_modified(self):
+        """Test a matching ETag is answered with 304 without queries."""
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+        self.client.patch(detail_url(self.recipe.id), {'title': 'Tadka'})
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_etag_differs_per_representation(self):
+        """Test JSON and browsable API responses have their own ETag."""
+        json_etag = self.client.get(RECIPE_URL)['ETag']
+        html_etag = self.client.get(RECIPE_URL, HTTP_ACCEPT='text/html')[
+            'ETag'
+        ]
+
+        self.assertNotEqual(json_etag, html_etag)
+
+    def test_if_modified_since(self):
+        """Test Last-Modified is sent and honoured once a second old."""
+        cache.set(
+            VERSION_KEY.format(user_id=self.user.id),
+            time.time_ns() - 5 * 10 ** 9,
+            None
+        )
+        res = self.client.get(detail_url(self.recipe.id))
+        modified = res['Last-Modified']
+
+        res = self.client.get(
+            detail_url(self.recipe.id),
+            HTTP_IF_MODIFIED_SINCE=modified
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(detail_url(self.recipe.id), {'title': 'Tadka'})
+        res = self.client.get(
+            detail_url(self.recipe.id),
+            HTTP_IF_MODIFIED_SINCE=modified
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Last-Modified', res)
+
+    def test_if_none_match_on_missing_object(self):
+        """Test other users' and missing objects are 404, never 304."""
+        etag = self.client.get(detail_url(self.recipe.id))['ETag']
+        other = create_user(email='other@gmail.com', password='pass12345')
+        recipe = create_recipe(other)
+
+        res = self.client.get(detail_url(self.recipe.id),
+                              HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        for recipe_id in [recipe.id, recipe.id + 1]:
+            res = self.client.get(detail_url(recipe_id),
+                                  HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_if_match_guards_writes(self):
+        """Test writes with a stale ETag fail with 412 and change nothing."""
+        etag = self.client.get(detail_url(self.recipe.id))['ETag']
+
+        res = self.client.patch(
+            detail_url(self.recipe.id),
+            {'title': 'Tadka'},
+            HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+        res = self.client.patch(
+            detail_url(self.recipe.id),
+            {'title': 'Khichdi'},
+            HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        res = self.client.delete(
+            detail_url(self.recipe.id),
+            HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.title, 'Tadka')
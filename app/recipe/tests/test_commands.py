@@ -0,0 +1,246 @@
+"""
+Test recipe management commands
+"""
+
+from core.models import (
+    ImageUpload,
+    Recipe
+)
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import (
+    TestCase,
+    override_settings
+)
+
+from io import (
+    BytesIO,
+    StringIO
+)
+
+from PIL import Image
+
+from recipe.cache import (
+    _count,
+    get_stats
+)
+
+import os
+import tempfile
+import time
+import uuid
+
+
+class BenchmarkCommandTests(TestCase):
+    """Test the benchmark commands on small datasets."""
+
+    def test_benchmark_filters(self):
+        """Test the filter benchmark explains every variant"""
+        out = StringIO()
+
+        call_command('benchmark_filters', rows=50, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('JOIN + DISTINCT', output)
+        self.assertIn('EXISTS', output)
+
+
+class CacheStatsCommandTests(TestCase):
+    """Test the cache_stats command."""
+
+    def test_cache_stats(self):
+        """Test the command reports the counts of all processes"""
+        # Counts of earlier tests still pending in this process go first
+        get_stats()
+        cache.clear()
+        for name in ['hits', 'hits', 'misses']:
+            _count(name)
+        out = StringIO()
+
+        call_command('cache_stats', stdout=out)
+
+        self.assertIn('2 hits, 1 misses, 67% hit ratio', out.getvalue())
+
+
+class ImportRecipesCommandTests(TestCase):
+    """Test the import_recipes command."""
+
+    def test_import_recipes(self):
+        """Test the command imports a file and reports its errors"""
+        user = get_user_model().objects.create_user(
+            email='importer@example.com',
+            password='testpass123'
+        )
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as file:
+            file.write(
+                'title,time_minutes,price,tags\n'
+                'Dal,30,4.50,Indian\n'
+                'Soup,slow,2.00,\n'
+            )
+            file.flush()
+            out = StringIO()
+
+            call_command(
+                'import_recipes',
+                file.name,
+                email=user.email,
+                chunk_size=1,
+                stdout=out
+            )
+
+        output = out.getvalue()
+        self.assertIn('2 rows, 1 created, 1 failed', output)
+        self.assertIn('line 3', output)
+        self.assertEqual(Recipe.objects.get(user=user).title, 'Dal')
+
+
+class CleanMediaCommandTests(TestCase):
+    """Test the clean_media command."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        settings = override_settings(MEDIA_ROOT=self.temp_dir.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com',
+            password='testpass123'
+        )
+        buffer = BytesIO()
+        Image.new('RGB', (10, 10), 'red').save(buffer, 'PNG')
+        self.recipe = self._create_recipe(buffer.getvalue())
+        self.rendition = 'renditions/recipe/dal/thumb.webp'
+        self._write(self.rendition, age=48)
+        self.recipe.image_renditions = {'thumb': {'webp': self.rendition}}
+        self.recipe.save()
+
+    def _create_recipe(self, data):
+        """Create and return a recipe with an image of data."""
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Dal',
+            time_minutes=30,
+            price=Decimal('4.50')
+        )
+        recipe.image.save('dal.png', ContentFile(data))
+
+        return recipe
+
+    def _write(self, name, age):
+        """Write a media file last modified age hours ago."""
+        path = os.path.join(self.temp_dir.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(b'data')
+        past = time.time() - age * 60 * 60
+        os.utime(path, (past, past))
+
+        return path
+
+    def test_clean_media(self):
+        """Test only old files no recipe refers to are deleted"""
+        orphan = self._write('uploads/recipe/ab/orphan.jpg', age=48)
+        rendition = self._write('renditions/recipe/old/card.jpeg', age=48)
+        recent = self._write('uploads/recipe/ab/recent.jpg', age=1)
+        out = StringIO()
+
+        call_command('clean_media', workers=1, stdout=out)
+
+        self.assertIn('uploads/recipe/ab/orphan.jpg: orphan', out.getvalue())
+        self.assertIn('2 orphans', out.getvalue())
+        self.assertTrue(os.path.exists(orphan))
+
+        call_command('clean_media', delete=True, workers=1, stdout=out)
+
+        self.assertFalse(os.path.exists(orphan))
+        self.assertFalse(os.path.exists(rendition))
+        self.assertTrue(os.path.exists(recent))
+        self.assertTrue(os.path.exists(self.recipe.image.path))
+        self.assertTrue(os.path.exists(
+            os.path.join(self.temp_dir.name, self.rendition)
+        ))
+
+    def test_verify_media(self):
+        """Test verifying reports missing and undecodable images"""
+        broken = self._create_recipe(b'not an image')
+        missing = self._create_recipe(b'gone')
+        os.remove(missing.image.path)
+        out = StringIO()
+        err = StringIO()
+
+        call_command(
+            'clean_media',
+            verify=True,
+            workers=1,
+            stdout=out,
+            stderr=err
+        )
+
+        self.assertIn('3 images verified', out.getvalue())
+        self.assertIn('2 failed', out.getvalue())
+        errors = err.getvalue()
+        self.assertIn(f'{broken.image.name}: cannot be decoded', errors)
+        self.assertIn(f'{missing.image.name}: missing', errors)
+
+
+class ClearImageUploadsCommandTests(TestCase):
+    """Test the clear_image_uploads command."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        settings = override_settings(CHUNKED_UPLOAD_ROOT=self.temp_dir.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        user = get_user_model().objects.create_user(
+            email='testuser@example.com',
+            password='testpass123'
+        )
+        self.recipe = Recipe.objects.create(
+            user=user,
+            title='Dal',
+            time_minutes=30,
+            price=Decimal('4.50')
+        )
+
+    def _create_upload(self):
+        """Create an upload of the recipe with its part file."""
+        upload = ImageUpload.objects.create(
+            user=self.recipe.user,
+            recipe=self.recipe,
+            filename='dal.png',
+            size=10
+        )
+        open(os.path.join(self.temp_dir.name, f'{upload.pk}.part'),
+             'wb').close()
+
+        return upload
+
+    def test_orphaned_part_files_are_deleted(self):
+        """Test part files of uploads deleted with their recipe go."""
+        upload = self._create_upload()
+        orphan = f'{uuid.uuid4()}.part'
+        open(os.path.join(self.temp_dir.name, orphan), 'wb').close()
+        open(os.path.join(self.temp_dir.name, 'other.txt'), 'wb').close()
+
+        out = StringIO()
+        call_command('clear_image_uploads', stdout=out)
+
+        self.assertIn('1 part files deleted', out.getvalue())
+        self.assertCountEqual(
+            os.listdir(self.temp_dir.name),
+            [f'{upload.pk}.part', 'other.txt']
+        )
+        self.recipe.delete()
+
+        call_command('clear_image_uploads', stdout=StringIO())
+
+        self.assertEqual(os.listdir(self.temp_dir.name), ['other.txt'])
@@ -0,0 +1,134 @@
+"""
+Tests for the compiled serializer read path.
+"""
+
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient
+)
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Prefetch
+from django.test import TestCase
+
+from io import StringIO
+
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from recipe.compiled import compile_serializer
+from recipe.serializers import (
+    RecipeSerializer,
+    RecipeDetailSerializer,
+    TagSerializer
+)
+
+
+def create_user(**params):
+    """Create and return user"""
+    return get_user_model().objects.create(**params)
+
+
+class CompiledSerializerTests(TestCase):
+    """Tests the compiled path renders exactly like the serializers."""
+
+    def setUp(self):
+        self.user = create_user(
+            email='testuser@gmail.com',
+            password='testpass123',
+            name='sample_test_user'
+        )
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        dinner = Tag.objects.create(user=self.user, name='Dînner')
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+
+        for i, price in enumerate(['5.25', '10', '0.5']):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i}',
+                time_minutes=10 + i,
+                price=Decimal(price),
+                description='Sample Description',
+                link='' if i else 'http://example.com/recipe.pdf',
+            )
+            recipe.tags.add(vegan, dinner)
+            if i:
+                recipe.ingredients.add(salt)
+        Recipe.objects.filter(title='Recipe 0').update(
+            image='uploads/recipe/sample.jpg'
+        )
+
+    def _assert_renders_like(self, serializer_class, queryset):
+        """Compare the compiled output with the serializer byte for byte."""
+        prefetched = queryset.prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.order_by('id')),
+            Prefetch('ingredients', queryset=Ingredient.objects.order_by('id'))
+        ) if queryset.model is Recipe else queryset
+        expected = serializer_class(prefetched, many=True).data
+
+        serializer = serializer_class()
+        compiled = compile_serializer(serializer)
+        data = compiled.to_representation(
+            serializer,
+            compiled.values(queryset)
+        )
+
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(data), renderer.render(expected))
+
+    def test_recipe_list_matches_serializer(self):
+        """Test compiled recipe rows match RecipeSerializer."""
+        self._assert_renders_like(
+            RecipeSerializer,
+            Recipe.objects.order_by('-id')
+        )
+
+    def test_recipe_detail_matches_serializer(self):
+        """Test compiled rows with images match RecipeDetailSerializer."""
+        self._assert_renders_like(
+            RecipeDetailSerializer,
+            Recipe.objects.order_by('-id')
+        )
+
+    def test_tag_list_matches_serializer(self):
+        """Test compiled tag rows match TagSerializer."""
+        self._assert_renders_like(
+            TagSerializer,
+            Tag.objects.order_by('-name')
+        )
+
+    def test_plan_is_compiled_once_per_serializer_class(self):
+        """Test the compiled plan is reused between responses."""
+        self.assertIs(
+            compile_serializer(RecipeSerializer()),
+            compile_serializer(RecipeSerializer())
+        )
+
+    def test_unsupported_fields_are_rejected(self):
+        """Test serializers with computed fields cannot be compiled."""
+
+        class ComputedSerializer(serializers.ModelSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Tag
+                fields = ['id', 'label']
+
+            def get_label(self, obj):
+                return obj.name.upper()
+
+        with self.assertRaises(ValueError):
+            compile_serializer(ComputedSerializer())
+
+    def test_benchmark_command(self):
+        """Test the serializer benchmark runs and reports a speedup."""
+        out = StringIO()
+
+        call_command('benchmark_serializers', rows=20, repeat=1, stdout=out)
+
+        self.assertIn('speedup', out.getvalue())
@@ -0,0 +1,129 @@
+"""
+Tests for the recipe export API.
+"""
+
+
+from core.models import (
+    Recipe,
+    Tag
+)
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from recipe.serializers import RecipeDetailSerializer
+from recipe.views import RecipeViewSet
+
+from unittest.mock import patch
+
+import csv
+import io
+import json
+import zipfile
+
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+def create_user(**params):
+    """Create and return user"""
+    return get_user_model().objects.create(**params)
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 22,
+        'price': Decimal('5.25'),
+        'description': 'Sample Description',
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeExportTests(TestCase):
+    """Tests for streaming recipe exports."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='testuser@gmail.com',
+            password='testpass123',
+            name='sample_test_user'
+        )
+        # Force Authenticating the user
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Dinner')
+        for i in range(5):
+            recipe = create_recipe(self.user, title=f'Recipe, "{i}"')
+            if i % 2:
+                recipe.tags.add(self.tag)
+
+    def _content(self, res):
+        """Return the streamed body of a response."""
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        return b''.join(res.streaming_content)
+
+    @patch.object(RecipeViewSet, 'export_chunk_size', 2)
+    def test_export_ndjson(self):
+        """Test NDJSON export streams every recipe in detail shape."""
+        res = self.client.get(EXPORT_URL)
+
+        lines = self._content(res).splitlines()
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        recipes = Recipe.objects.filter(user=self.user).order_by('-id')
+        expected = [
+            json.loads(JSONRenderer().render(data))
+            for data in RecipeDetailSerializer(recipes, many=True).data
+        ]
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_export_applies_filters(self):
+        """Test the export only includes recipes matching the filters."""
+        res = self.client.get(EXPORT_URL, {'tags': str(self.tag.id)})
+
+        lines = self._content(res).splitlines()
+        self.assertEqual(len(lines), 2)
+        for line in lines:
+            self.assertEqual(json.loads(line)['tags'][0]['name'], 'Dinner')
+
+    def test_export_csv(self):
+        """Test CSV export has a header and one row per recipe."""
+        res = self.client.get(EXPORT_URL, {'format': 'csv'})
+
+        rows = list(csv.reader(io.StringIO(self._content(res).decode())))
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        self.assertEqual(rows[0][:2], ['id', 'title'])
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][1], 'Recipe, "4"')
+        self.assertIn('Dinner', rows[2])
+
+    def test_export_zip_with_images(self):
+        """Test zip export bundles the recipes and their images."""
+        recipe = Recipe.objects.filter(user=self.user).first()
+        recipe.image.save('sample.jpg', ContentFile(b'image-bytes'))
+        self.addCleanup(recipe.image.delete, save=False)
+
+        res = self.client.get(EXPORT_URL, {'format': 'zip'})
+
+        archive = zipfile.ZipFile(io.BytesIO(self._content(res)))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(
+            len(archive.read('recipes.ndjson').splitlines()),
+            5
+        )
+        self.assertEqual(
+            archive.read(f'images/{recipe.image.name}'),
+            b'image-bytes'
+        )
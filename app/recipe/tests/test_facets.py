@@ -0,0 +1,123 @@
+"""
+Tests for the recipe facets API.
+"""
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient
+)
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+
+FACETS_URL = reverse('recipe:recipe-facets')
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 22,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class FacetsApiTests(TestCase):
+    """Test facet counts follow the recipe filters."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com',
+            password='testpass123'
+        )
+        # Force Authenticating the user
+        self.client.force_authenticate(self.user)
+
+        self.indian = Tag.objects.create(user=self.user, name='Indian')
+        self.quick = Tag.objects.create(user=self.user, name='Quick')
+        self.rice = Ingredient.objects.create(user=self.user, name='Rice')
+
+        dal = create_recipe(self.user, title='Dal', time_minutes=40,
+                            price=Decimal('4.99'))
+        dal.tags.add(self.indian)
+        pulao = create_recipe(self.user, title='Pulao', time_minutes=15,
+                              price=Decimal('12.00'))
+        pulao.tags.add(self.indian, self.quick)
+        pulao.ingredients.add(self.rice)
+        create_recipe(self.user, title='Toast', time_minutes=5,
+                      price=Decimal('25.00'))
+
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123'
+        )
+        create_recipe(other, time_minutes=90)
+
+    def test_unfiltered_facets(self):
+        """Test the facets count all of the user's recipes."""
+        res = self.client.get(FACETS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 3)
+        self.assertEqual(res.data['tags'], [
+            {'id': self.indian.id, 'name': 'Indian', 'count': 2},
+            {'id': self.quick.id, 'name': 'Quick', 'count': 1},
+        ])
+        self.assertEqual(res.data['ingredients'], [
+            {'id': self.rice.id, 'name': 'Rice', 'count': 1},
+        ])
+        self.assertEqual(
+            [bucket['count'] for bucket in res.data['time_minutes']],
+            [2, 0, 1, 0]
+        )
+        self.assertEqual(
+            [bucket['count'] for bucket in res.data['price']],
+            [1, 0, 1, 1]
+        )
+        self.assertEqual(
+            res.data['price'][0],
+            {'min': '0.00', 'max': '4.99', 'count': 1}
+        )
+
+    def test_filtered_facets(self):
+        """Test the facets only count recipes matching the filters."""
+        params = {'tags': str(self.indian.id), 'price_min': '5'}
+
+        with self.assertNumQueries(3):
+            res = self.client.get(FACETS_URL, params)
+
+        self.assertEqual(res.data['count'], 1)
+        self.assertEqual(res.data['tags'], [
+            {'id': self.quick.id, 'name': 'Quick', 'count': 1},
+            {'id': self.indian.id, 'name': 'Indian', 'count': 1},
+        ])
+        self.assertEqual(
+            [bucket['count'] for bucket in res.data['time_minutes']],
+            [1, 0, 0, 0]
+        )
+
+    def test_facets_are_cached_and_invalidated(self):
+        """Test facets are served from the cache until recipes change."""
+        self.client.get(FACETS_URL)
+        res = self.client.get(FACETS_URL)
+        self.assertEqual(res['X-Cache'], 'HIT')
+
+        create_recipe(self.user, time_minutes=20)
+        res = self.client.get(FACETS_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.json()['count'], 4)
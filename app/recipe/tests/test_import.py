@@ -0,0 +1,182 @@
+"""
+Tests for importing recipes from files.
+"""
+
+
+from core.models import (
+    Recipe,
+    Tag
+)
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from unittest.mock import patch
+
+import json
+
+
+IMPORT_URL = reverse('recipe:recipe-import-recipes')
+
+
+def create_user(**params):
+    """Create and return user"""
+    return get_user_model().objects.create(**params)
+
+
+def ndjson_file(items, name='recipes.ndjson'):
+    """Return an uploaded NDJSON file holding items."""
+    content = b''.join(
+        (item if isinstance(item, bytes) else json.dumps(item).encode())
+        + b'\n'
+        for item in items
+    )
+    return SimpleUploadedFile(name, content)
+
+
+class RecipeImportTests(TestCase):
+    """Tests for the recipe import API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='testuser@gmail.com',
+            password='testpass123',
+            name='sample_test_user'
+        )
+        # Force Authenticating the user
+        self.client.force_authenticate(self.user)
+
+    def _import(self, data):
+        """Post an import and return the streamed progress events."""
+        res = self.client.post(IMPORT_URL, data, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        return [
+            json.loads(line)
+            for line in b''.join(res.streaming_content).splitlines()
+        ]
+
+    def test_import_ndjson_in_chunks(self):
+        """Test NDJSON rows are committed chunk by chunk."""
+        items = [
+            {
+                'title': f'Recipe {i}',
+                'time_minutes': 10,
+                'price': '5.25',
+                'tags': [{'name': 'Imported'}],
+            }
+            for i in range(5)
+        ]
+
+        events = self._import({'file': ndjson_file(items), 'chunk_size': 2})
+
+        self.assertEqual(
+            [(event['event'], event['created']) for event in events],
+            [('progress', 2), ('progress', 4), ('done', 5)]
+        )
+        self.assertEqual(events[-1]['errors'], [])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 5)
+        self.assertEqual(
+            Tag.objects.get(user=self.user).recipe_set.count(),
+            5
+        )
+
+    def test_import_reports_row_errors(self):
+        """Test invalid rows are reported with their line number."""
+        items = [
+            {'title': 'Good', 'time_minutes': 10, 'price': '1.00'},
+            b'{not json',
+            {'title': 'Bad price', 'time_minutes': 10, 'price': 'free'},
+            ['not', 'an', 'object'],
+        ]
+
+        events = self._import({'file': ndjson_file(items)})
+
+        done = events[-1]
+        self.assertEqual((done['rows'], done['created'], done['failed']),
+                         (4, 1, 3))
+        self.assertEqual(
+            [error['line'] for error in done['errors']],
+            [2, 3, 4]
+        )
+        self.assertIn('price', done['errors'][1]['errors'])
+
+    def test_import_csv(self):
+        """Test importing a CSV file in the export's format."""
+        content = (
+            'id,title,time_minutes,price,link,tags,ingredients,description\n'
+            '7,"Dal, Tadka",30,4.50,,Indian|Vegan,Lentils,"Spicy"\n'
+        ).encode()
+
+        events = self._import({
+            'file': SimpleUploadedFile('recipes.csv', content),
+        })
+
+        self.assertEqual(events[-1]['created'], 1)
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.title, 'Dal, Tadka')
+        self.assertEqual(recipe.description, 'Spicy')
+        self.assertCountEqual(
+            recipe.tags.values_list('name', flat=True),
+            ['Indian', 'Vegan']
+        )
+        self.assertEqual(recipe.ingredients.get().name, 'Lentils')
+
+    def test_import_csv_not_utf8(self):
+        """Test rows that are not UTF-8 are reported as row errors."""
+        content = (
+            b'title,time_minutes,price\n'
+            b'Dal,30,4.50\n'
+            b'Cr\xe8me br\xfbl\xe9e,40,6.00\n'
+        )
+
+        events = self._import({
+            'file': SimpleUploadedFile('recipes.csv', content),
+        })
+
+        done = events[-1]
+        self.assertEqual(done['event'], 'done')
+        self.assertEqual((done['created'], done['failed']), (1, 1))
+        self.assertEqual(done['errors'], [
+            {'line': 3, 'errors': 'Invalid UTF-8.'}
+        ])
+
+    @patch('recipe.importers.bulk_create_recipes')
+    def test_import_failing_chunk_is_reported(self, patched_create):
+        """Test a chunk that cannot be saved stops with an error event."""
+        patched_create.side_effect = [None, DatabaseError('failed')]
+        items = [
+            {'title': f'Recipe {i}', 'time_minutes': 10, 'price': '5.25'}
+            for i in range(5)
+        ]
+
+        with self.assertLogs('recipe.importers', 'ERROR'):
+            events = self._import({
+                'file': ndjson_file(items),
+                'chunk_size': 2
+            })
+
+        self.assertEqual(
+            [(event['event'], event['created']) for event in events],
+            [('progress', 2), ('error', 2)]
+        )
+        self.assertIn('detail', events[-1])
+
+    def test_import_invalid_request(self):
+        """Test missing files, unknown formats and bad chunk sizes."""
+        for data in [
+            {},
+            {'file': ndjson_file([], name='recipes.txt')},
+            {'file': ndjson_file([]), 'chunk_size': 0},
+        ]:
+            res = self.client.post(IMPORT_URL, data, format='multipart')
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -189,3 +189,17 @@ class PrivateIngredientsApiTests(TestCase):
         s1 = IngredientSerializer(ing)
         self.assertIn(s1.data, res.data)
         self.assertEqual(len(res.data), 1)
+
+    def test_autocomplete_ingredients(self):
+        """Test ?q= returns the user's closest ingredient names."""
+        create_ingredient(user=self.user, name='Tomato')
+        create_ingredient(user=self.user, name='Tomatillo')
+        create_ingredient(user=self.user, name='Potato')
+        create_ingredient(user=self.user, name='Salt')
+
+        res = self.client.get(INGREDIENT_URL, {'q': 'tomat'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = [ingredient['name'] for ingredient in res.data]
+        self.assertEqual(sorted(names[:2]), ['Tomatillo', 'Tomato'])
+        self.assertNotIn('Salt', names)
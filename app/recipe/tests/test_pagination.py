@@ -0,0 +1,142 @@
+"""
+Tests for cursor pagination of the recipe APIs.
+"""
+
+
+from core.models import (
+    Recipe,
+    Tag
+)
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAG_URL = reverse('recipe:tag-list')
+
+
+def create_user(**params):
+    """Create and return user"""
+    return get_user_model().objects.create(**params)
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 22,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class KeysetPaginationTests(TestCase):
+    """Tests for paging through recipes, tags and ingredients."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='testuser@gmail.com',
+            password='testpass123',
+            name='sample_test_user'
+        )
+        # Force Authenticating the user
+        self.client.force_authenticate(self.user)
+
+    def test_list_without_page_size_is_not_paginated(self):
+        """Test pagination is opt-in and plain lists are unchanged."""
+        create_recipe(self.user)
+
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(res.data, list)
+
+    def test_page_through_recipes(self):
+        """Test following next links returns every recipe once in order."""
+        recipes = [create_recipe(self.user) for _ in range(5)]
+        expected = [recipe.id for recipe in reversed(recipes)]
+
+        seen = []
+        url, params = RECIPE_URL, {'page_size': 2}
+        while url:
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 2)
+            seen.extend(item['id'] for item in res.data['results'])
+            # Next links already carry page_size and the cursor
+            url, params = res.data['next'], None
+
+        self.assertEqual(seen, expected)
+
+    def test_previous_link_returns_previous_page(self):
+        """Test the previous link walks back to the earlier page."""
+        for _ in range(5):
+            create_recipe(self.user)
+
+        first = self.client.get(RECIPE_URL, {'page_size': 2})
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+
+        self.assertEqual(back.data['results'], first.data['results'])
+        self.assertEqual(back.data['next'], first.data['next'])
+
+    def test_pages_do_not_use_offset(self):
+        """Test deep pages seek on the cursor rather than skipping rows."""
+        for _ in range(3):
+            create_recipe(self.user)
+
+        first = self.client.get(RECIPE_URL, {'page_size': 1})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first.data['next'])
+
+        for query in queries:
+            self.assertNotIn('OFFSET', query['sql'].upper())
+
+    def test_page_size_is_capped(self):
+        """Test page sizes above the maximum are reduced."""
+        for _ in range(3):
+            create_recipe(self.user)
+
+        res = self.client.get(RECIPE_URL, {'page_size': 100000})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 3)
+        self.assertIsNone(res.data['next'])
+
+    def test_invalid_cursor_returns_not_found(self):
+        """Test a tampered cursor is rejected."""
+        res = self.client.get(
+            RECIPE_URL,
+            {'page_size': 2, 'cursor': 'not-a-cursor'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_through_tags_by_name(self):
+        """Test tags are paged by name with id as the tie breaker."""
+        for name in ['Breakfast', 'Dinner', 'Lunch', 'Vegan', 'Dessert']:
+            Tag.objects.create(user=self.user, name=name)
+
+        first = self.client.get(TAG_URL, {'page_size': 3})
+        second = self.client.get(first.data['next'])
+
+        names = [tag['name'] for tag in first.data['results']]
+        names += [tag['name'] for tag in second.data['results']]
+        self.assertEqual(
+            names,
+            ['Vegan', 'Lunch', 'Dinner', 'Dessert', 'Breakfast']
+        )
+        self.assertIsNone(second.data['next'])
@@ -0,0 +1,124 @@
+"""
+Query plan regression tests for the hot recipe API queries.
+"""
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from urllib.parse import (
+    parse_qs,
+    urlparse
+)
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Tag,
+    Ingredient
+)
+
+from recipe.seed import seed_recipes
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAG_URL = reverse('recipe:tag-list')
+INGREDIENT_URL = reverse('recipe:ingredient-list')
+
+
+class QueryPlanTests(TestCase):
+    """Test the list endpoints are answered from indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_recipes(500, tags=20, ingredients=50)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'ANALYZE core_recipe, core_tag, core_ingredient, '
+                'core_recipe_tags, core_recipe_ingredients'
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        # Force Authenticating the user
+        self.client.force_authenticate(self.user)
+
+    def _plans(self, url, params=None):
+        """Return the EXPLAIN output of every SELECT url runs."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        plans = []
+        with connection.cursor() as cursor:
+            """ The seeded tables are small enough that a sequential scan
+            and sort may be cheapest, so both are discouraged. They then
+            only show up when no index can serve the query. From
+            PostgreSQL 13 the planner can also pick an Incremental Sort,
+            which enable_sort does not cover. """
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_sort = off')
+            if connection.pg_version >= 130000:
+                cursor.execute('SET LOCAL enable_incremental_sort = off')
+            for query in queries.captured_queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute(f'EXPLAIN {query["sql"]}')
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+                plans.append((query['sql'], plan))
+
+        self.assertTrue(plans)
+        return plans
+
+    def assertIndexed(self, url, params=None):
+        """Assert no query of url scans a table or sorts its rows."""
+        for sql, plan in self._plans(url, params):
+            with self.subTest(sql=sql):
+                self.assertNotIn('Seq Scan', plan, plan)
+                self.assertNotIn('Sort', plan, plan)
+
+    def test_recipe_list_plans(self):
+        """Test recipe lists and their nested relations use indexes."""
+        tags = Tag.objects.filter(user=self.user).values_list('id', flat=True)
+
+        self.assertIndexed(RECIPE_URL)
+        self.assertIndexed(RECIPE_URL, {'page_size': 20})
+        self.assertIndexed(RECIPE_URL, {'ordering': 'price'})
+        self.assertIndexed(RECIPE_URL, {'tags': f'{tags[0]},{tags[1]}'})
+
+    def test_tag_and_ingredient_list_plans(self):
+        """Test tag and ingredient lists use indexes."""
+        for url in [TAG_URL, INGREDIENT_URL]:
+            self.assertIndexed(url)
+            self.assertIndexed(url, {'assigned_only': 1})
+            self.assertIndexed(url, {'ordering': '-recipe_count'})
+
+    def test_cursor_seeks_from_index(self):
+        """Test later pages start the index scan at the cursor."""
+        for url, params, field in [
+            (RECIPE_URL, {'page_size': 20, 'ordering': 'price'}, 'price'),
+            (TAG_URL, {'page_size': 5}, 'name'),
+        ]:
+            with self.subTest(url=url, params=params):
+                res = self.client.get(url, params)
+                cursor = parse_qs(urlparse(res.data['next']).query)['cursor']
+
+                plans = self._plans(url, {**params, 'cursor': cursor[0]})
+
+                page = [plan for sql, plan in plans if 'LIMIT' in sql]
+                self.assertEqual(len(page), 1, plans)
+                self.assertRegex(page[0], rf'Index Cond: .*\b{field} [<>]=')
+
+    def test_reverse_lookup_plans(self):
+        """Test the recipes of a tag/ingredient are found from indexes."""
+        tag = Tag.objects.filter(user=self.user).first()
+        ingredient = Ingredient.objects.filter(user=self.user).first()
+
+        for queryset in [tag.recipe_set.all(), ingredient.recipe_set.all()]:
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                plan = queryset.values('id').explain()
+
+            self.assertNotIn('Seq Scan', plan, plan)
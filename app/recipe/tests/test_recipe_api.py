@@ -8,11 +8,14 @@ from core.models import (
     Tag,
     Ingredient
 )
+from core.search import search_query
 
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from PIL import Image
@@ -203,6 +206,84 @@ class PrivateRecipeApiTests(TestCase):
             self.assertEqual(getattr(recipe, key), value)
         self.assertEqual(recipe.user, self.user)
 
+    def test_partial_update_writes_changed_columns_once(self):
+        """Test a patch writes only the changed columns in one UPDATE."""
+        recipe = create_recipe(user=self.user, title='Old Title')
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Lunch'))
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(
+                detail_url(recipe.id),
+                {'title': 'New Title', 'time_minutes': recipe.time_minutes}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        updates = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "core_recipe" SET "title"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"time_minutes"', updates[0])
+        self.assertNotIn('"core_recipe_tags"', ' '.join(
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith(('DELETE', 'INSERT'))
+        ))
+
+    def test_update_with_links_writes_recipe_once(self):
+        """Test a patch of columns and tags writes the recipe row once."""
+        recipe = create_recipe(user=self.user, title='Old Title')
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Lunch'))
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(
+                detail_url(recipe.id),
+                {'title': 'Khichdi', 'tags': [{'name': 'Brunch'}]},
+                format='json'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        updates = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "core_recipe" ')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"search_vector"', updates[0])
+        # The vector written covers the new title and tags
+        for text in ['khichdi', 'brunch']:
+            self.assertTrue(Recipe.objects.filter(
+                pk=recipe.pk,
+                search_vector=search_query(text)
+            ).exists())
+        self.assertFalse(Recipe.objects.filter(
+            pk=recipe.pk,
+            search_vector=search_query('lunch')
+        ).exists())
+
+    def test_update_tags_touches_only_changed_links(self):
+        """Test updating tags keeps the links of tags left in place."""
+        recipe = create_recipe(user=self.user)
+        for name in ['Lunch', 'Dinner']:
+            recipe.tags.add(Tag.objects.create(user=self.user, name=name))
+        kept = Recipe.tags.through.objects.get(
+            recipe=recipe,
+            tag__name='Lunch'
+        )
+
+        res = self.client.patch(
+            detail_url(recipe.id),
+            {'tags': [{'name': 'Lunch'}, {'name': 'Brunch'}]},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertCountEqual(
+            [tag['name'] for tag in res.data['tags']],
+            ['Lunch', 'Brunch']
+        )
+        links = Recipe.tags.through.objects.filter(recipe=recipe)
+        self.assertIn(kept.id, links.values_list('id', flat=True))
+        self.assertEqual(links.count(), 2)
+
     def test_update_user_returns_error(self):
         """Test changing the recipe user results in an error."""
 
@@ -273,6 +354,45 @@ class PrivateRecipeApiTests(TestCase):
             ).exists()
             self.assertTrue(tag_exists)
 
+    def test_create_recipe_with_repeated_tag_names(self):
+        """Test repeated names in the payload link a single tag."""
+        Tag.objects.create(user=self.user, name='Thai')
+        payload = {
+            'title': 'Green Curry',
+            'time_minutes': 30,
+            'price': Decimal('8.50'),
+            'tags': [{'name': 'Thai'}, {'name': 'Curry'}, {'name': 'Curry'}],
+        }
+
+        res = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertCountEqual(
+            recipe.tags.values_list('name', flat=True),
+            ['Thai', 'Curry']
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_create_recipe_queries_do_not_grow_with_items(self):
+        """Test nested tags/ingredients are written with set based queries."""
+        def create(count):
+            payload = {
+                'title': f'Salad {count}',
+                'time_minutes': 10,
+                'price': Decimal('4.00'),
+                'tags': [{'name': f'Tag {i}'} for i in range(count)],
+                'ingredients': [
+                    {'name': f'Item {count}-{i}'} for i in range(count)
+                ],
+            }
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(RECIPE_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            return len(queries)
+
+        self.assertEqual(create(2), create(25))
+
     def test_create_recipe_with_existing_tags(self):
         """Test creating a recipe with existing tags"""
 
@@ -546,6 +666,235 @@ class PrivateRecipeApiTests(TestCase):
         self.assertIn(s2.data, res.data)
         self.assertNotIn(s3.data, res.data)
 
+    def test_filter_recipe_by_tags_returns_unique_recipes(self):
+        """Test recipes matching several tags are returned once."""
+        recipe = create_recipe(user=self.user)
+        tag1 = Tag.objects.create(user=self.user, name='Italian')
+        tag2 = Tag.objects.create(user=self.user, name='Dinner')
+        recipe.tags.add(tag1, tag2)
+
+        res = self.client.get(RECIPE_URL, {'tags': f'{tag1.id},{tag2.id}'})
+
+        self.assertEqual([item['id'] for item in res.data], [recipe.id])
+
+    def test_filter_recipe_by_all_and_no_tags(self):
+        """Test tags_all and tags_none filters."""
+        r1 = create_recipe(user=self.user, title='Pizza')
+        r2 = create_recipe(user=self.user, title='Pasta')
+        r3 = create_recipe(user=self.user, title='Salad')
+        italian = Tag.objects.create(user=self.user, name='Italian')
+        dinner = Tag.objects.create(user=self.user, name='Dinner')
+        r1.tags.add(italian, dinner)
+        r2.tags.add(italian)
+
+        res = self.client.get(
+            RECIPE_URL,
+            {'tags_all': f'{italian.id},{dinner.id}'}
+        )
+        self.assertEqual([item['id'] for item in res.data], [r1.id])
+
+        res = self.client.get(RECIPE_URL, {'tags_none': f'{italian.id}'})
+        self.assertEqual([item['id'] for item in res.data], [r3.id])
+
+    def test_filter_recipe_by_combined_filters(self):
+        """Test tag and ingredient filters are combined with AND."""
+        r1 = create_recipe(user=self.user, title='Pizza')
+        r2 = create_recipe(user=self.user, title='Pasta')
+        italian = Tag.objects.create(user=self.user, name='Italian')
+        cheese = Ingredient.objects.create(user=self.user, name='Cheese')
+        tomato = Ingredient.objects.create(user=self.user, name='Tomato')
+        r1.tags.add(italian)
+        r2.tags.add(italian)
+        r1.ingredients.add(cheese, tomato)
+        r2.ingredients.add(tomato)
+
+        res = self.client.get(RECIPE_URL, {
+            'tags': f'{italian.id}',
+            'ingredients_all': f'{cheese.id},{tomato.id}',
+        })
+        self.assertEqual([item['id'] for item in res.data], [r1.id])
+
+        res = self.client.get(RECIPE_URL, {
+            'tags': f'{italian.id}',
+            'ingredients_none': f'{cheese.id}',
+        })
+        self.assertEqual([item['id'] for item in res.data], [r2.id])
+
+    def test_filter_recipe_invalid_ids_error(self):
+        """Test non numeric filter ids return a bad request."""
+        res = self.client.get(RECIPE_URL, {'tags_all': '1,abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_recipe_does_not_use_distinct(self):
+        """Test filtered lists are built without DISTINCT."""
+        tag = Tag.objects.create(user=self.user, name='Italian')
+        create_recipe(user=self.user).tags.add(tag)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(RECIPE_URL, {'tags': f'{tag.id}'})
+
+        self.assertNotIn('DISTINCT', queries[0]['sql'])
+        self.assertIn('EXISTS', queries[0]['sql'])
+
+    def test_filter_recipe_by_time_and_price_ranges(self):
+        """Test range filters bound time_minutes and price inclusively."""
+        r1 = create_recipe(user=self.user, time_minutes=20, price='9.99')
+        create_recipe(user=self.user, time_minutes=20, price='10.50')
+        create_recipe(user=self.user, time_minutes=45, price='4.00')
+        r4 = create_recipe(user=self.user, time_minutes=30, price='2.00')
+
+        res = self.client.get(RECIPE_URL, {
+            'time_minutes_max': 30,
+            'price_max': '10',
+            'price_min': '2',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in res.data], [r4.id, r1.id])
+
+    def test_filter_recipe_invalid_ranges_error(self):
+        """Test malformed or inverted ranges return a bad request."""
+        for params in [
+            {'price_max': 'cheap'},
+            {'time_minutes_min': -1},
+            {'time_minutes_min': 30, 'time_minutes_max': 10},
+        ]:
+            res = self.client.get(RECIPE_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_order_recipes_by_keys(self):
+        """Test ?ordering= sorts by the keys with an id tiebreaker."""
+        r1 = create_recipe(user=self.user, price='5.00', time_minutes=10)
+        r2 = create_recipe(user=self.user, price='2.00', time_minutes=30)
+        r3 = create_recipe(user=self.user, price='5.00', time_minutes=20)
+        r4 = create_recipe(user=self.user, price='5.00', time_minutes=20)
+
+        cheapest = self.client.get(RECIPE_URL, {'ordering': 'price'})
+        pricey = self.client.get(RECIPE_URL, {'ordering': '-price'})
+        mixed = self.client.get(
+            RECIPE_URL,
+            {'ordering': 'price,-time_minutes'}
+        )
+
+        ids = [[item['id'] for item in res.data]
+               for res in [cheapest, pricey, mixed]]
+        self.assertEqual(ids[0], [r2.id, r1.id, r3.id, r4.id])
+        self.assertEqual(ids[1], [r4.id, r3.id, r1.id, r2.id])
+        self.assertEqual(ids[2], [r2.id, r3.id, r4.id, r1.id])
+
+    def test_order_recipes_paginated(self):
+        """Test cursor pages follow the requested ordering."""
+        for i in range(7):
+            create_recipe(user=self.user, price=f'{i % 3}.50')
+        expected = list(Recipe.objects.order_by(
+            '-price', '-id'
+        ).values_list('id', flat=True))
+
+        ids = []
+        url, params = RECIPE_URL, {'ordering': '-price', 'page_size': 3}
+        while url:
+            res = self.client.get(url, params)
+            ids.extend(item['id'] for item in res.data['results'])
+            url, params = res.data['next'], None
+
+        self.assertEqual(ids, expected)
+
+    def test_order_recipes_invalid_key_error(self):
+        """Test ordering by an unsupported or repeated key is rejected."""
+        for ordering in ['description', 'price,-price', '--price']:
+            res = self.client.get(RECIPE_URL, {'ordering': ordering})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def _create_recipes_with_relations(self, count):
+        """Create recipes which each have a tag and an ingredient."""
+        # Names continue after earlier calls, they are unique per user
+        start = Recipe.objects.filter(user=self.user).count()
+        for i in range(start, start + count):
+            recipe = create_recipe(user=self.user, title=f'Recipe {i}')
+            recipe.tags.add(
+                Tag.objects.create(user=self.user, name=f'Tag {i}')
+            )
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f'Item {i}')
+            )
+
+    def test_list_recipes_query_count_is_constant(self):
+        """Test listing recipes does not run queries per recipe."""
+        self._create_recipes_with_relations(2)
+        with CaptureQueriesContext(connection) as small:
+            res = self.client.get(RECIPE_URL)
+        self.assertEqual(len(res.data), 2)
+
+        self._create_recipes_with_relations(8)
+        with CaptureQueriesContext(connection) as large:
+            res = self.client.get(RECIPE_URL)
+        self.assertEqual(len(res.data), 10)
+
+        self.assertEqual(len(small), len(large))
+
+    def test_get_recipe_detail_prefetches_relations(self):
+        """Test recipe detail loads tags and ingredients in bulk."""
+        self._create_recipes_with_relations(1)
+        recipe = Recipe.objects.get(user=self.user)
+
+        # One query for the recipe and one per prefetched relation
+        with self.assertNumQueries(3):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['tags']), 1)
+        self.assertEqual(len(res.data['ingredients']), 1)
+
+    def test_list_recipes_with_sparse_fields(self):
+        """Test ?fields= only returns the requested fields."""
+        self._create_recipes_with_relations(2)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPE_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for item in res.data:
+            self.assertEqual(set(item), {'id', 'title'})
+        # Relations which are not requested are not prefetched
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"link"', queries[0]['sql'])
+
+    def test_list_recipes_with_omitted_fields(self):
+        """Test ?omit= leaves out the given fields."""
+        self._create_recipes_with_relations(1)
+
+        res = self.client.get(RECIPE_URL, {'omit': 'tags,ingredients'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(res.data[0]),
+            {'id', 'title', 'time_minutes', 'price', 'link',
+             'image_renditions'}
+        )
+
+    def test_get_recipe_detail_does_not_read_unrequested_columns(self):
+        """Test sparse detail requests prune columns from the query."""
+        recipe = create_recipe(user=self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(
+                detail_url(recipe.id),
+                {'fields': 'title'}
+            )
+
+        self.assertEqual(res.data, {'title': recipe.title})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"description"', queries[0]['sql'])
+
+    def test_sparse_fields_unknown_field_error(self):
+        """Test requesting a field which does not exist fails."""
+        res = self.client.get(RECIPE_URL, {'fields': 'id,user'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class ImageUploadTests(TestCase):
     """Tests for the image upload API."""
@@ -0,0 +1,171 @@
+"""
+Tests for the background image renditions.
+"""
+
+from core.models import Recipe
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase
+from django.urls import reverse
+
+from concurrent.futures.process import BrokenProcessPool
+
+from io import BytesIO
+
+from PIL import Image
+
+from recipe.renditions import (
+    render_renditions,
+    save_renditions
+)
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from unittest.mock import patch
+
+
+def image_bytes(size, image_format='JPEG'):
+    """Return an encoded test image of size."""
+    buffer = BytesIO()
+    Image.new('RGB', size, 'orange').save(buffer, image_format)
+    return buffer.getvalue()
+
+
+class RenditionTests(TestCase):
+    """Test renditions are rendered in the background and exposed."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com',
+            password='testpass123'
+        )
+        # Force Authenticating the user
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Dal',
+            time_minutes=30,
+            price=Decimal('4.50')
+        )
+
+    def _store_image(self, size):
+        """Give the recipe a stored image of size."""
+        self.recipe.image.save('dal.jpg', ContentFile(image_bytes(size)))
+        self.addCleanup(self.recipe.image.delete, save=False)
+
+    def _cleanup(self, renditions):
+        """Delete the rendition files after the test."""
+        for names in renditions.values():
+            for name in names.values():
+                self.addCleanup(default_storage.delete, name)
+
+    @patch('recipe.renditions._submit')
+    def test_upload_queues_renditions(self, patched_submit):
+        """Test uploads return at once and queue the job on commit."""
+        url = reverse('recipe:recipe-upload-image', args=[self.recipe.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                url,
+                {'image': ContentFile(image_bytes((10, 10)), 'dal.jpg')},
+                format='multipart'
+            )
+
+        self.recipe.refresh_from_db()
+        self.addCleanup(self.recipe.image.delete, save=False)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['image_renditions'], {})
+        patched_submit.assert_called_once_with(
+            self.recipe.id,
+            self.user.id,
+            self.recipe.image.name
+        )
+
+    @patch('recipe.renditions._reset_executor')
+    @patch('recipe.renditions._get_executor')
+    def test_upload_survives_broken_pool(self, patched_get, patched_reset):
+        """Test a broken rendition pool is replaced, not raised."""
+        patched_get.return_value.submit.side_effect = BrokenProcessPool()
+        url = reverse('recipe:recipe-upload-image', args=[self.recipe.id])
+
+        with self.assertLogs('recipe.renditions', 'WARNING'):
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(
+                    url,
+                    {'image': ContentFile(image_bytes((10, 10)), 'dal.jpg')},
+                    format='multipart'
+                )
+
+        self.recipe.refresh_from_db()
+        self.addCleanup(self.recipe.image.delete, save=False)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(patched_get.return_value.submit.call_count, 2)
+        self.assertEqual(patched_reset.call_count, 2)
+
+    def test_render_and_save_renditions(self):
+        """Test every size is rendered in each format and exposed."""
+        self._store_image((2000, 1000))
+
+        renditions = render_renditions(self.recipe.image.name)
+        self._cleanup(renditions)
+
+        self.assertEqual(set(renditions), {'thumb', 'card', 'full'})
+        with default_storage.open(renditions['full']['jpeg']) as file:
+            self.assertEqual(Image.open(file).size, (1600, 800))
+        with default_storage.open(renditions['thumb']['webp']) as file:
+            image = Image.open(file)
+            self.assertEqual((image.format, image.size), ('WEBP', (160, 80)))
+
+        self.assertTrue(save_renditions(
+            self.recipe.id,
+            self.user.id,
+            self.recipe.image.name,
+            renditions
+        ))
+        res = self.client.get(
+            reverse('recipe:recipe-detail', args=[self.recipe.id])
+        )
+        self.assertTrue(
+            res.data['image_renditions']['thumb']['webp'].startswith('http')
+        )
+        self.assertTrue(
+            res.data['image_renditions']['thumb']['webp'].endswith(
+                'thumb.webp'
+            )
+        )
+
+    def test_small_images_are_not_enlarged(self):
+        """Test renditions never exceed the original size."""
+        self._store_image((100, 50))
+
+        renditions = render_renditions(self.recipe.image.name)
+        self._cleanup(renditions)
+
+        with default_storage.open(renditions['full']['webp']) as file:
+            self.assertEqual(Image.open(file).size, (100, 50))
+
+    def test_renditions_of_replaced_image_are_discarded(self):
+        """Test a job finishing after the image changed stores nothing."""
+        self._store_image((300, 300))
+        renditions = render_renditions(self.recipe.image.name)
+        self._cleanup(renditions)
+
+        saved = save_renditions(
+            self.recipe.id,
+            self.user.id,
+            'uploads/recipe/replaced.jpg',
+            renditions
+        )
+
+        self.assertFalse(saved)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_renditions, {})
+        self.assertFalse(
+            default_storage.exists(renditions['thumb']['jpeg'])
+        )
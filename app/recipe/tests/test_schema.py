@@ -0,0 +1,31 @@
+"""
+Tests for the generated OpenAPI schema.
+"""
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from io import StringIO
+
+import tempfile
+import yaml
+
+
+class SchemaTests(SimpleTestCase):
+    """Test the API schema can be generated."""
+
+    def test_schema_generates_without_warnings(self):
+        """Test the schema of every endpoint resolves cleanly."""
+        with tempfile.NamedTemporaryFile(suffix='.yml') as file:
+            call_command(
+                'spectacular',
+                '--fail-on-warn',
+                '--file', file.name,
+                stderr=StringIO()
+            )
+            schema = yaml.safe_load(file)
+
+        bulk = schema['paths']['/recipe/recipes/bulk/']
+        self.assertEqual(set(bulk), {'post', 'patch', 'delete'})
+        self.assertIn('207', bulk['patch']['responses'])
+        self.assertIn('204', bulk['delete']['responses'])
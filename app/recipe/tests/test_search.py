@@ -0,0 +1,152 @@
+"""
+Tests for full text recipe search.
+"""
+
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient
+)
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def create_user(**params):
+    """Create and return user"""
+    return get_user_model().objects.create(**params)
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 22,
+        'price': Decimal('5.25'),
+        'description': 'Sample Description',
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeSearchTests(TestCase):
+    """Tests for the ?search= parameter of the recipe API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='testuser@gmail.com',
+            password='testpass123',
+            name='sample_test_user'
+        )
+        # Force Authenticating the user
+        self.client.force_authenticate(self.user)
+
+    def _search(self, text, **params):
+        """Return the titles of the recipes matching text."""
+        res = self.client.get(RECIPE_URL, {'search': text, **params})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.data['results'] if 'results' in res.data else res.data
+        return [recipe['title'] for recipe in results]
+
+    def test_search_title_and_description(self):
+        """Test searching matches stemmed words in titles and descriptions."""
+        create_recipe(self.user, title='Grilled Chicken')
+        create_recipe(self.user, title='Soup', description='Chicken broth')
+        create_recipe(self.user, title='Paneer Tikka')
+
+        self.assertCountEqual(
+            self._search('chickens'),
+            ['Grilled Chicken', 'Soup']
+        )
+
+    def test_search_ranks_title_matches_first(self):
+        """Test recipes matching in the title rank above the description."""
+        create_recipe(self.user, title='Soup', description='Tomato broth')
+        create_recipe(self.user, title='Tomato Pasta')
+
+        self.assertEqual(self._search('tomato'), ['Tomato Pasta', 'Soup'])
+
+    def test_search_tags_and_ingredients(self):
+        """Test searching matches tag and ingredient names."""
+        recipe = create_recipe(self.user, title='Dal')
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Lentils')
+        )
+        create_recipe(self.user, title='Steak')
+
+        self.assertEqual(self._search('vegan lentil'), ['Dal'])
+        self.assertEqual(self._search('vegan -steak'), ['Dal'])
+
+    def test_search_follows_renames_and_removals(self):
+        """Test the stored vectors follow changes to linked names."""
+        recipe = create_recipe(self.user, title='Dal')
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe.tags.add(tag)
+
+        tag.name = 'Spicy'
+        tag.save()
+        self.assertEqual(self._search('spicy'), ['Dal'])
+        self.assertEqual(self._search('vegan'), [])
+
+        tag.recipe_set.clear()
+        self.assertEqual(self._search('spicy'), [])
+
+        recipe.title = 'Curry'
+        recipe.save()
+        self.assertEqual(self._search('curry'), ['Curry'])
+
+    def test_search_limited_to_user(self):
+        """Test searching only returns the authenticated user's recipes."""
+        other = create_user(email='other@example.com', password='test123')
+        create_recipe(other, title='Chicken Curry')
+        create_recipe(self.user, title='Chicken Soup')
+
+        self.assertEqual(self._search('chicken'), ['Chicken Soup'])
+
+    def test_search_uses_vector_column(self):
+        """Test the match runs against the indexed search_vector column."""
+        create_recipe(self.user, title='Chicken Soup')
+
+        with CaptureQueriesContext(connection) as queries:
+            self._search('chicken')
+
+        sql = queries.captured_queries[0]['sql']
+        self.assertIn('"core_recipe"."search_vector" @@', sql)
+        self.assertNotIn('to_tsvector', sql)
+
+    def test_search_paginated_by_rank(self):
+        """Test paging through ranked results returns every match once."""
+        for i in range(5):
+            create_recipe(
+                self.user,
+                title=f'Curry {i}' + ' curry' * (i % 3),
+                description='curry'
+            )
+
+        titles = []
+        url, params = RECIPE_URL, {'search': 'curry', 'page_size': 2}
+        while url:
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            titles.extend(recipe['title'] for recipe in res.data['results'])
+            # Next links already carry the search, page_size and cursor
+            url, params = res.data['next'], None
+
+        self.assertEqual(titles, self._search('curry'))
+        self.assertEqual(len(set(titles)), 5)
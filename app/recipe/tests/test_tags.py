@@ -124,6 +124,17 @@ class PrivateTagApiTests(TestCase):
         # Method 2 to check if the tag is updated properly
         self.assertEqual(tag.name, payload['name'])
 
+    def test_rename_tag_to_existing_name_error(self):
+        """Test renaming a tag to one of the user's tag names fails."""
+        create_tag(user=self.user, name='Lunch')
+        tag = create_tag(user=self.user, name='Breakfast')
+
+        res = self.client.patch(detail_url(tag.id), {'name': 'Lunch'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'Breakfast')
+
     def test_delete_tag(self):
         """Tests deleting a tag is successfull."""
         tag = create_tag(user=self.user, name='Breakfast')
@@ -187,3 +198,79 @@ class PrivateTagApiTests(TestCase):
         s1 = TagSerializer(tag)
         self.assertIn(s1.data, res.data)
         self.assertEqual(len(res.data), 1)
+
+    def test_autocomplete_tags(self):
+        """Test ?q= returns prefix matches before fuzzy matches."""
+        for name in ['Dinner', 'Dessert', 'Desserts', 'Vegan', 'Iced Dessert']:
+            create_tag(user=self.user, name=name)
+        other = create_user(email='other@example.com', password='test123')
+        create_tag(user=other, name='Dessert')
+
+        res = self.client.get(TAG_URL, {'q': 'desert'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = [tag['name'] for tag in res.data]
+        self.assertEqual(names[:2], ['Dessert', 'Desserts'])
+        self.assertIn('Iced Dessert', names)
+        self.assertNotIn('Vegan', names)
+        self.assertEqual(len(names), 3)
+
+    def test_autocomplete_short_prefix_and_limit(self):
+        """Test short prefixes match and ?limit= caps the results."""
+        for i in range(5):
+            create_tag(user=self.user, name=f'Dish {i}')
+        create_tag(user=self.user, name='Vegan')
+
+        res = self.client.get(TAG_URL, {'q': 'di', 'limit': 3})
+
+        self.assertEqual(
+            [tag['name'] for tag in res.data],
+            ['Dish 0', 'Dish 1', 'Dish 2']
+        )
+
+    def test_autocomplete_escapes_wildcards(self):
+        """Test LIKE wildcards in ?q= are matched literally."""
+        create_tag(user=self.user, name='A_C')
+        create_tag(user=self.user, name='ABC')
+
+        res = self.client.get(TAG_URL, {'q': 'a_'})
+
+        self.assertEqual([tag['name'] for tag in res.data], ['A_C'])
+
+    def test_autocomplete_invalid_limit(self):
+        """Test an out of range ?limit= returns an error."""
+        res = self.client.get(TAG_URL, {'q': 'veg', 'limit': 500})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_order_tags_by_recipe_count(self):
+        """Test ?ordering=-recipe_count lists the most used tags first"""
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ['Dinner', 'Italian', 'Quick']
+        ]
+        for count, tag in zip([1, 3, 0], tags):
+            for _ in range(count):
+                recipe = Recipe.objects.create(
+                    user=self.user,
+                    title='Pasta',
+                    time_minutes=20,
+                    price=Decimal('5.00')
+                )
+                recipe.tags.add(tag)
+
+        res = self.client.get(TAG_URL, {'ordering': '-recipe_count'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [tag['name'] for tag in res.data],
+            ['Italian', 'Dinner', 'Quick']
+        )
+        res = self.client.get(
+            TAG_URL,
+            {'ordering': '-recipe_count', 'assigned_only': 1}
+        )
+        self.assertEqual(len(res.data), 2)
+
+        res = self.client.get(TAG_URL, {'ordering': 'user'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
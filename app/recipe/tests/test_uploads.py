@@ -0,0 +1,214 @@
+"""
+Tests for the resumable chunked image uploads.
+"""
+
+from core.models import (
+    ImageUpload,
+    Recipe
+)
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import (
+    TestCase,
+    override_settings
+)
+from django.urls import reverse
+
+from io import BytesIO
+
+from PIL import Image
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from unittest.mock import patch
+
+import fcntl
+import os
+import tempfile
+
+
+UPLOADS_URL = reverse('recipe:imageupload-list')
+
+
+def detail_url(upload_id):
+    """Create and return an upload detail URL."""
+    return reverse('recipe:imageupload-detail', args=[upload_id])
+
+
+def finalize_url(upload_id):
+    """Create and return an upload finalize URL."""
+    return reverse('recipe:imageupload-finalize', args=[upload_id])
+
+
+def image_bytes():
+    """Return an encoded test image."""
+    buffer = BytesIO()
+    Image.new('RGB', (64, 64), 'green').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class ImageUploadApiTests(TestCase):
+    """Test images can be uploaded in chunks and resumed."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        settings = override_settings(CHUNKED_UPLOAD_ROOT=self.temp_dir.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com',
+            password='testpass123'
+        )
+        # Force Authenticating the user
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Dal',
+            time_minutes=30,
+            price=Decimal('4.50')
+        )
+        self.data = image_bytes()
+
+    def _initiate(self):
+        """Create an upload of the test image and return its id."""
+        res = self.client.post(UPLOADS_URL, {
+            'recipe': self.recipe.id,
+            'filename': 'dal.png',
+            'size': len(self.data),
+        })
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['offset'], 0)
+        return res.data['id']
+
+    def _put(self, upload_id, start, end):
+        """PUT the bytes start to end (inclusive) of the test image."""
+        return self.client.put(
+            detail_url(upload_id),
+            self.data[start:end + 1],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(self.data)}'
+        )
+
+    @patch('recipe.renditions._submit')
+    def test_chunked_upload_and_resume(self, patched_submit):
+        """Test chunks are appended, resumed and finalized."""
+        upload_id = self._initiate()
+        half = len(self.data) // 2
+        size = len(self.data)
+
+        res = self._put(upload_id, 0, half - 1)
+        self.assertEqual(res.data['offset'], half)
+
+        # A chunk sent again after a lost response is refused
+        res = self._put(upload_id, 0, half - 1)
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+        # The client asks where to resume from
+        res = self.client.get(detail_url(upload_id))
+        self.assertEqual(res.data['offset'], half)
+
+        res = self._put(upload_id, half, size - 1)
+        self.assertEqual(res.data['offset'], size)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(finalize_url(upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.addCleanup(self.recipe.image.delete, save=False)
+        with self.recipe.image.open() as file:
+            self.assertEqual(file.read(), self.data)
+        self.assertFalse(ImageUpload.objects.exists())
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+        patched_submit.assert_called_once()
+
+    def test_concurrent_chunk_is_refused(self):
+        """Test a chunk is refused while another one is being written."""
+        upload_id = self._initiate()
+        path = os.path.join(self.temp_dir.name, f'{upload_id}.part')
+
+        with open(path, 'r+b') as part:
+            fcntl.flock(part, fcntl.LOCK_EX)
+            res = self._put(upload_id, 0, 9)
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        res = self.client.get(detail_url(upload_id))
+        self.assertEqual(res.data['offset'], 0)
+        self.assertEqual(os.path.getsize(path), 0)
+
+    def test_finalize_incomplete_upload_fails(self):
+        """Test an upload missing bytes cannot be finalized."""
+        upload_id = self._initiate()
+        self._put(upload_id, 0, 9)
+
+        res = self.client.post(finalize_url(upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_finalize_invalid_image_fails(self):
+        """Test an upload which is not an image is refused."""
+        self.data = b'not an image at all'
+        upload_id = self._initiate()
+        self._put(upload_id, 0, len(self.data) - 1)
+
+        res = self.client.post(finalize_url(upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bad_ranges_are_refused(self):
+        """Test chunks must match their Content-Range and the size."""
+        upload_id = self._initiate()
+
+        res = self.client.put(
+            detail_url(upload_id),
+            self.data[:10],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes 0-19/{len(self.data)}'
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.put(
+            detail_url(upload_id),
+            self.data[:10],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE='bytes 0-9/5'
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_to_other_users_recipe_fails(self):
+        """Test uploads can only target the user's own recipes."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123'
+        )
+        recipe = Recipe.objects.create(
+            user=other,
+            title='Soup',
+            time_minutes=5,
+            price=Decimal('1.00')
+        )
+
+        res = self.client.post(UPLOADS_URL, {
+            'recipe': recipe.id,
+            'filename': 'soup.png',
+            'size': 10,
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_abort_upload(self):
+        """Test deleting an upload removes its file."""
+        upload_id = self._initiate()
+
+        res = self.client.delete(detail_url(upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
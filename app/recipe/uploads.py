@@ -0,0 +1,218 @@
+"""
+Resumable chunked uploads of recipe images.
+
+An upload is initiated with the file name and size, then its bytes are
+sent as ranged PUTs which are appended to a file on disk as they arrive,
+and finally it is finalized into Recipe.image. The offset stored on the
+upload only moves past bytes that were written and synced to disk, so an
+interrupted upload resumes from there.
+"""
+
+import fcntl
+import os
+import re
+
+from django.conf import settings
+from django.core.files import File
+from django.db import (
+    DatabaseError,
+    transaction
+)
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from PIL import Image
+
+from recipe.bulk import schedule_release
+from recipe.renditions import schedule_renditions
+
+from rest_framework import (
+    exceptions,
+    status
+)
+
+
+# Largest image and largest chunk accepted, chunks stay under the proxy's
+# 10M request body limit
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+# Size of the blocks chunks are copied from the request to disk with
+BLOCK_SIZE = 64 * 1024
+
+CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadConflict(exceptions.APIException):
+    """A chunk does not start at the offset of the upload."""
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The chunk does not start at the upload offset.'
+    default_code = 'upload_conflict'
+
+
+class UploadedPart(File):
+    """The file of a finalized upload, moved into storage, not copied.
+
+    FileSystemStorage renames files which have a temporary_file_path.
+    """
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def part_path(upload):
+    """Return the path the bytes of upload are written to."""
+    return os.path.join(settings.CHUNKED_UPLOAD_ROOT, f'{upload.pk}.part')
+
+
+def parse_content_range(header, size):
+    """Return the (start, length) of a Content-Range within size bytes."""
+    match = CONTENT_RANGE.match(header or '')
+    if match is None:
+        raise exceptions.ValidationError(
+            {'Content-Range': 'Expected bytes <start>-<end>/<size>.'}
+        )
+
+    start, end, total = (int(value) for value in match.groups())
+    if total != size or not start <= end < size:
+        raise exceptions.ValidationError(
+            {'Content-Range': f'Expected a range within {size} bytes.'}
+        )
+    if end - start + 1 > MAX_CHUNK_SIZE:
+        raise exceptions.ValidationError(
+            {'Content-Range': f'Chunks are at most {MAX_CHUNK_SIZE} bytes.'}
+        )
+
+    return start, end - start + 1
+
+
+def create_part(upload):
+    """Create the empty file of a new upload."""
+    os.makedirs(settings.CHUNKED_UPLOAD_ROOT, exist_ok=True)
+    open(part_path(upload), 'wb').close()
+
+
+def write_chunk(part, stream, start, length):
+    """Copy length bytes of stream into the open file part at start.
+
+    The bytes are copied in blocks straight from the request, never held
+    in memory as a whole. Returns the number of bytes written, which is
+    less than length if the client disconnected.
+    """
+    written = 0
+    part.seek(start)
+    while written < length:
+        block = stream.read(min(BLOCK_SIZE, length - written))
+        if not block:
+            break
+        part.write(block)
+        written += len(block)
+
+    part.flush()
+    # The offset is only committed once the bytes are on disk
+    os.fsync(part.fileno())
+
+    return written
+
+
+def append_chunk(queryset, pk, stream, content_range, content_length):
+    """Write a chunk to an upload and advance its offset.
+
+    No transaction is open while the chunk is read from the client. The
+    range is checked against the locked row in a short transaction, the
+    chunk is written holding an exclusive lock on the upload's file, so a
+    second request for the same upload fails with a conflict instead of
+    writing the same bytes at once, and the offset is then only moved if
+    no other request moved it in between.
+    """
+    with transaction.atomic():
+        try:
+            upload = get_object_or_404(
+                queryset.select_for_update(nowait=True),
+                pk=pk
+            )
+        except DatabaseError:
+            raise UploadConflict('Another chunk is being written.')
+
+        start, length = parse_content_range(content_range, upload.size)
+        if start != upload.offset:
+            raise UploadConflict(
+                f'The upload continues at byte {upload.offset}.'
+            )
+        if content_length != length:
+            raise exceptions.ValidationError(
+                {'Content-Length': f'Expected {length} bytes.'}
+            )
+
+    try:
+        part = open(part_path(upload), 'r+b')
+    except FileNotFoundError:
+        raise exceptions.NotFound()
+
+    with part:
+        try:
+            fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadConflict('Another chunk is being written.')
+
+        # Another chunk may have been written before the lock was taken
+        current = queryset.filter(pk=upload.pk, offset=start)
+        if not current.exists():
+            raise UploadConflict('The upload changed, ask for its offset.')
+
+        written = write_chunk(part, stream, start, length)
+        upload.offset = start + written
+        upload.updated = timezone.now()
+        if not current.update(offset=upload.offset, updated=upload.updated):
+            raise UploadConflict('The upload changed, ask for its offset.')
+
+    return upload
+
+
+def finalize_upload(queryset, pk):
+    """Attach a complete upload to its recipe as the recipe image.
+
+    The file is checked to be an image and then moved into storage, the
+    upload is deleted, the replaced image released and the renditions of
+    the new image are queued.
+    """
+    with transaction.atomic():
+        upload = get_object_or_404(
+            queryset.select_for_update().select_related('recipe'),
+            pk=pk
+        )
+        if upload.offset != upload.size:
+            raise UploadConflict(
+                f'Only {upload.offset} of {upload.size} bytes were received.'
+            )
+
+        path = part_path(upload)
+        try:
+            with Image.open(path) as image:
+                image.verify()
+        except Exception:
+            raise exceptions.ValidationError(
+                {'file': 'The upload is not a valid image.'}
+            )
+
+        recipe = upload.recipe
+        schedule_release([recipe.image.name])
+        with open(path, 'rb') as part:
+            recipe.image.save(upload.filename, UploadedPart(part), save=False)
+        recipe.image_renditions = {}
+        recipe.save(update_fields=['image', 'image_renditions'])
+        # Still there if the same bytes were already stored
+        discard_upload(upload)
+        schedule_renditions(recipe)
+
+    return recipe
+
+
+def discard_upload(upload):
+    """Delete an upload and its file."""
+    path = part_path(upload)
+    upload.delete()
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
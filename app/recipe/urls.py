@@ -17,6 +17,7 @@ router = DefaultRouter()
 router.register('recipes', views.RecipeViewSet)
 router.register('tags', views.TagViewSet)
 router.register('ingredients', views.IngredientViewSet)
+router.register('image-uploads', views.ImageUploadViewSet)
 
 # Used for reverse mapping
 app_name = 'recipe'
@@ -2,97 +2,344 @@
 Views for the recipe APIs.
 """
 
+from core.authentication import CachedTokenAuthentication
+from core.counters import release_links
 from core.models import (
+    ImageUpload,
     Recipe,
     Tag,
     Ingredient
 )
+from core.renderers import FastJSONRenderer
+from core.search import search_query
+
+from django.contrib.postgres.search import SearchRank
+from django.db import transaction
+from django.db.models import (
+    F,
+    FloatField,
+    Prefetch
+)
+from django.db.models.functions import Cast
+from django.http import StreamingHttpResponse
 
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
+    inline_serializer,
     OpenApiParameter,
     OpenApiTypes
 )
 
+from recipe.bulk import (
+    bulk_create_recipes,
+    bulk_delete_recipes,
+    bulk_update_recipes,
+    schedule_release
+)
+from recipe.cache import (
+    CachedResponseMixin,
+    bump_version
+)
+from recipe.compiled import CompiledListModelMixin
+from recipe.export import (
+    RecipeExporter,
+    NDJSONExportRenderer,
+    CSVExportRenderer,
+    ZipExportRenderer
+)
+from recipe.facets import facet_counts
+from recipe.filters import (
+    autocomplete,
+    filter_recipes,
+    parse_ordering
+)
+from recipe.importers import (
+    FORMATS,
+    READERS,
+    RecipeImporter,
+    guess_format
+)
+from recipe.pagination import KeysetPagination
 from recipe.serializers import (
+    get_sparse_fields,
     RecipeSerializer,
     RecipeDetailSerializer,
     TagSerializer,
     IngredientSerializer,
-    RecipeImageSerializer
+    RecipeImageSerializer,
+    ImageUploadSerializer
+)
+from recipe.uploads import (
+    append_chunk,
+    create_part,
+    discard_upload,
+    finalize_upload
 )
 
 from rest_framework import (
     viewsets,
     mixins,
+    serializers,
     status
 )
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import (
+    IsAuthenticated,
+    SAFE_METHODS
+)
 from rest_framework.response import Response
 
 
+# Query parameters trimming the fields returned for recipes
+SPARSE_FIELD_PARAMETERS = [
+    OpenApiParameter(
+        'fields',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields to return'
+    ),
+    OpenApiParameter(
+        'omit',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields to leave out'
+    ),
+]
+
+
+# Query parameters filtering the recipes
+RECIPE_FILTER_PARAMETERS = [
+    OpenApiParameter(
+        'search',
+        OpenApiTypes.STR,
+        description='Full text search over titles, descriptions, tags and '
+                    'ingredients, results are ordered by relevance'
+    ),
+    OpenApiParameter(
+        'tags',             # Name to pass to request to filter
+        OpenApiTypes.STR,   # Expects string type values
+        description='Comma separated list of tag IDs, recipes with any'
+    ),
+    OpenApiParameter(
+        'tags_all',
+        OpenApiTypes.STR,
+        description='Comma separated list of tag IDs, recipes with all'
+    ),
+    OpenApiParameter(
+        'tags_none',
+        OpenApiTypes.STR,
+        description='Comma separated list of tag IDs, recipes with none'
+    ),
+    OpenApiParameter(
+        'ingredients',
+        OpenApiTypes.STR,
+        description='Comma separated list of ingredient IDs, recipes with any'
+    ),
+    OpenApiParameter(
+        'ingredients_all',
+        OpenApiTypes.STR,
+        description='Comma separated list of ingredient IDs, recipes with all'
+    ),
+    OpenApiParameter(
+        'ingredients_none',
+        OpenApiTypes.STR,
+        description='Comma separated list of ingredient IDs, recipes with none'
+    ),
+    OpenApiParameter(
+        'time_minutes_min',
+        OpenApiTypes.INT,
+        description='Recipes taking at least this many minutes'
+    ),
+    OpenApiParameter(
+        'time_minutes_max',
+        OpenApiTypes.INT,
+        description='Recipes taking at most this many minutes'
+    ),
+    OpenApiParameter(
+        'price_min',
+        OpenApiTypes.DECIMAL,
+        description='Recipes costing at least this price'
+    ),
+    OpenApiParameter(
+        'price_max',
+        OpenApiTypes.DECIMAL,
+        description='Recipes costing at most this price'
+    ),
+    OpenApiParameter(
+        'ordering',
+        OpenApiTypes.STR,
+        description='Comma separated keys from price, time_minutes, title '
+                    'and id, prefix a key with - to sort descending'
+    ),
+]
+
+# Keys recipes can be ordered by with ?ordering=
+RECIPE_ORDERING_FIELDS = ['price', 'time_minutes', 'title', 'id']
+
+# Columns a bulk partial update may set
+BULK_UPDATE_FIELDS = ['title', 'time_minutes', 'price', 'link', 'description']
+
+# Filters bulk updates/deletes can select recipes with
+BULK_FILTER_KEYS = sorted(
+    parameter.name for parameter in RECIPE_FILTER_PARAMETERS
+    if parameter.name not in ('search', 'ordering')
+)
+
+
+# Concrete recipe columns, ordering keys outside it are annotations
+RECIPE_COLUMNS = {field.attname for field in Recipe._meta.concrete_fields}
+
+
 # extend schema view decorator allows us to extned our schema view
 @extend_schema_view(
     # Defining list here as we want to extend schema for list endpoint.
     list=extend_schema(
         # List of parameters that can be passed through request
+        parameters=SPARSE_FIELD_PARAMETERS + RECIPE_FILTER_PARAMETERS
+    ),
+    retrieve=extend_schema(parameters=SPARSE_FIELD_PARAMETERS),
+    export=extend_schema(
+        parameters=SPARSE_FIELD_PARAMETERS + RECIPE_FILTER_PARAMETERS,
+        responses=OpenApiTypes.BINARY
+    ),
+    facets=extend_schema(
         parameters=[
-            OpenApiParameter(
-                'tags',             # Name to pass to request to filter
-                OpenApiTypes.STR,   # Expects string type values
-                description='Comma separated list of tag IDs to filter'
-            ),
-            OpenApiParameter(
-                'ingredients',
-                OpenApiTypes.STR,
-                description='Comma separated list of ingredient IDs to filter'
-            )
-        ]
+            parameter for parameter in RECIPE_FILTER_PARAMETERS
+            if parameter.name != 'ordering'
+        ],
+        responses=OpenApiTypes.OBJECT
+    ),
+    import_recipes=extend_schema(
+        request=inline_serializer(
+            name='RecipeImportRequest',
+            fields={
+                'file': serializers.FileField(),
+                'format': serializers.ChoiceField(FORMATS, required=False),
+                'chunk_size': serializers.IntegerField(required=False),
+            }
+        ),
+        responses=OpenApiTypes.BINARY
     )
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(CachedResponseMixin,
+                    CompiledListModelMixin,
+                    viewsets.ModelViewSet):
     """View for manage recipe APIs."""
 
     # Objects available for this viewset
     queryset = Recipe.objects.all()
     serializer_class = RecipeDetailSerializer
     # Token Authentication
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     # Permissions that authenticated users have in the system
     permission_classes = [IsAuthenticated]
-
-    def _params_to_ints(self, qs):
-        """Convert a list of strings to integers."""
-        return [int(str_id) for str_id in qs.split(',')]
+    # Cursor pagination, enabled when the client sends ?page_size=
+    pagination_class = KeysetPagination
+    # Newest recipes first, id also acts as the pagination key
+    ordering = ('-id',)
+    # Best matches first when searching, id breaks ties between equal ranks
+    search_ordering = ('-rank', '-id')
+    # Recipes read from the database cursor per batch during exports
+    export_chunk_size = 500
+    # Most recipes accepted by one bulk request
+    bulk_max_items = 1000
+    # Tags/ingredients listed per facet
+    facet_limit = 100
+    # Recipes committed per transaction during imports, and the most
+    import_chunk_size = 500
+    max_import_chunk_size = 5000
+
+    def _prefetch(self, queryset, relations):
+        """Prefetch relations in the same order as the compiled lists."""
+        return queryset.prefetch_related(*[
+            Prefetch(
+                name,
+                queryset=Recipe._meta.get_field(
+                    name
+                ).related_model.objects.order_by('id')
+            )
+            for name in relations
+        ])
+
+    def _select_columns(self, queryset, serializer_class):
+        """Load only the columns and relations the serializer renders."""
+        fields = serializer_class.Meta.fields
+        if self.action == 'destroy':
+            return queryset
+        if self.request.method not in SAFE_METHODS:
+            # Writes save and return the full recipe, so load everything
+            return self._prefetch(queryset, [
+                name for name in fields
+                if Recipe._meta.get_field(name).many_to_many
+            ])
+
+        fields = get_sparse_fields(self.request.query_params, fields)
+        columns = {'id'}
+        # The ordering keys are read by the paginator to build cursors
+        columns.update(
+            key.lstrip('-') for key in self.get_ordering()
+            if key.lstrip('-') in RECIPE_COLUMNS
+        )
+        relations = []
+        for name in fields:
+            if Recipe._meta.get_field(name).many_to_many:
+                relations.append(name)
+            else:
+                columns.add(name)
+
+        """ Unused columns such as description are never read and an
+        unrequested relation skips its prefetch query entirely. """
+        return self._prefetch(queryset.only(*columns), relations)
+
+    def get_ordering(self):
+        """Return the ordering of the recipes for this request."""
+        query_params = self.request.query_params
+        if query_params.get('ordering'):
+            return parse_ordering(
+                query_params['ordering'],
+                RECIPE_ORDERING_FIELDS
+            )
+        if query_params.get('search'):
+            return self.search_ordering
+
+        return self.ordering
+
+    def _search(self, queryset):
+        """Filter recipes matching ?search= and annotate their rank."""
+        text = self.request.query_params.get('search')
+        if not text:
+            return queryset
+
+        """ The match runs against the stored search_vector column so the
+        GIN index is used, only the matching rows are ranked. """
+        query = search_query(text)
+        # ts_rank returns a real, the cast keeps cursor values exact
+        return queryset.filter(search_vector=query).annotate(
+            rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+        )
 
     """ Overiding getquery set method to filter the recipes for
     authenticated user"""
     def get_queryset(self):
         """Retrieve recipes for authenticated user."""
-        # Method - 1 to get tags and ingredients
-        # tags = self.request.GET.get('tags')
-        # ingredients = self.request.GET.get('ingredients')
-
-        # Method - 2 to get tags and ingredients
-        tags = self.request.query_params.get('tags')
-        ingredients = self.request.query_params.get('ingredients')
-        # Taking queryset in variable as we need to filter the queryset
-        queryset = self.queryset
-        if tags:
-            # Converting comma separated string tag ids to int
-            tags_id = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tags_id)
-        if ingredients:
-            # Converting comma separated string ingredient ids to int
-            ingredients_id = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredients_id)
+        """ Tag/ingredient filters are EXISTS subqueries on the through
+        tables, so the recipes are not joined to their links and need no
+        DISTINCT to remove duplicates. """
+        queryset = filter_recipes(self.queryset, self.request.query_params)
 
-        return queryset.filter(
+        queryset = self._search(queryset.filter(
             user=self.request.user
-        ).order_by('-id').distinct()
+        )).order_by(*self.get_ordering())
+
+        """ Nested tags/ingredients are loaded with one query each for the
+        whole page instead of two extra queries per recipe. The image upload
+        serializer has no nested fields so it skips the prefetch. """
+        serializer_class = self.get_serializer_class()
+        if issubclass(serializer_class, RecipeSerializer):
+            queryset = self._select_columns(queryset, serializer_class)
+
+        return queryset
 
     """ Overriding this method as we have different serializer for
     list and detail view"""
@@ -106,6 +353,14 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         return self.serializer_class
 
+    def list(self, request, *args, **kwargs):
+        """List recipes, from the response cache when possible."""
+        return self.cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a recipe, from the response cache when possible."""
+        return self.cached(super().retrieve, request, *args, **kwargs)
+
     def perform_create(self, serializer):
         """Create a new recipe."""
 
@@ -113,6 +368,15 @@ class RecipeViewSet(viewsets.ModelViewSet):
         to that recipe"""
         serializer.save(user=self.request.user)
 
+    def perform_destroy(self, instance):
+        """Delete a recipe and invalidate the cached responses."""
+        with transaction.atomic():
+            # The cascade deletes the links without sending m2m_changed
+            release_links([instance.pk])
+            instance.delete()
+            bump_version(instance.user_id)
+            schedule_release([instance.image.name])
+
     """Creating a custom upload action which only accepts POST request,
     detail = True - The action applies to a single instance
     url_path - URL segment for this action"""
@@ -131,6 +395,280 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    """ Export action streaming all the recipes matching the filters, the
+    format (ndjson, csv or zip with images) is picked with ?format= or the
+    Accept header through the export renderers. """
+    @action(
+        methods=['GET'],
+        detail=False,
+        renderer_classes=[
+            NDJSONExportRenderer,
+            CSVExportRenderer,
+            ZipExportRenderer
+        ]
+    )
+    def export(self, request):
+        """Stream the recipes as NDJSON, CSV or a zip with images."""
+        renderer = request.accepted_renderer
+        exporter = RecipeExporter(
+            self.get_queryset(),
+            self.get_serializer(),
+            chunk_size=self.export_chunk_size
+        )
+
+        response = StreamingHttpResponse(
+            exporter.stream(renderer.format),
+            content_type=renderer.media_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{renderer.extension}"'
+        )
+        return response
+
+    """ Facet counts of the recipes matching the filters, for filter
+    sidebars. Cached like the lists, as they change with the same writes. """
+    @action(methods=['GET'], detail=False)
+    def facets(self, request):
+        """Count the filtered recipes per tag, ingredient and bucket."""
+        return self.cached(self._facets, request)
+
+    def _facets(self, request):
+        """Build the facet counts, unfiltered ones read maintained counts."""
+        filtered = any(
+            request.query_params.get(key)
+            for key in BULK_FILTER_KEYS + ['search']
+        )
+        return Response(facet_counts(
+            request.user,
+            self.get_queryset(),
+            self.facet_limit,
+            filtered=filtered
+        ))
+
+    def _validate_bulk(self, items):
+        """Validate each item, returning the valid data and the errors."""
+        if not isinstance(items, list) or \
+                not 0 < len(items) <= self.bulk_max_items:
+            raise ValidationError(
+                f'Expected a list of 1 to {self.bulk_max_items} recipes.'
+            )
+
+        valid, errors = {}, {}
+        for index, item in enumerate(items):
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                valid[index] = serializer.validated_data
+            else:
+                errors[index] = serializer.errors
+
+        return valid, errors
+
+    """ Bulk create action, each recipe is validated on its own and the
+    valid ones are inserted together. The response lists the outcome of
+    every item in request order. """
+    @extend_schema(
+        methods=['POST'],
+        request=RecipeDetailSerializer(many=True),
+        responses={
+            status.HTTP_201_CREATED: OpenApiTypes.OBJECT,
+            status.HTTP_207_MULTI_STATUS: OpenApiTypes.OBJECT,
+        }
+    )
+    @action(methods=['POST'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        """Create many recipes with set based statements."""
+        valid, errors = self._validate_bulk(request.data)
+        recipes = bulk_create_recipes(request.user, valid.values())
+        created = dict(zip(valid, recipes))
+
+        results = []
+        for index in range(len(request.data)):
+            if index in created:
+                results.append({
+                    'index': index,
+                    'status': status.HTTP_201_CREATED,
+                    'id': created[index].id,
+                })
+            else:
+                results.append({
+                    'index': index,
+                    'status': status.HTTP_400_BAD_REQUEST,
+                    'errors': errors[index],
+                })
+
+        if not created:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif errors:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+
+        return Response({'results': results}, status=response_status)
+
+    def _bulk_targets(self, body):
+        """Return the user's recipes selected by body and the ids asked for.
+
+        body holds either a list of ids or a filter object taking the same
+        keys as the list query parameters, ids is None for filters.
+        """
+        if not isinstance(body, dict) or ('ids' in body) == ('filter' in body):
+            raise ValidationError('Expected either ids or filter.')
+
+        queryset = self.queryset.filter(user=self.request.user)
+        if 'ids' in body:
+            ids = body['ids']
+            # bool is an int subclass, JSON true must not be taken as id 1
+            if not isinstance(ids, list) or \
+                    not 0 < len(ids) <= self.bulk_max_items or \
+                    not all(type(pk) is int for pk in ids):
+                raise ValidationError({
+                    'ids': f'Expected a list of 1 to {self.bulk_max_items} '
+                           'recipe IDs.'
+                })
+            ids = list(dict.fromkeys(ids))
+            return queryset.filter(pk__in=ids), ids
+
+        """ Unknown keys are rejected rather than ignored, a mistyped
+        filter must not select (and delete) every recipe. """
+        filters = body['filter']
+        if not isinstance(filters, dict) or not filters or \
+                not set(filters) <= set(BULK_FILTER_KEYS):
+            raise ValidationError({
+                'filter': 'Expected filters from: '
+                          f'{", ".join(BULK_FILTER_KEYS)}.'
+            })
+
+        return filter_recipes(
+            queryset,
+            {key: str(value) for key, value in filters.items()}
+        ), None
+
+    def _bulk_response(self, ids, done, done_status):
+        """Report the outcome of a bulk update/delete for every id."""
+        done = set(done)
+        # Filters report the recipes they matched
+        requested = sorted(done) if ids is None else ids
+
+        results = [
+            {
+                'id': pk,
+                'status': done_status if pk in done
+                else status.HTTP_404_NOT_FOUND,
+            }
+            for pk in requested
+        ]
+
+        if requested and not done:
+            response_status = status.HTTP_404_NOT_FOUND
+        elif len(done) < len(requested):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_200_OK
+
+        return Response({'results': results}, status=response_status)
+
+    """ Bulk partial update, the same payload is applied to every selected
+    recipe with a single UPDATE. Nested tags/ingredients and images are
+    not supported here. """
+    @bulk.mapping.patch
+    @extend_schema(
+        methods=['PATCH'],
+        request=OpenApiTypes.OBJECT,
+        responses={
+            status.HTTP_200_OK: OpenApiTypes.OBJECT,
+            status.HTTP_207_MULTI_STATUS: OpenApiTypes.OBJECT,
+        }
+    )
+    def bulk_update(self, request):
+        """Partially update many recipes at once."""
+        queryset, ids = self._bulk_targets(request.data)
+        data = request.data.get('data')
+        if not isinstance(data, dict) or not data or \
+                not set(data) <= set(BULK_UPDATE_FIELDS):
+            raise ValidationError({
+                'data': 'Expected values for some of: '
+                        f'{", ".join(BULK_UPDATE_FIELDS)}.'
+            })
+
+        serializer = self.get_serializer(data=data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        updated = bulk_update_recipes(queryset, serializer.validated_data)
+
+        return self._bulk_response(ids, updated, status.HTTP_200_OK)
+
+    """ Bulk delete, the links of the recipes are removed set based before
+    the recipes themselves and their images once the deletion commits. """
+    @bulk.mapping.delete
+    @extend_schema(
+        methods=['DELETE'],
+        request=OpenApiTypes.OBJECT,
+        responses={
+            status.HTTP_204_NO_CONTENT: None,
+            status.HTTP_207_MULTI_STATUS: OpenApiTypes.OBJECT,
+        }
+    )
+    def bulk_destroy(self, request):
+        """Delete many recipes at once."""
+        queryset, ids = self._bulk_targets(request.data)
+        deleted = bulk_delete_recipes(queryset)
+
+        return self._bulk_response(ids, deleted, status.HTTP_204_NO_CONTENT)
+
+    def _get_import_options(self, request):
+        """Return the validated format and chunk size of an import."""
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': 'No file was submitted.'})
+
+        file_format = request.data.get('format') or guess_format(upload.name)
+        if file_format not in FORMATS:
+            raise ValidationError({
+                'format': f'Expected one of: {", ".join(FORMATS)}.'
+            })
+
+        chunk_size = request.data.get('chunk_size', self.import_chunk_size)
+        try:
+            chunk_size = int(chunk_size)
+        except (TypeError, ValueError):
+            chunk_size = 0
+        if not 0 < chunk_size <= self.max_import_chunk_size:
+            raise ValidationError({
+                'chunk_size': 'Expected a number between 1 and '
+                              f'{self.max_import_chunk_size}.'
+            })
+
+        return upload, file_format, chunk_size
+
+    """ Import action reading an uploaded CSV or NDJSON file as it goes.
+    Large uploads are spooled to disk by Django, rows are then read one at
+    a time and committed in chunks while the progress of each chunk and
+    the final summary are streamed back as NDJSON. """
+    @action(
+        methods=['POST'],
+        detail=False,
+        url_path='import',
+        parser_classes=[MultiPartParser]
+    )
+    def import_recipes(self, request):
+        """Import recipes from an uploaded CSV or NDJSON file."""
+        upload, file_format, chunk_size = self._get_import_options(request)
+        importer = RecipeImporter(
+            request.user,
+            self.get_serializer_class(),
+            context=self.get_serializer_context(),
+            chunk_size=chunk_size
+        )
+        renderer = FastJSONRenderer()
+
+        def events():
+            for progress in importer.run(READERS[file_format](upload)):
+                yield renderer.render(progress) + b'\n'
+
+        return StreamingHttpResponse(
+            events(),
+            content_type=NDJSONExportRenderer.media_type
+        )
+
 
 # extend schema view decorator allows us to extned our schema view
 @extend_schema_view(
@@ -146,20 +684,47 @@ class RecipeViewSet(viewsets.ModelViewSet):
                             \n 0 = Filter All Tags/Ingredients
                             \n 1 = Filter Tags/Ingredients assigned to recipe
                             """
-            )
+            ),
+            OpenApiParameter(
+                'ordering',
+                OpenApiTypes.STR,
+                description='Comma separated keys (name, recipe_count, id), '
+                            'prefix - for descending'
+            ),
+            OpenApiParameter(
+                'q',
+                OpenApiTypes.STR,
+                description='Autocomplete, return the names starting with '
+                            'or closest to q (not paginated)'
+            ),
+            OpenApiParameter(
+                'limit',
+                OpenApiTypes.INT,
+                description='Maximum number of autocomplete matches'
+            ),
         ]
     )
 )
-class BaseRecipeAttrViewSet(mixins.UpdateModelMixin,
-                            mixins.ListModelMixin,
+class BaseRecipeAttrViewSet(CachedResponseMixin,
+                            mixins.UpdateModelMixin,
+                            CompiledListModelMixin,
                             mixins.DestroyModelMixin,
                             viewsets.GenericViewSet):
 
     """Base viewset for recipe attributes."""
     # Token Authentication
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     # Permissions that authenticated users have in the system
     permission_classes = [IsAuthenticated]
+    # Cursor pagination, enabled when the client sends ?page_size=
+    pagination_class = KeysetPagination
+    # Id breaks ties between equal names so every row has a unique key
+    ordering = ('-name', '-id')
+    # Keys ?ordering= accepts, -recipe_count lists the most used first
+    ordering_fields = ['name', 'recipe_count', 'id']
+    # Number of autocomplete matches returned by default and at most
+    autocomplete_limit = 10
+    max_autocomplete_limit = 50
 
     """ Overiding getquery set method to filter the Tags/Ingredients for
     authenticated user """
@@ -176,11 +741,53 @@ class BaseRecipeAttrViewSet(mixins.UpdateModelMixin,
         """Applying filter to remove the recipes who does not
         have any tags/ingredients assigned to it"""
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            # Maintained counter, no join with the through table needed
+            queryset = queryset.filter(recipe_count__gt=0)
 
         return queryset.filter(
             user=self.request.user
-        ).order_by('-name').distinct()
+        ).order_by(*self.get_ordering())
+
+    def get_ordering(self):
+        """Return the ordering of ?ordering= or the default by name."""
+        value = self.request.query_params.get('ordering')
+        if value:
+            return parse_ordering(value, self.ordering_fields)
+
+        return self.ordering
+
+    def _get_limit(self):
+        """Return the validated ?limit= for autocomplete."""
+        limit = self.request.query_params.get('limit')
+        if limit is None:
+            return self.autocomplete_limit
+
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if not 0 < limit <= self.max_autocomplete_limit:
+            raise ValidationError({
+                'limit': 'Expected a number between 1 and '
+                         f'{self.max_autocomplete_limit}.'
+            })
+
+        return limit
+
+    def list(self, request, *args, **kwargs):
+        """List tags/ingredients, from the response cache when possible."""
+        return self.cached(self._list, request, *args, **kwargs)
+
+    def _list(self, request, *args, **kwargs):
+        """ With ?q= only the best few matches are returned, they are
+        ranked rather than ordered by name so are not paginated. """
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return super().list(request, *args, **kwargs)
+
+        matches = autocomplete(self.get_queryset(), text, self._get_limit())
+        serializer = self.get_serializer(matches, many=True)
+        return Response(serializer.data)
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
@@ -197,3 +804,80 @@ class IngredientViewSet(BaseRecipeAttrViewSet):
     # Objects available for this viewset
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
+
+
+@extend_schema_view(
+    update=extend_schema(
+        request={'application/octet-stream': OpenApiTypes.BINARY},
+        parameters=[
+            OpenApiParameter(
+                'Content-Range',
+                OpenApiTypes.STR,
+                location=OpenApiParameter.HEADER,
+                required=True,
+                description='bytes <start>-<end>/<size>, start must be the '
+                            'offset of the upload'
+            ),
+        ]
+    ),
+    finalize=extend_schema(request=None, responses=RecipeImageSerializer)
+)
+class ImageUploadViewSet(mixins.CreateModelMixin,
+                         mixins.RetrieveModelMixin,
+                         mixins.DestroyModelMixin,
+                         viewsets.GenericViewSet):
+    """Resumable chunked uploads of recipe images.
+
+    POST creates an upload for a recipe, PUT appends a ranged chunk, GET
+    returns the offset to resume from and finalize sets the recipe image.
+    """
+
+    # Objects available for this viewset
+    queryset = ImageUpload.objects.all()
+    serializer_class = ImageUploadSerializer
+    # Token Authentication
+    authentication_classes = [CachedTokenAuthentication]
+    # Permissions that authenticated users have in the system
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Retrieve the uploads of the authenticated user."""
+        return self.queryset.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        """Create an upload and its empty file."""
+        create_part(serializer.save(user=self.request.user))
+
+    def update(self, request, pk=None):
+        """Append the chunk in the request body to the upload.
+
+        The body is read as a stream and never parsed, see append_chunk.
+        """
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+
+        upload = append_chunk(
+            self.get_queryset(),
+            pk,
+            request.stream,
+            request.META.get('HTTP_CONTENT_RANGE'),
+            content_length
+        )
+        return Response(self.get_serializer(upload).data)
+
+    def perform_destroy(self, instance):
+        """Abort an upload and delete its file."""
+        discard_upload(instance)
+
+    @action(methods=['POST'], detail=True)
+    def finalize(self, request, pk=None):
+        """Set the complete upload as the image of its recipe."""
+        recipe = finalize_upload(self.get_queryset(), pk)
+        serializer = RecipeImageSerializer(
+            recipe,
+            context=self.get_serializer_context()
+        )
+
+        return Response(serializer.data)
@@ -2,8 +2,10 @@
 Views for the user API.
 """
 
+from core.authentication import CachedTokenAuthentication
+
 from rest_framework.authtoken.views import ObtainAuthToken
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
 from rest_framework.settings import api_settings
 
 from user.serializers import (
@@ -27,7 +29,7 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated User"""
     serializer_class = UserSerializer
     # Token Authentication
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     # Permissions that authenticated users have in the system
     permission_classes = [permissions.IsAuthenticated]
 
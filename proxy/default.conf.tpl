@@ -5,6 +5,21 @@ server {
         alias /vol/static;
     }
 
+    location /static/media/uploads/recipe/ {
+        alias /vol/static/media/uploads/recipe/;
+        # Images are named by the hash of their bytes and never change
+        add_header Cache-Control "public, max-age=31536000, immutable";
+    }
+
+    location /recipe/recipes/import/ {
+        uwsgi_pass              ${APP_HOST}:${APP_PORT};
+        include                 /etc/nginx/uwsgi_params;
+        # Imports upload large files and stream their progress back
+        client_max_body_size    600M;
+        uwsgi_buffering         off;
+        uwsgi_read_timeout      900s;
+    }
+
     location / {
         uwsgi_pass              ${APP_HOST}:${APP_PORT};
         include                 /etc/nginx/uwsgi_params;